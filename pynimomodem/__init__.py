@@ -18,6 +18,7 @@ provide further details with the `AtErrorCode`.
 from .constants import (
     AtErrorCode,
     BeamState,
+    CommandPriority,
     ControlState,
     DataFormat,
     EventNotification,
@@ -37,6 +38,7 @@ from .constants import (
     WakeupWay,
     WorkMode,
 )
+from .asyncmodem import AsyncNimoModem
 from .modem import (
     Manufacturer,
     ModemLocation,
@@ -51,21 +53,41 @@ from .modem import (
     AcquisitionInfo,
     SatelliteLocation,
 )
+from .coverage import BeamCoverageIndex, BeamPrediction
+from .dialect import Dialect, DialectCommand, get_dialect
+from .engine import ModemEngine
+from .gnss import LocationService
+from .hooks import CommandEvent, CommandHooks
+from .metrics import ModemMetrics
+from .pool import ModemPool, PoolResult
+from .shard import ModemProxy, ModemShardSupervisor
 
 __all__ = [
+    'AsyncNimoModem',
     'AtErrorCode',
+    'BeamCoverageIndex',
+    'BeamPrediction',
     'BeamState',
+    'CommandEvent',
+    'CommandHooks',
+    'CommandPriority',
     'ControlState',
     'DataFormat',
+    'Dialect',
+    'DialectCommand',
     'GeoBeam',
     'GeoSatellite',
     'GnssMode',
     'GnssModeOrbcomm',
     'GnssModeQuectel',
+    'LocationService',
     'Manufacturer',
     'MessagePriority',
     'MessageState',
     'ModemLocation',
+    'ModemPool',
+    'ModemProxy',
+    'ModemShardSupervisor',
     'MoMessage',
     'MtMessage',
     'NetworkStatus',
@@ -73,13 +95,17 @@ __all__ = [
     'ModemAtError',
     'ModemCrcConfig',
     'ModemCrc',
+    'ModemEngine',
+    'ModemMetrics',
     'ModemError',
     'ModemTimeout',
+    'PoolResult',
     'PowerMode',
     'AcquisitionInfo',
     'SatelliteLocation',
     'SignalQuality',
     'WakeupPeriod',
+    'get_dialect',
     'WakeupWay',
     'WorkMode',
     'UrcCode',
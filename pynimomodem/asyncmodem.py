@@ -0,0 +1,337 @@
+"""Class for asynchronous (asyncio) operation of a Non-IP Modem.
+
+`AsyncNimoModem` exposes the same modem operations as `NimoModem` as
+coroutines. Rather than blocking a thread per modem while waiting for a
+response, the serial port file descriptor is registered with the running event
+loop and each response is parsed incrementally as data arrives, allowing many
+modems to be served by a single thread.
+
+Command building, response parsing and manufacturer-specific handling are
+shared with `NimoModem`.
+
+Requires an event loop supporting `add_reader` (e.g. the default selector
+event loop on POSIX platforms).
+
+"""
+import asyncio
+import logging
+import os
+from typing import AsyncGenerator
+
+from .constants import AtErrorCode, AtParsingState, CommandPriority, UrcCode
+from .message import MtMessage
+from .modem import MT_PUMP_BATCH, Manufacturer, NimoModem
+from .nimoutils import dprint, vlog
+from .scheduler import AsyncCommandScheduler, WaitStats
+
+VLOG_TAG = 'asyncmodem'
+READ_CHUNK_SIZE = 4096
+
+_log = logging.getLogger(__name__)
+
+
+class AsyncNimoModem(NimoModem):
+    """An asyncio class for NIMO satellite IoT modem interaction.
+    
+    Modem operations such as `send_data`, `get_mt_message`, `get_location` or
+    `get_network_status` are coroutines to be awaited. Commands from
+    concurrent tasks are sent one at a time by `CommandPriority` class, then
+    in the order requested.
+    
+    While attached to the event loop, unsolicited data such as URCs and boot
+    strings are captured as they arrive, between or during commands.
+    
+    Instances are bound to the event loop of their first operation and are not
+    thread safe.
+    
+    """
+    def __init__(self, serial_port: str, **kwargs) -> None:
+        """Instantiate the AsyncNimoModem object.
+        
+        Args and kwargs as per `NimoModem`.
+        
+        Raises:
+            `ConnectionError` if unable to connect to the serial port or it
+                cannot be monitored by an event loop.
+        
+        """
+        super().__init__(serial_port, **kwargs)
+        if self._modem._fileno() is None:
+            self._serial.close()
+            raise ConnectionError('Serial port does not support asyncio')
+        self._loop: 'asyncio.AbstractEventLoop|None' = None
+        self._fd: 'int|None' = None
+        self._scheduler = AsyncCommandScheduler()
+        self._modem.metrics.scheduler = self._scheduler
+        self._rx_event: 'asyncio.Event|None' = None
+        self._response: 'asyncio.Future|None' = None
+        self._settling: 'asyncio.TimerHandle|None' = None
+    
+    @property
+    def queue_wait_stats(self) -> 'dict[CommandPriority, WaitStats]':
+        """Time commands waited for the modem, by `CommandPriority` class."""
+        return self._scheduler.stats()
+    
+    @property
+    def baudrate(self) -> int:
+        """The baudrate of the serial connection."""
+        return self._modem.serial.baudrate
+    
+    @baudrate.setter
+    def baudrate(self, baudrate: int):
+        raise AttributeError('Use set_baudrate to change the modem baud rate')
+    
+    @property
+    def _mfr(self) -> Manufacturer:
+        # resolving would block the event loop, operations use _get_mfr
+        raise AttributeError('Use get_manufacturer to resolve the modem type')
+    
+    @property
+    def _is_simulator(self) -> bool:
+        raise AttributeError('Use get_mobile_id to identify the simulator')
+    
+    async def connect(self) -> None:
+        """Attach to the modem serial port and the running event loop."""
+        super().connect()
+        self._attach()
+    
+    async def disconnect(self) -> None:
+        """Detach from the event loop and modem serial communications."""
+        self._detach()
+        super().disconnect()
+    
+    async def start_reader(self) -> None:
+        """Start capturing data from the modem on the running event loop.
+        
+        Done automatically on connect or on the first operation.
+        
+        """
+        self._attach()
+    
+    async def stop_reader(self) -> None:
+        """Stop monitoring the modem serial port on the event loop."""
+        self._detach()
+    
+    async def await_boot(self, boot_timeout: int = 10) -> bool:
+        """Indicates if a boot string is received within a timeout window.
+        
+        Args:
+            boot_timeout (int): The maximum time to wait in seconds.
+        
+        Returns:
+            True if a valid boot string was received inside the timeout.
+        
+        """
+        _log.debug('Awaiting modem boot string for %d seconds...', boot_timeout)
+        if await self._await_unsolicited(('ST Version', 'RDY'), boot_timeout):
+            self._modem_booted = True
+            self._cache.clear()
+            _log.debug('Found boot string')
+        return self._modem_booted
+    
+    async def get_urc(self, timeout: float = 0) -> 'UrcCode|None':
+        """Get the pending Unsolicited Result Code if one is present.
+        
+        Args:
+            timeout (float): Optional time in seconds to wait for a URC.
+        
+        """
+        mfr = await self._run(self._get_mfr())
+        if mfr != Manufacturer.QUECTEL:
+            raise ValueError('Modem does not support this feature')
+        result = await self._await_unsolicited(('+QURC:',), timeout)
+        if result:
+            return self._parse_urc(result)
+        return None
+    
+    async def pump_mt_messages(self,
+                               max_messages: 'int|None' = None,
+                               batch_size: int = MT_PUMP_BATCH,
+                               ) -> 'AsyncGenerator[MtMessage, None]':
+        """Drain the Rx queue, yielding each mobile-terminated message.
+        
+        An asynchronous generator as per `NimoModem.pump_mt_messages`::
+            
+            async for message in modem.pump_mt_messages():
+                handle(message)
+        
+        Messages yielded before the generator is closed early are deleted
+        by its `aclose`.
+        
+        """
+        steps = self._pump_steps(max_messages, batch_size)
+        result, error = None, None
+        while True:
+            try:
+                step = (steps.send(result) if error is None
+                        else steps.throw(error))
+            except StopIteration:
+                return
+            result, error = None, None
+            if isinstance(step, MtMessage):
+                try:
+                    yield step
+                except BaseException as exc:   # e.g. closed by the consumer
+                    error = exc
+                continue
+            try:
+                result = await self._run(*step)
+            except Exception as exc:
+                error = exc
+    
+    async def _await_unsolicited(self,
+                                 prefixes: 'tuple[str]',
+                                 timeout: float) -> 'str|None':
+        """Get the next queued unsolicited line matching a prefix."""
+        self._attach()
+        deadline = self._loop.time() + timeout
+        while True:
+            line = self._modem.get_unsolicited(prefixes)
+            remaining = deadline - self._loop.time()
+            if line or remaining <= 0:
+                return line
+            self._rx_event.clear()
+            try:
+                await asyncio.wait_for(self._rx_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _attach(self) -> None:
+        """Register the serial port with the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            raise RuntimeError('Modem is attached to another event loop')
+        if not self._serial.is_open:
+            raise ConnectionError('Serial port is not open')
+        self._loop = loop
+        self._fd = self._modem._fileno()
+        self._rx_event = asyncio.Event()
+        loop.add_reader(self._fd, self._on_readable)
+        if vlog(VLOG_TAG):
+            _log.debug('Attached %s to event loop', self._serial.name)
+    
+    def _detach(self, exc: 'Exception|None' = None) -> None:
+        """Remove the serial port from the event loop."""
+        if self._loop is None:
+            return
+        self._loop.remove_reader(self._fd)
+        self._loop = None
+        if self._response is not None and not self._response.done():
+            self._response.set_exception(
+                exc or ConnectionError('Modem detached from event loop'))
+        if vlog(VLOG_TAG):
+            _log.debug('Detached %s from event loop', self._serial.name)
+    
+    def _run(self,
+             operation,
+             priority: CommandPriority = CommandPriority.POLL):
+        """Run an operation as a coroutine on the event loop."""
+        return self._drive(operation, priority)
+    
+    async def _drive(self, operation, priority: CommandPriority):
+        """Send each command requested by the operation, awaiting responses."""
+        self._attach()
+        result = None
+        while True:
+            try:
+                command, prefix, timeout = operation.send(result)
+            except StopIteration as stop:
+                return stop.value
+            result = await self._transact(command, prefix, timeout, priority)
+    
+    async def _transact(self,
+                        command: str,
+                        prefix: str,
+                        timeout: 'float|None',
+                        priority: CommandPriority = CommandPriority.POLL,
+                        ) -> 'tuple[AtErrorCode, str]':
+        """Send a command and await its parsed response."""
+        buffer = self._modem
+        await self._scheduler.acquire(priority)
+        try:
+            buffer._scheduler.acquire(priority)
+            with buffer._rx_cond:
+                dump_buffer = buffer._drain_rx()
+            data = buffer._start_command(command, dump_buffer)
+            if not isinstance(timeout, (int, float)) or timeout <= 0:
+                timeout = buffer.response_timeout(buffer._pending_command)
+            self._response = self._loop.create_future()
+            try:
+                await self._write(data)
+                if vlog(VLOG_TAG):
+                    _log.debug('Sent on serial: %s', dprint(data.decode()))
+                buffer._dispatch_unsolicited()
+                try:
+                    await asyncio.wait_for(self._response, timeout)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                self._response = None
+                if self._settling is not None:
+                    self._settling.cancel()
+                    self._settling = None
+                with buffer._rx_cond:
+                    error = buffer._complete_parsing(prefix)
+            buffer._dispatch_unsolicited()
+            return error, buffer.get_response()
+        finally:
+            self._scheduler.release()
+    
+    async def _write(self, data: bytes) -> None:
+        """Write to the non-blocking serial port, awaiting space as needed."""
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self._fd, view):]
+            except BlockingIOError:
+                pass
+            if view:
+                writable = self._loop.create_future()
+                self._loop.add_writer(
+                    self._fd,
+                    lambda: writable.done() or writable.set_result(None))
+                try:
+                    await writable
+                finally:
+                    self._loop.remove_writer(self._fd)
+    
+    def _on_readable(self) -> None:
+        """Event loop callback to route data received from the modem."""
+        buffer = self._modem
+        try:
+            data = os.read(self._fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            _log.error('Serial read failed: %s', exc)
+            self._detach(ConnectionError(str(exc)))
+            return
+        if not data:
+            _log.error('Serial port closed')
+            self._detach(ConnectionError('Serial port closed'))
+            return
+        with buffer._rx_cond:
+            buffer._receive(data)
+            settling = buffer._error_settling
+            complete = buffer._parsing >= AtParsingState.OK
+        buffer._dispatch_unsolicited()
+        self._rx_event.set()
+        if self._response is None or self._response.done():
+            return
+        if settling:
+            # allow a character time for a CRC following the error
+            if self._settling is None:
+                self._settling = self._loop.call_later(buffer._char_delay,
+                                                       self._on_settled)
+        elif complete:
+            self._response.set_result(None)
+    
+    def _on_settled(self) -> None:
+        """Completes an errored response if no CRC followed."""
+        self._settling = None
+        with self._modem._rx_cond:
+            self._modem._error_settling = False
+        if self._response is not None and not self._response.done():
+            self._response.set_result(None)
@@ -5,14 +5,21 @@ AT commands on a serial link to a satellite modem following V.25 spec.
 
 """
 import logging
+import select
 import threading
 import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterator
 
 from serial import Serial
 
-from .constants import AtErrorCode, AtParsingState
-from .crcxmodem import apply_crc, validate_crc
+from .constants import AtErrorCode, AtParsingState, CommandPriority
+from .crcxmodem import CrcXmodem, apply_crc
+from .hooks import CommandEvent, CommandHooks
+from .metrics import ModemMetrics
 from .nimoutils import dprint, vlog
+from .scheduler import CommandScheduler
 
 VLOG_TAG = 'atcommand'
 DEFAULT_AT_TIMEOUT = 3   # seconds
@@ -20,11 +27,35 @@ VRES_OK = '\r\nOK\r\n'
 VRES_ERR = '\r\nERROR\r\n'
 RES_OK = '0\r'
 RES_ERR = '4\r'
-ORPHAN_MAX_BYTES = 500
+ORPHAN_MAX_RECORDS = 32
+ORPHAN_MAX_BYTES = 4096   # total retained across orphan records
+WAIT_POLL_INTERVAL = 0.05   # seconds, if the port cannot be waited on
+READER_WAIT = 0.5   # seconds between background reader stop checks
+UNSOLICITED_PREFIXES = ('+QURC:', 'RDY', 'ST Version')
+UNSOLICITED_MAX_LINES = 50
+BITS_PER_BYTE = 10   # 8N1 serial framing
+RESPONSE_OVERHEAD_BYTES = 16   # line breaks, result code and optional CRC
+LATENCY_MAX_COMMANDS = 64   # commands tracked for learned response latency
 
 _log = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class OrphanRecord:
+    """Data received outside of any command response.
+    
+    Attributes:
+        data (bytes): The raw data received.
+        timestamp (float): The `time.monotonic()` value when set aside.
+        command (str): The command pending when the data arrived, or empty
+            if received between commands.
+    
+    """
+    data: bytes
+    timestamp: float
+    command: str = ''
+
+
 class AtCommandBuffer:
     """A command/response buffer for communicating with a NIMO modem.
     
@@ -34,8 +65,10 @@ class AtCommandBuffer:
         verbose (bool): Verbose response codes (default True)
         quiet (bool): Suppressed response codes (default False)
         crc (bool): CRC/checksum request/response enabled (default False)
-        ready (threading.Event): Blocks new requests until pending response
-            has completed or timed out.
+        abort_on_garbage (bool): End a response with `INVALID_RESPONSE` on
+            receiving non-ASCII data, as seen with a baud rate mismatch.
+        unsolicited_prefixes (tuple): Line prefixes identifying unsolicited
+            data such as URCs and boot strings, queued for `get_unsolicited`.
     
     """
     def __init__(self, serial: Serial) -> None:
@@ -43,6 +76,7 @@ class AtCommandBuffer:
         self.verbose: bool = True
         self.quiet: bool = False
         self.crc: bool = False
+        self.abort_on_garbage: bool = False
         if not isinstance(serial, Serial):
             raise ValueError('Invalid serial port')
         if vlog(VLOG_TAG):
@@ -52,54 +86,424 @@ class AtCommandBuffer:
         self._char_delay: float = 8 / serial.baudrate
         self._pending_command: str = None
         self._rx_buffer: str = ''
-        self._orphaned: str = ''
-        self._lock = threading.Lock()
+        self._rx_chunk = bytearray()   # reusable bulk read buffer
+        self._rx_pos: int = 0   # next unconsumed index of _rx_chunk
+        self._orphaned: 'deque[OrphanRecord]' = deque(maxlen=ORPHAN_MAX_RECORDS)
+        self._orphaned_bytes: int = 0
+        self._scheduler = CommandScheduler()
+        self.metrics = ModemMetrics(self._scheduler)
+        self._parse_buf = bytearray()   # reusable response parse buffer
+        self._parse_start: int = 0   # index where the response begins
+        self._parsing: AtParsingState = AtParsingState.OK
+        self._result_ok: bool = False
+        self._crc_found: bool = False
+        self._rx_crc = CrcXmodem()   # running CRC of the response so far
+        self._rx_crc_start: int = 0
+        self._rx_crc_end: int = 0
+        self._error_settling: bool = False
+        self._parse_error: AtErrorCode = AtErrorCode.OK
+        self._command_bytes: bytes = b''
+        self._parse_excluded: 'list[tuple[int, int]]' = []
+        self._rx_cond = threading.Condition()
+        self._reader: 'threading.Thread|None' = None
+        self._reader_stop = threading.Event()
+        self.unsolicited_prefixes: 'tuple[str]' = UNSOLICITED_PREFIXES
+        self._unsolicited_prefixes_b: 'tuple[bytes]' = ()
+        self._unsolicited: 'deque[str]' = deque(maxlen=UNSOLICITED_MAX_LINES)
+        self._unsolicited_callbacks: list = []
+        self._unsolicited_dispatch: 'list[str]' = []
+        self._sent_time: float = 0
+        self._latency: 'dict[str, list[float]]' = {}
+        self._response_sizes: 'dict[str, int]' = {}
+        self._hooks: 'list[CommandHooks]' = []
+        self._first_byte_time: 'float|None' = None
+        self._echo_time: 'float|None' = None
+        self._result_time: 'float|None' = None
+    
+    @property
+    def reader_running(self) -> bool:
+        """Indicates if the background reader owns the serial port."""
+        return self._reader is not None
+    
+    def start_reader(self) -> None:
+        """Starts a background thread that owns reading the serial port.
+        
+        Solicited data is routed to the pending command response while
+        unsolicited lines are queued for `get_unsolicited` and passed to any
+        registered callbacks, so they are not lost between or during commands.
+        
+        """
+        if self._reader is not None:
+            return
+        self._reader_stop.clear()
+        self._reader = threading.Thread(target=self._run_reader,
+                                        name='AtCommandReader',
+                                        daemon=True)
+        self._reader.start()
+    
+    def stop_reader(self) -> None:
+        """Stops the background reader thread, if running."""
+        reader = self._reader
+        if reader is None:
+            return
+        self._reader_stop.set()
+        if reader is not threading.current_thread():
+            reader.join()
+    
+    def add_unsolicited_callback(self,
+                                 callback: 'Callable[[str], None]',
+                                 prefixes: 'tuple[str]|None' = None,
+                                 ) -> None:
+        """Registers a callback for unsolicited lines received.
+        
+        Lines matching a callback are passed to it instead of being queued
+        for `get_unsolicited`. Callbacks run on the thread that read the data,
+        after the buffer is released. They should return quickly and must not
+        wait on commands.
+        
+        Args:
+            callback: Called with each unsolicited line.
+            prefixes: Optional filter for the line prefix(es) to receive.
+        
+        """
+        if not callable(callback):
+            raise ValueError('Invalid callback')
+        self.remove_unsolicited_callback(callback)
+        self._unsolicited_callbacks.append((callback, prefixes))
+    
+    def remove_unsolicited_callback(self, callback: 'Callable[[str], None]'):
+        """Removes a previously registered unsolicited line callback."""
+        self._unsolicited_callbacks = [
+            (cb, prefixes) for cb, prefixes in self._unsolicited_callbacks
+            if cb != callback
+        ]
+    
+    def add_command_hooks(self, hooks: CommandHooks) -> None:
+        """Registers callbacks for command lifecycle events.
+        
+        Args:
+            hooks: An instance of a `CommandHooks` subclass.
+        
+        """
+        if not isinstance(hooks, CommandHooks):
+            raise ValueError('Invalid command hooks')
+        if hooks not in self._hooks:
+            self._hooks = self._hooks + [hooks]
+    
+    def remove_command_hooks(self, hooks: CommandHooks) -> None:
+        """Removes previously registered command lifecycle callbacks."""
+        self._hooks = [h for h in self._hooks if h is not hooks]
+    
+    def _emit(self, event_name: str,
+              error: AtErrorCode = AtErrorCode.OK) -> None:
+        """Calls the registered hooks for a command lifecycle event."""
+        event = CommandEvent(self._pending_command,
+                             time.monotonic(),
+                             self._sent_time,
+                             self._first_byte_time,
+                             self._echo_time,
+                             self._result_time,
+                             len(self._command_bytes),
+                             len(self._parse_buf),
+                             error)
+        for hooks in self._hooks:
+            try:
+                getattr(hooks, event_name)(event)
+            except Exception as exc:
+                _log.error('Command hook %s error: %s', event_name, exc)
+    
+    def get_unsolicited(self,
+                        prefixes: 'tuple[str]|None' = None,
+                        timeout: float = 0,
+                        ) -> 'str|None':
+        """Gets the oldest queued unsolicited line.
+        
+        Waiting is only possible while the background reader is running.
+        
+        Args:
+            prefixes: Optional filter for the line prefix(es) to get.
+            timeout: Maximum time in seconds to wait for a matching line.
+        
+        Returns:
+            The unsolicited line, or `None` if none was received.
+        
+        """
+        deadline = time.monotonic() + timeout
+        with self._rx_cond:
+            while True:
+                for line in self._unsolicited:
+                    if not prefixes or line.startswith(prefixes):
+                        self._unsolicited.remove(line)
+                        return line
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._reader is None:
+                    return None
+                self._rx_cond.wait(remaining)
+    
+    def _is_unsolicited(self, line: str) -> bool:
+        """Indicates if a received line is unsolicited."""
+        return (len(self.unsolicited_prefixes) > 0 and
+                line.strip().startswith(self.unsolicited_prefixes))
+    
+    def _queue_unsolicited(self, line: str) -> None:
+        """Queues an unsolicited line and schedules callbacks."""
+        line = line.strip()
+        if vlog(VLOG_TAG):
+            _log.debug('Unsolicited: %s', dprint(line))
+        with self._rx_cond:
+            if any(not prefixes or line.startswith(prefixes)
+                   for _, prefixes in self._unsolicited_callbacks):
+                self._unsolicited_dispatch.append(line)
+                return
+            if len(self._unsolicited) == self._unsolicited.maxlen:
+                _log.warning('Unsolicited queue full - dropping %s',
+                             dprint(self._unsolicited[0]))
+            self._unsolicited.append(line)
+            self._rx_cond.notify_all()
+    
+    def _dispatch_unsolicited(self) -> None:
+        """Runs callbacks for unsolicited lines received.
+        
+        Must be called without holding the receive condition.
+        
+        """
+        with self._rx_cond:
+            dispatch = self._unsolicited_dispatch
+            self._unsolicited_dispatch = []
+        for line in dispatch:
+            for callback, prefixes in list(self._unsolicited_callbacks):
+                if prefixes and not line.startswith(prefixes):
+                    continue
+                try:
+                    callback(line)
+                except Exception as exc:
+                    _log.error('Unsolicited callback error: %s', exc)
+    
+    def _split_unsolicited(self, data: str) -> str:
+        """Queues unsolicited lines found in data and returns the rest."""
+        if not self.unsolicited_prefixes or not data:
+            return data
+        remainder = ''
+        for line in data.splitlines(keepends=True):
+            if self._is_unsolicited(line):
+                self._queue_unsolicited(line)
+            else:
+                remainder += line
+        return remainder if remainder.strip() else ''
+    
+    def _run_reader(self) -> None:
+        """Background reader loop feeding the parser or unsolicited queue."""
+        if vlog(VLOG_TAG):
+            _log.debug('Background reader started')
+        try:
+            while not self._reader_stop.is_set():
+                if not self._wait_serial(READER_WAIT):
+                    continue
+                with self._rx_cond:
+                    in_waiting = self.serial.in_waiting
+                    if in_waiting > 0:
+                        self._receive(self.serial.read(in_waiting))
+                    self._rx_cond.notify_all()
+                self._dispatch_unsolicited()
+        except Exception as exc:
+            _log.error('Background reader stopped: %s', exc)
+        finally:
+            with self._rx_cond:
+                self._reader = None
+                self._rx_cond.notify_all()
+            if vlog(VLOG_TAG):
+                _log.debug('Background reader stopped')
+    
+    def _receive(self, data: bytes) -> None:
+        """Appends data read by a reader to the bulk buffer and routes it.
+        
+        Used by the background reader thread or an event loop reader, which
+        must hold `_rx_cond`.
+        
+        """
+        if self._rx_pos >= len(self._rx_chunk):
+            self._rx_chunk.clear()
+            self._rx_pos = 0
+        self._rx_chunk += data
+        if self.metrics.enabled:
+            self.metrics.add('bytes_received', len(data))
+        self._process_rx()
+    
+    def _process_rx(self) -> None:
+        """Routes data read by the background reader.
+        
+        Data for a pending command is parsed as its response. Complete
+        unsolicited lines received while no command is pending are queued,
+        leaving other data for `read_rx_buffer`.
+        
+        """
+        if self._error_settling:
+            self._error_settling = False
+            self._parsing = AtParsingState.CRC
+        if self._pending_command and self._parsing < AtParsingState.OK:
+            self._rx_pos += self._feed(self._rx_chunk, self._rx_pos)
+        if self._parsing < AtParsingState.OK or not self.unsolicited_prefixes:
+            return
+        chunk = self._rx_chunk
+        last_lf = chunk.rfind(b'\n', self._rx_pos)
+        if last_lf == -1:
+            return
+        lines = self._decode(chunk[self._rx_pos:last_lf + 1])
+        remainder = self._split_unsolicited(lines).encode()
+        chunk[self._rx_pos:last_lf + 1] = remainder
     
     def is_data_waiting(self) -> bool:
         """Indicates if data is in the serial receive buffer."""
-        return self.serial.in_waiting > 0
+        return self._rx_waiting() > 0
+    
+    def _rx_waiting(self) -> int:
+        """The number of bytes received but not yet parsed.
+        
+        Checks the bulk read buffer before querying the serial port.
+        
+        """
+        buffered = len(self._rx_chunk) - self._rx_pos
+        if buffered > 0 or self._reader is not None:
+            return buffered
+        return self.serial.in_waiting
+    
+    def _fill_rx(self) -> int:
+        """Drains the serial receive buffer into the bulk read buffer.
+        
+        Returns:
+            The number of unconsumed bytes in the bulk read buffer.
+        
+        """
+        if self._reader is not None:   # the reader fills the buffer
+            return len(self._rx_chunk) - self._rx_pos
+        if self._rx_pos >= len(self._rx_chunk):
+            self._rx_chunk.clear()
+            self._rx_pos = 0
+        in_waiting = self.serial.in_waiting
+        if in_waiting > 0:
+            data = self.serial.read(in_waiting)
+            self._rx_chunk += data
+            if self.metrics.enabled:
+                self.metrics.add('bytes_received', len(data))
+        return len(self._rx_chunk) - self._rx_pos
     
-    def _update_orphaned(self, to_add: str, max_size: int = ORPHAN_MAX_BYTES):
-        if len(self._orphaned) > max_size:
-            _log.warning('Dumping orphaned data: %s', dprint(self._orphaned))
-            self._orphaned = ''
-        self._orphaned += to_add
+    def wait_for_data(self, timeout: float) -> bool:
+        """Blocks until received data is waiting or the timeout expires.
+        
+        Waits in the kernel on the serial port file descriptor where the
+        platform supports it, otherwise polls at a coarse interval.
+        
+        Args:
+            timeout: Maximum time in seconds to wait.
+        
+        Returns:
+            True if data is waiting to be read.
+        
+        """
+        if self._reader is not None:
+            with self._rx_cond:
+                return self._rx_cond.wait_for(
+                    lambda: (self._reader is None or
+                             len(self._rx_chunk) > self._rx_pos),
+                    timeout) and len(self._rx_chunk) > self._rx_pos
+        if self._rx_waiting() > 0:
+            return True
+        return self._wait_serial(timeout)
+    
+    def _wait_serial(self, timeout: float) -> bool:
+        """Blocks until the serial port has data or the timeout expires."""
+        deadline = time.monotonic() + timeout
+        fileno = self._fileno()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if fileno is not None:
+                readable, _, _ = select.select([fileno], [], [], remaining)
+                return len(readable) > 0
+            time.sleep(min(remaining, WAIT_POLL_INTERVAL))
+            if self.serial.in_waiting > 0:
+                return True
+    
+    def _fileno(self) -> 'int|None':
+        """The serial port file descriptor if it supports `select`."""
+        try:
+            return self.serial.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+    
+    def _add_orphan(self, data: bytes, command: str = '') -> None:
+        """Records orphaned data, dropping the oldest beyond the limits."""
+        if len(data) > ORPHAN_MAX_BYTES:
+            data = data[-ORPHAN_MAX_BYTES:]
+        with self._rx_cond:
+            orphaned = self._orphaned
+            while orphaned and (len(orphaned) == orphaned.maxlen or
+                                self._orphaned_bytes + len(data) >
+                                ORPHAN_MAX_BYTES):
+                dropped = orphaned.popleft()
+                self._orphaned_bytes -= len(dropped.data)
+                _log.warning('Orphan buffer full - dropping %d bytes',
+                             len(dropped.data))
+            orphaned.append(OrphanRecord(data, time.monotonic(), command))
+            self._orphaned_bytes += len(data)
     
     def read_rx_buffer(self,
                        read_until: str = '',
-                       timeout: int = 0,
+                       timeout: float = 0,
                        strip: bool = False,
                        ) -> 'str|None':
         """Reads data from the serial receive buffer.
         
         Args:
-            timeout (int): Optional timeout in seconds to wait for data.
+            timeout (float): Optional timeout in seconds to wait for data.
                 If 0, will stop reading when no character is waiting.
         
         Returns:
             The data string if any was present, else `None`.
-            
+        
         """
-        if not isinstance(timeout, int):
+        if not isinstance(timeout, (int, float)):
             timeout = 0
-        with self._lock:
-            self.serial.flush()   # wait for anything sent prior to be done
-            rx = ''
-            start_time = time.time()
-            while (time.time() - start_time < timeout or timeout == 0):
-                while (self.serial.in_waiting > 0):
-                    rx += self._read()
-                if ((read_until and rx.endswith(read_until) and
-                     len(rx) > len(read_until)) or timeout == 0):
-                    break
+        self._scheduler.acquire(CommandPriority.CONTROL)
+        try:
+            rx = self._read_rx(read_until, timeout)
+        finally:
+            self._scheduler.release()
+        return rx.strip() if strip else rx
+    
+    def _read_rx(self, read_until: str = '', timeout: float = 0) -> str:
+        """Reads the serial receive buffer while holding the port."""
+        self.serial.flush()   # wait for anything sent prior to be done
+        rx = ''
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._rx_cond:
+                while (self._fill_rx() > 0):
+                    rx += self._drain_rx()
+            if ((read_until and rx.endswith(read_until) and
+                 len(rx) > len(read_until)) or timeout == 0):
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.wait_for_data(remaining):
+                break
         if vlog(VLOG_TAG):
             if rx:
                 _log.debug('Read from serial: %s', dprint(rx))
             else:
                 _log.debug('No data waiting on serial buffer')
-        return rx.strip() if strip else rx
+        return rx
     
-    def send_at_command(self, at_command: str) -> None:
+    def _drain_rx(self) -> str:
+        """Decodes and consumes the unparsed data in the bulk read buffer."""
+        rx = self._decode(self._rx_chunk[self._rx_pos:])
+        self._rx_pos = len(self._rx_chunk)
+        return rx
+    
+    def send_at_command(self,
+                        at_command: str,
+                        priority: CommandPriority = CommandPriority.POLL,
+                        ) -> None:
         """Submits an AT command to the NIMO modem to solicit a response.
         
         Must be followed by `read_at_response`.
@@ -107,29 +511,60 @@ class AtCommandBuffer:
         
         Args:
             at_command: The command to send.
+            priority: The scheduling class if other threads are waiting to
+                send commands.
         
         """
-        dump_buffer = self.read_rx_buffer()
-        if self._lock.locked():
+        if self._scheduler.locked():
             _log.debug('%s waiting for pending command %s',
                        at_command, self._pending_command)
-        self._lock.acquire()
-        self._pending_command = at_command
-        if self.crc and '*' not in at_command:
-            self._pending_command = apply_crc(at_command)
-        self._pending_command += '\r'
-        self.serial.write(self._pending_command.encode())
+        self._scheduler.acquire(priority)
+        dump_buffer = self._read_rx()
+        self.serial.write(self._start_command(at_command, dump_buffer))
         self.serial.flush()   # ensure it gets sent
+        if vlog(VLOG_TAG):
+            _log.debug('Sent on serial: %s', dprint(self._pending_command))
+        self._dispatch_unsolicited()
+    
+    def _start_command(self, at_command: str, dump_buffer: str = '') -> bytes:
+        """Sets up the pending command and its response parser.
+        
+        The caller must hold the port from the scheduler, released when the
+        response is completed.
+        
+        Args:
+            at_command: The command to send.
+            dump_buffer: Data received before the command, kept as orphaned
+                unless it contains unsolicited lines.
+        
+        Returns:
+            The encoded command to write to the serial port.
+        
+        """
+        with self._rx_cond:
+            self._pending_command = at_command
+            if self.crc and '*' not in at_command:
+                self._pending_command = apply_crc(at_command)
+            self._pending_command += '\r'
+            self._begin_parsing()
+            dump_buffer = self._split_unsolicited(dump_buffer)
+            self._sent_time = time.monotonic()
+        if self._hooks:
+            self._emit('on_send')
+        if self.metrics.enabled:
+            self.metrics.add('bytes_sent', len(self._command_bytes))
+            if '*' in self._pending_command:
+                self.metrics.add('crc_bytes', len(self._pending_command) -
+                                 self._pending_command.rindex('*') - 1)
         if dump_buffer:
             _log.warning('Orphaned RX buffer: %s (sending %s)',
                          dprint(dump_buffer), dprint(self._pending_command))
-            self._update_orphaned(dump_buffer)
-        if vlog(VLOG_TAG):
-            _log.debug('Sent on serial: %s', dprint(self._pending_command))
+            self._add_orphan(dump_buffer.encode())
+        return self._command_bytes
     
     def read_at_response(self,
                          prefix: str = None,
-                         timeout: int = DEFAULT_AT_TIMEOUT,
+                         timeout: 'float|None' = None,
                          tick: int = 0) -> AtErrorCode:
         """Parses the pending AT command response into a buffer.
         
@@ -138,7 +573,8 @@ class AtCommandBuffer:
         
         Args:
             prefix: Optional prefix to remove from the response.
-            timeout: Maximum time in seconds to wait for response (default 3)
+            timeout: Maximum time in seconds to wait for response. If `None`
+                uses `response_timeout` for the pending command.
             tick: Optional debug for timeout countdown in seconds
         
         Returns:
@@ -148,104 +584,339 @@ class AtCommandBuffer:
             `OSError` if there is no pending command.
         
         """
-        if not isinstance(timeout, int):
-            timeout = DEFAULT_AT_TIMEOUT
         if not self._pending_command:
             raise OSError('No pending command to read response for')
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            timeout = self.response_timeout(self._pending_command)
         if vlog(VLOG_TAG):
-            _log.debug('Parsing response for %s', dprint(self._pending_command))
-        self._rx_buffer = ''
-        parsing = AtParsingState.ECHO if self.echo else AtParsingState.RESPONSE
-        result_ok: bool = False
-        crc_found: bool = False
-        error: AtErrorCode = AtErrorCode.OK
-        peeked: str = ''
-        start_time = time.time()
-        countdown = timeout
-        while (time.time() - start_time < timeout and
-               parsing < AtParsingState.OK):
-            while ((self.serial.in_waiting > 0 or peeked) and
-                   parsing < AtParsingState.OK):
-                if peeked:
-                    self._rx_buffer += peeked
-                    peeked = ''
-                else:
-                    self._rx_buffer += self._read()
-                last = self._rx_buffer[-1]
-                if last == '\n':
-                    if (parsing == AtParsingState.ECHO or
-                        not self._rx_buffer.startswith('\r\n')):
-                        xdata = self._rx_buffer.split('\n', 1)[0] + '\n'
-                        _log.warning('Orphaned pre-command data: %s',
-                                     dprint(xdata))
-                        self._update_orphaned(xdata)
-                        self._rx_buffer = self._rx_buffer.replace(xdata, '', 1)
-                    if self._rx_buffer.endswith(VRES_OK):
-                        result_ok = True
-                        parsing = self._parsing_ok()
-                    elif self._rx_buffer.endswith(VRES_ERR):
-                        parsing = self._parsing_error()
-                    elif parsing == AtParsingState.CRC:
-                        if vlog(VLOG_TAG):
-                            _log.debug('CRC parsing complete')
-                        if not result_ok:
-                            parsing = AtParsingState.ERROR
-                        else:
-                            if validate_crc(self._rx_buffer):
-                                parsing = AtParsingState.OK
-                            else:
-                                _log.error('Invalid CRC')
-                                parsing = AtParsingState.ERROR
-                                error = AtErrorCode.INVALID_RESPONSE_CRC
-                                result_ok = False
-                    # else response line terminator - keep parsing
-                elif last == '\r':
-                    if self._rx_buffer.endswith(self._pending_command):
-                        if self._rx_buffer != self._pending_command:
-                            xdata = self._rx_buffer.replace(
-                                self._pending_command, '')
-                            _log.warning('Orphaned pre-command data: %s',
-                                         dprint(xdata))
-                            self._update_orphaned(xdata)
-                        if vlog(VLOG_TAG):
-                            _log.debug('Echo received - clearing RX buffer')
-                        self._rx_buffer = ''
-                        parsing = AtParsingState.RESPONSE
-                    else:
-                        old_parsing = parsing
-                        if self.serial.in_waiting == 0:
-                            parsing = self._parsing_short(parsing)
-                        else:
-                            peeked = self._read()
-                            if peeked == '*':
-                                parsing = self._parsing_short()
-                        if old_parsing != parsing:
-                            result_ok = parsing == AtParsingState.OK
-                else:
-                    if parsing == AtParsingState.CRC and not crc_found:
-                        if last == '*':
-                            crc_found = True
-                        else:
-                            _log.warning('Unexpected CRC character %s', last)
-            if parsing >= AtParsingState.OK:
+            _log.debug('Parsing response for %s (timeout %.1f s)',
+                       dprint(self._pending_command), timeout)
+        deadline = time.monotonic() + timeout
+        if self._reader is not None:
+            self._await_reader_response(deadline)
+        else:
+            self._read_response(deadline, tick)
+        with self._rx_cond:
+            error = self._complete_parsing(prefix)
+        self._dispatch_unsolicited()
+        return error
+    
+    def response_timeout(self, command: str, expected_bytes: int = 0) -> float:
+        """Get the time to allow for a command's response.
+        
+        Allows for transferring the command echo and expected response at the
+        current baud rate, plus a latency margin learned from previous
+        responses to the same command, at least `DEFAULT_AT_TIMEOUT`.
+        
+        Args:
+            command: The AT command.
+            expected_bytes: The expected response size, if known. The largest
+                response previously seen for the command is used if larger.
+        
+        Returns:
+            The timeout in seconds.
+        
+        """
+        key = self._command_key(command)
+        expected_bytes = max(expected_bytes, self._response_sizes.get(key, 0))
+        size = len(command) + expected_bytes + RESPONSE_OVERHEAD_BYTES
+        margin = DEFAULT_AT_TIMEOUT
+        if key in self._latency:
+            # smoothed latency plus 4 deviations, similar to TCP RTO
+            srtt, rttvar = self._latency[key]
+            margin = max(margin, srtt + 4 * rttvar)
+        return size * BITS_PER_BYTE / self.serial.baudrate + margin
+    
+    @staticmethod
+    def _command_key(command: str) -> str:
+        """The command name used to learn response size and latency."""
+        return command.split('=', 1)[0].split('*', 1)[0].strip()
+    
+    def _learn_response(self) -> None:
+        """Updates the response size and latency learned for the command."""
+        key = self._command_key(self._pending_command)
+        if (key not in self._latency and
+            len(self._latency) >= LATENCY_MAX_COMMANDS):
+            return
+        size = len(self._parse_buf)
+        if not self.echo:
+            size += len(self._command_bytes)
+        elapsed = time.monotonic() - self._sent_time
+        latency = max(0, elapsed - size * BITS_PER_BYTE / self.serial.baudrate)
+        if key in self._latency:
+            srtt, rttvar = self._latency[key]
+            rttvar = 0.75 * rttvar + 0.25 * abs(srtt - latency)
+            srtt = 0.875 * srtt + 0.125 * latency
+            self._latency[key] = [srtt, rttvar]
+        else:
+            self._latency[key] = [latency, latency / 2]
+        response_size = size - len(self._command_bytes)
+        if response_size > self._response_sizes.get(key, 0):
+            self._response_sizes[key] = response_size
+    
+    def _read_response(self, deadline: float, tick: int = 0) -> None:
+        """Reads and parses the pending response until complete or deadline."""
+        countdown = int(deadline - time.monotonic())
+        while True:
+            if self._fill_rx() > 0:
+                self._rx_pos += self._feed(self._rx_chunk, self._rx_pos)
+            if self._error_settling:
+                # allow a character time for a CRC following the error
+                self._error_settling = False
+                if self.wait_for_data(self._char_delay):
+                    self._parsing = AtParsingState.CRC
+                    continue
+            if self._parsing >= AtParsingState.OK:
                 if vlog(VLOG_TAG):
                     _log.debug('Parsing complete')
                 break
-            if tick > 0 and self._rx_buffer == '':
-                time.sleep(tick)
-                countdown -= tick
-                if vlog(VLOG_TAG):
-                    _log.debug('Countdown: %d', countdown)
-            time.sleep(self._char_delay)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if tick > 0 and self._parse_start >= len(self._parse_buf):
+                if not self.wait_for_data(min(tick, remaining)):
+                    countdown -= tick
+                    if vlog(VLOG_TAG):
+                        _log.debug('Countdown: %d', countdown)
+                continue
+            self.wait_for_data(remaining)
         # end while < timeout
-        if vlog(VLOG_TAG) and self._rx_buffer:
-            _log.debug('Raw response: %s', dprint(self._rx_buffer))
+    
+    def _await_reader_response(self, deadline: float) -> None:
+        """Waits for the background reader to complete the pending response."""
+        with self._rx_cond:
+            while True:
+                if self._error_settling:
+                    # allow the reader a character time for a CRC
+                    self._rx_cond.wait(self._char_delay)
+                    if self._error_settling:
+                        self._error_settling = False
+                    continue
+                if self._parsing >= AtParsingState.OK:
+                    if vlog(VLOG_TAG):
+                        _log.debug('Parsing complete')
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._reader is None:
+                    break
+                self._rx_cond.wait(remaining)
+    
+    def _begin_parsing(self) -> None:
+        """Resets the incremental response parser for the pending command."""
+        self._rx_buffer = ''
+        self._parse_buf.clear()
+        self._parse_start = 0
+        self._parsing = (AtParsingState.ECHO if self.echo
+                         else AtParsingState.RESPONSE)
+        self._result_ok = False
+        self._crc_found = False
+        self._rx_crc = CrcXmodem()
+        self._rx_crc_start = self._rx_crc_end = 0
+        self._error_settling = False
+        self._parse_error = AtErrorCode.OK
+        self._command_bytes = self._pending_command.encode()
+        self._parse_excluded.clear()
+        self._first_byte_time = self._echo_time = self._result_time = None
+        self._unsolicited_prefixes_b = tuple(p.encode()
+                                             for p in self.unsolicited_prefixes)
+    
+    def _feed(self, data: 'bytes|bytearray', offset: int = 0) -> int:
+        """Advances the response parser with newly received data.
+        
+        Each new byte is scanned once. Only line terminators and CRC markers
+        are inspected, with line boundaries tracked by index into the parse
+        buffer. Parsing stops at the end of the response, leaving any later
+        data unconsumed.
+        
+        Args:
+            data: The received data.
+            offset: The index of the first new byte in `data`.
+        
+        Returns:
+            The number of bytes consumed from `data`.
+        
+        """
+        buf = self._parse_buf
+        base = len(buf)
+        with memoryview(data) as view:
+            buf += view[offset:]
+        end = len(buf)
+        if self._hooks and base == 0 and end > 0:
+            self._first_byte_time = time.monotonic()
+            self._emit('on_first_byte')
+        if self.abort_on_garbage and not buf[base:end].isascii():
+            _log.warning('Non-ASCII response - possible baud rate mismatch')
+            self._parsing = AtParsingState.ERROR
+            self._parse_error = AtErrorCode.INVALID_RESPONSE
+            return end - base
+        pos = base
+        next_cr = buf.find(b'\r', pos)
+        next_lf = buf.find(b'\n', pos)
+        while pos < end and self._parsing < AtParsingState.OK:
+            if next_cr == -1 and next_lf == -1:
+                term = end
+            elif next_cr == -1 or (next_lf != -1 and next_lf < next_cr):
+                term = next_lf
+            else:
+                term = next_cr
+            if (term > pos and self._parsing == AtParsingState.CRC and
+                not self._crc_found):
+                self._find_crc_marker(pos, term)
+            if term == end:
+                pos = end
+                break
+            pos = term + 1
+            more = pos < end
+            if buf[term] == 0x0A:   # \n
+                next_lf = buf.find(b'\n', pos)
+                self._parse_line_feed(term, more)
+            else:   # \r
+                next_cr = buf.find(b'\r', pos)
+                self._parse_carriage_return(term, more)
+        if pos < end:
+            del buf[pos:]   # data after the response is left unconsumed
+        if self.crc and self._parsing == AtParsingState.RESPONSE:
+            self._update_rx_crc(pos)
+        if (self._hooks and self._parsing >= AtParsingState.OK and
+            self._result_time is None):
+            self._result_time = time.monotonic()
+            self._emit('on_result_code')
+        return pos - base
+    
+    def _update_rx_crc(self, end: int) -> CrcXmodem:
+        """Extends the running CRC of the response to index `end`.
+        
+        The CRC covers the parse buffer from the start of the response. It
+        restarts if the response start moved, e.g. past an echo.
+        
+        """
+        start = self._parse_start
+        if self._rx_crc_start != start or self._rx_crc_end > end:
+            self._rx_crc = CrcXmodem()
+            self._rx_crc_start = self._rx_crc_end = start
+        if end > self._rx_crc_end:
+            with memoryview(self._parse_buf) as view:
+                self._rx_crc.update(view[self._rx_crc_end:end])
+            self._rx_crc_end = end
+        return self._rx_crc
+    
+    def _find_crc_marker(self, start: int, end: int) -> None:
+        """Checks for the CRC separator in a segment of the parse buffer."""
+        buf = self._parse_buf
+        if buf[start] != 0x2A:   # *
+            _log.warning('Unexpected CRC character %s', chr(buf[start]))
+            if buf.find(b'*', start, end) == -1:
+                return
+        self._crc_found = True
+    
+    def _parse_line_feed(self, term: int, more: bool) -> None:
+        """Handles a line feed at index `term` of the parse buffer."""
+        buf = self._parse_buf
+        start = self._parse_start
+        if (self._parsing == AtParsingState.ECHO or
+            (self.verbose and buf[start:start + 2] != b'\r\n')):
+            # non-verbose (V0) information text has no leading <cr><lf>
+            eol = buf.find(b'\n', start, term + 1)
+            xdata = self._decode(buf[start:eol + 1])
+            if self._is_unsolicited(xdata):
+                self._queue_unsolicited(xdata)
+            else:
+                _log.warning('Orphaned pre-command data: %s', dprint(xdata))
+                self._add_orphan(bytes(buf[start:eol + 1]),
+                                 self._pending_command)
+            start = self._parse_start = eol + 1
+        elif self._unsolicited_prefixes_b:
+            line_start = buf.rfind(b'\n', start, term) + 1 or start
+            if buf.startswith(self._unsolicited_prefixes_b, line_start):
+                self._queue_unsolicited(self._decode(buf[line_start:term]))
+                self._parse_excluded.append((line_start, term + 1))
+                return
+        length = term + 1 - start
+        if length >= 6 and buf[term - 5:term + 1] == b'\r\nOK\r\n':
+            self._result_ok = True
+            self._parsing = self._parsing_ok(more)
+        elif length >= 9 and buf[term - 8:term + 1] == b'\r\nERROR\r\n':
+            self._parsing = self._parsing_error(buf[term + 1] if more
+                                                else None)
+        elif self._parsing == AtParsingState.CRC:
+            if vlog(VLOG_TAG):
+                _log.debug('CRC parsing complete')
+            marker = buf.rfind(b'*', start, term)
+            if not self._result_ok:
+                self._parsing = AtParsingState.ERROR
+            elif (marker != -1 and
+                  self._update_rx_crc(marker).matches(buf[marker + 1:term])):
+                self._parsing = AtParsingState.OK
+            else:
+                _log.error('Invalid CRC')
+                self._parsing = AtParsingState.ERROR
+                self._parse_error = AtErrorCode.INVALID_RESPONSE_CRC
+                self._result_ok = False
+        # else response line terminator - keep parsing
+    
+    def _parse_carriage_return(self, term: int, more: bool) -> None:
+        """Handles a carriage return at index `term` of the parse buffer."""
+        buf = self._parse_buf
+        start = self._parse_start
+        command = self._command_bytes
+        echo_start = term + 1 - len(command)
+        if self._parsing == AtParsingState.ECHO:
+            is_echo = (echo_start >= start and
+                       buf[echo_start:term + 1] == command)
+        else:
+            # echo off (E0) fast path: only an unexpected echo leading the
+            # response needs checking, not every line of a long response
+            is_echo = (echo_start == start and
+                       buf[echo_start:term + 1] == command)
+            if is_echo and not self.echo:
+                _log.info('Detected echo - setting flag')
+                self.echo = True
+        if is_echo:
+            if echo_start > start:
+                xdata = self._decode(buf[start:echo_start])
+                _log.warning('Orphaned pre-command data: %s', dprint(xdata))
+                self._add_orphan(bytes(buf[start:echo_start]),
+                                 self._pending_command)
+            if vlog(VLOG_TAG):
+                _log.debug('Echo received - clearing RX buffer')
+            if self.metrics.enabled:
+                self.metrics.add('echo_bytes', len(command))
+            if self._hooks:
+                self._echo_time = time.monotonic()
+                self._emit('on_echo')
+            self._parse_start = term + 1
+            self._parsing = AtParsingState.RESPONSE
+            return
+        old_parsing = self._parsing
+        if not more or buf[term + 1] == 0x2A:   # * follows short code
+            self._parsing = self._parsing_short(term, more)
+        if old_parsing != self._parsing:
+            self._result_ok = self._parsing == AtParsingState.OK
+    
+    def _complete_parsing(self, prefix: str = None) -> AtErrorCode:
+        """Materializes the parsed response and releases the pending command.
+        
+        Args:
+            prefix: Optional prefix to remove from the response.
+        
+        Returns:
+            Error code indicating success or reason for parsing error.
+        
+        """
+        parsing = self._parsing
+        error = self._parse_error
+        buf = self._parse_buf
+        start = self._parse_start
+        if vlog(VLOG_TAG) and len(buf) > start:
+            _log.debug('Raw response: %s',
+                       dprint(self._decode(buf[start:])))
         if parsing < AtParsingState.OK:
-            if result_ok:
-                if self.verbose and self._rx_buffer.endswith('\r'):
+            self._rx_buffer = self._decode(buf[start:])
+            if self._result_ok:
+                if self.verbose and buf.endswith(b'\r', start):
                     _log.info('Detected non-verbose - setting flag')
                     self.verbose = False
-                elif self.crc and not crc_found:
+                elif self.crc and not self._crc_found:
                     _log.info('CRC expected but not found - clearing flag')
                     self.crc = False
                     error = AtErrorCode.CRC_CONFIG_MISMATCH
@@ -253,45 +924,75 @@ class AtCommandBuffer:
                 _log.warning('AT command timeout during parsing')
                 error = AtErrorCode.TIMEOUT
         elif parsing == AtParsingState.ERROR:
-            error = AtErrorCode.ERROR
-            if not self.crc and crc_found:
+            if error == AtErrorCode.OK:
+                error = AtErrorCode.ERROR
+            if not self.crc and self._crc_found:
                 _log.warning('CRC detected but not expected - setting flag')
                 self.crc = True
                 error = AtErrorCode.CRC_CONFIG_MISMATCH
             self._rx_buffer = ''
         else:
+            end = len(buf)
             if (self.crc):
                 if vlog(VLOG_TAG):
                     _log.debug('Removing CRC')
                 crc_length = 7
-                if (self._rx_buffer[-crc_length:].startswith('*') and
-                    self._rx_buffer[-crc_length:].endswith('\r\n')):
+                if (end - start >= crc_length and
+                    buf[end - crc_length] == 0x2A and   # *
+                    buf.endswith(b'\r\n')):
                     # CRC terminates response so remove it
-                    self._rx_buffer = self._rx_buffer[:-crc_length]
+                    end -= crc_length
+                    if self.metrics.enabled:
+                        self.metrics.add('crc_bytes', crc_length)
                 else:
                     _log.warning('CRC expected but not found - reset flag')
                     self.crc = False
-            to_remove = VRES_OK if self.verbose else RES_OK
-            self._rx_buffer = self._rx_buffer.replace(to_remove, '')
+            if (not self.verbose and
+                buf.endswith(VRES_OK.encode(), start, end)):
+                _log.info('Detected verbose - setting flag')
+                self.verbose = True
+            to_remove = (VRES_OK if self.verbose else RES_OK).encode()
+            if buf.endswith(to_remove, start, end):
+                end -= len(to_remove)
+            if self._parse_excluded:
+                segments = []
+                for excluded_start, excluded_end in self._parse_excluded:
+                    segments.append(buf[start:excluded_start])
+                    start = excluded_end
+                segments.append(buf[start:end])
+                response = self._decode(b''.join(segments))
+            else:
+                response = self._decode(buf[start:end])
             if vlog(VLOG_TAG):
-                _log.debug('Removed result code: %s', dprint(self._rx_buffer))
+                _log.debug('Removed result code: %s', dprint(response))
             if prefix:
-                self._rx_buffer = self._rx_buffer.replace(prefix, '', 1)
+                response = response.replace(prefix, '', 1)
                 if vlog(VLOG_TAG):
-                    _log.debug('Removed prefix: %s', dprint(self._rx_buffer))
-            self._rx_buffer = self._rx_buffer.strip()
+                    _log.debug('Removed prefix: %s', dprint(response))
+            response = response.strip()
             if vlog(VLOG_TAG):
                 _log.debug('Trimmed leading/trailing whitespace: %s',
-                           dprint(self._rx_buffer))
-            self._rx_buffer = self._rx_buffer.replace('\r\n', '\n')
-            self._rx_buffer = self._rx_buffer.replace('\n\n', '\n')
+                           dprint(response))
+            response = response.replace('\r\n', '\n')
+            response = response.replace('\n\n', '\n')
             if vlog(VLOG_TAG):
-                _log.debug('Consolidated line feeds: %s',
-                           dprint(self._rx_buffer))
+                _log.debug('Consolidated line feeds: %s', dprint(response))
+            self._rx_buffer = response
+        if error not in (AtErrorCode.TIMEOUT, AtErrorCode.INVALID_RESPONSE):
+            self._learn_response()
+        if self.metrics.enabled and self._pending_command:
+            self.metrics.record_command(
+                self._command_key(self._pending_command),
+                time.monotonic() - self._sent_time,
+                AtErrorCode(error).name)
+        if self._hooks and self._pending_command:
+            if error != AtErrorCode.OK:
+                self._emit('on_error', error)
+            self._emit('on_complete', error)
         # cleanup
         self._pending_command = ''
-        if self._lock.locked():
-            self._lock.release()
+        if self._scheduler.locked():
+            self._scheduler.release()
         return error
     
     def get_response(self) -> str:
@@ -300,16 +1001,18 @@ class AtCommandBuffer:
         self._rx_buffer = ''
         return response
     
-    def _read(self) -> str:
-        """Read an ASCII character or generate a warning."""
-        char = self.serial.read()
+    def _decode(self, data: 'bytes|bytearray') -> str:
+        """Decode ASCII data, discarding undecodable bytes with an error."""
         try:
-            return char.decode()
+            return data.decode('ascii')
         except UnicodeDecodeError as exc:
-            _log.error('Discarding undecodable [%d] (%s)', ord(char), exc)
-            return ''
+            _log.error('Discarding undecodable bytes (%s)', exc)
+            decoded = data.decode('ascii', errors='ignore')
+            if self.metrics.enabled:
+                self.metrics.add('undecodable_bytes', len(data) - len(decoded))
+            return decoded
     
-    def _parsing_ok(self) -> AtParsingState:
+    def _parsing_ok(self, more: bool = False) -> AtParsingState:
         """Internal helper for parsing valid response."""
         if vlog(VLOG_TAG):
             _log.debug('Result OK for %s', dprint(self._pending_command))
@@ -320,48 +1023,66 @@ class AtCommandBuffer:
                 return AtParsingState.CRC
         else:
             if ('CRC=0\r' in self._pending_command.upper() or
-                ('Z' in self._pending_command.upper() and
-                 not self.serial.in_waiting)):
+                ('Z' in self._pending_command.upper() and not more)):
                 _log.debug('%s disabled CRC - reset flag', self._pending_command)
                 self.crc = False
             else:
                 return AtParsingState.CRC
         return AtParsingState.OK
     
-    def _parsing_error(self) -> AtParsingState:
-        """Internal helper for parsing errored response."""
+    def _parsing_error(self, following: 'int|None' = None) -> AtParsingState:
+        """Internal helper for parsing errored response.
+        
+        If no CRC is expected or following, the error is provisional until
+        the reader has allowed a character time for an unexpected CRC.
+        
+        Args:
+            following: The byte received after the result code, if any.
+        
+        """
         _log.warning('Result ERROR for: %s', dprint(self._pending_command))
-        if self.crc or self.serial.in_waiting > 0:
+        if self.crc or following == 0x2A:   # *
             return AtParsingState.CRC
-        else:
-            time.sleep(self._char_delay)
-            if self.serial.in_waiting > 0:
-                return AtParsingState.CRC
+        if following is None:
+            self._error_settling = True
         return AtParsingState.ERROR
     
-    def _parsing_short(self, current: AtParsingState = None) -> AtParsingState:
+    def _parsing_short(self, term: int, more: bool = False) -> AtParsingState:
         """Internal helper for parsing short code responses."""
-        if (self._rx_buffer.startswith('\r\n') or
-            not self._rx_buffer.endswith((RES_OK, RES_ERR))):
+        buf = self._parse_buf
+        start = self._parse_start
+        current = self._parsing
+        rc = buf[term - 1:term + 1] if term > start else b''
+        if buf[start:start + 2] == b'\r\n' or rc not in (b'0\r', b'4\r'):
             # just read too fast, keep parsing
             return current
-        if self._rx_buffer.endswith((RES_OK, RES_ERR)):
-            # check if it's really a response code or part of data
-            rc = RES_OK if self._rx_buffer.endswith(RES_OK) else RES_ERR
-            if ('\r\n' in self._rx_buffer and
-                self._rx_buffer.split('\r\n')[-1] != rc):
-                # doesn't actually end in a result code, keep parsing
-                return current
+        # check if it's really a response code or part of data
+        last_crlf = buf.rfind(b'\r\n', start, term)
+        if last_crlf != -1 and last_crlf + 2 != term - 1:
+            # doesn't actually end in a result code, keep parsing
+            return current
         if self.verbose:
             _log.warning('Clearing verbose flag due to short response: %s',
-                         dprint(self._rx_buffer))
+                         dprint(self._decode(buf[start:term + 1])))
             self.verbose = False
-        if self._rx_buffer.endswith(RES_OK):
-            return self._parsing_ok()
-        return self._parsing_error()
-
+        if rc == b'0\r':
+            return self._parsing_ok(more)
+        return self._parsing_error(buf[term + 1] if more else None)
+    
     def get_ophaned(self) -> str:
         """Gets orphaned data and clears the orphaned buffer"""
-        orphaned = self._orphaned
-        self._orphaned = ''
-        return orphaned
+        return self._decode(b''.join(r.data for r in self.drain_orphaned()))
+    
+    def iter_orphaned(self) -> 'Iterator[OrphanRecord]':
+        """Iterates over the retained orphan records, oldest first."""
+        with self._rx_cond:
+            records = tuple(self._orphaned)
+        return iter(records)
+    
+    def drain_orphaned(self) -> 'list[OrphanRecord]':
+        """Gets the retained orphan records, oldest first, and clears them."""
+        with self._rx_cond:
+            records = list(self._orphaned)
+            self._orphaned.clear()
+            self._orphaned_bytes = 0
+        return records
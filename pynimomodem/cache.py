@@ -0,0 +1,139 @@
+"""A time-to-live cache for slow-changing modem query results.
+
+Used by `NimoModem` to avoid a serial round trip for configuration and
+identity queries that rarely change. Entries are updated or cleared when the
+modem setting is written, reset or the modem reboots.
+
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .nimoutils import vlog
+
+VLOG_TAG = 'responsecache'
+
+DEFAULT_CACHE_TTLS = {   # seconds, by query method name
+    'get_firmware_version': 86400,
+    'get_model': 86400,
+    'get_gnss_mode': 3600,
+    'get_power_mode': 3600,
+    'get_wakeup_period': 300,   # may be changed by the network
+    'get_event_mask': 3600,
+    'get_urc_ctl': 3600,
+}
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counters for a cached query.
+    
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups requiring a modem query.
+    
+    """
+    hits: int = 0
+    misses: int = 0
+    
+    @property
+    def hit_ratio(self) -> float:
+        """The proportion of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """Caches query results for a time-to-live per query.
+    
+    Disabled by default. Queries without a TTL are never cached.
+    
+    Attributes:
+        enabled (bool): Use the cache for lookups.
+        ttls (dict): Maps a query name to its time-to-live in seconds.
+    
+    """
+    def __init__(self,
+                 ttls: 'dict[str, float]|None' = None,
+                 enabled: bool = False) -> None:
+        self.enabled: bool = enabled
+        self.ttls: 'dict[str, float]' = dict(DEFAULT_CACHE_TTLS
+                                             if ttls is None else ttls)
+        self._entries: 'dict[str, tuple[Any, float]]' = {}
+        self._stats: 'dict[str, CacheStats]' = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def hits(self) -> int:
+        """The total lookups answered from the cache."""
+        return sum(s.hits for s in self.stats().values())
+    
+    @property
+    def misses(self) -> int:
+        """The total lookups requiring a modem query."""
+        return sum(s.misses for s in self.stats().values())
+    
+    def stats(self) -> 'dict[str, CacheStats]':
+        """Gets a copy of the hit and miss counters for each query."""
+        with self._lock:
+            return {key: CacheStats(s.hits, s.misses)
+                    for key, s in self._stats.items()}
+    
+    def reset_stats(self) -> None:
+        """Clears the hit and miss counters."""
+        with self._lock:
+            self._stats.clear()
+    
+    def get(self, key: str) -> 'tuple[bool, Any]':
+        """Looks up a cached query result.
+        
+        Args:
+            key (str): The query name.
+        
+        Returns:
+            A tuple `(hit, value)` where `value` is only valid on a hit.
+        
+        """
+        if not self.enabled or key not in self.ttls:
+            return False, None
+        with self._lock:
+            stats = self._stats.setdefault(key, CacheStats())
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry[1]:
+                stats.hits += 1
+                if vlog(VLOG_TAG):
+                    _log.debug('Cache hit for %s', key)
+                return True, entry[0]
+            stats.misses += 1
+            return False, None
+    
+    def put(self, key: str, value: Any) -> None:
+        """Stores a query result, or the value just written to the modem.
+        
+        Args:
+            key (str): The query name.
+            value (Any): The result to return on later lookups.
+        
+        """
+        with self._lock:
+            if not self.enabled or key not in self.ttls:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttls[key])
+    
+    def invalidate(self, *keys: str) -> None:
+        """Removes cached results for the query names."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Removes all cached results, e.g. on modem reset or reboot."""
+        with self._lock:
+            if self._entries and vlog(VLOG_TAG):
+                _log.debug('Clearing cached responses')
+            self._entries.clear()
@@ -12,7 +12,9 @@ MSG_MT_MAX_SIZE = 10000     # IsatData Pro (non-low power)
 MSG_MO_NAME_MAX_LEN = 8     # Max characters for name in Orbcomm modems
 MSG_MO_NAME_QMAX_LEN = 12   # Max characters for name in Quectel modems
 BAUDRATES = [1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200]
+AUTOBAUD_ORDER = [9600, 115200, 57600, 38400, 19200, 4800, 2400, 1200]
 GEOSTATIONARY_DISTANCE_M = 35786000
+AT_BATCH_LINE_MAX = 128   # conservative command line length when chaining
 
 
 class NimoIntEnum(IntEnum):
@@ -40,6 +42,25 @@ class AtParsingState(NimoIntEnum):
     ERROR = 4
 
 
+class Manufacturer(IntEnum):
+    """Supported NIMO modem implementations."""
+    NONE = 0
+    ORBCOMM = 1
+    QUECTEL = 2
+
+
+class CommandPriority(NimoIntEnum):
+    """Scheduling classes for commands from concurrent callers.
+    
+    Lower values are granted the modem port first.
+    
+    """
+    CONTROL = 0
+    SEND = 1
+    POLL = 2
+    GNSS = 3
+
+
 class MessagePriority(NimoIntEnum):
     """Message priorities for NIMO modem messages."""
     NONE = 0
@@ -122,6 +143,7 @@ class AtErrorCode(NimoIntEnum):
     CRC_CONFIG_MISMATCH = 254
     UNABLE_TO_DELETE = 253
     INVALID_RESPONSE_CRC = 252
+    INVALID_RESPONSE = 251
 
 
 class PowerMode(NimoIntEnum):
@@ -0,0 +1,233 @@
+"""An offline index of GeoBeam coverage to predict a modem's serving beam.
+
+Learning the serving `GeoBeam` from a modem needs a GNSS fix, the network
+status and a trace query. `BeamCoverageIndex` predicts it from a location
+using a grid of cells, each holding the beams observed or known to cover it,
+so a lookup is a dictionary access.
+
+No beam footprint data is distributed with this package. The index learns
+from beams reported by modems at known locations (`NimoModem` records each
+`get_satellite_info` result) and footprint polygons may be loaded from
+operator data as GeoJSON. A prediction is only unambiguous where a single
+beam has been seen with enough support.
+
+"""
+import json
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+from .constants import GeoBeam, GeoSatellite
+from .location import get_geobeam_satellite
+from .nimoutils import vlog
+
+VLOG_TAG = 'beamcoverage'
+DEFAULT_RESOLUTION_DEG = 0.5
+DEFAULT_MIN_OBSERVATIONS = 3
+DEFAULT_MIN_CONFIDENCE = 0.95
+FOOTPRINT_WEIGHT = 1000   # observations credited to a footprint cell
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class BeamPrediction:
+    """The likely serving beam at a location.
+    
+    Attributes:
+        geobeam (GeoBeam): The beam most seen covering the location.
+        satellite (GeoSatellite): The satellite of the beam.
+        confidence (float): The proportion of support for the beam.
+        observations (int): The support for the beam in the cell.
+        unambiguous (bool): The beam has at least the index's minimum
+            support and confidence.
+    
+    """
+    geobeam: GeoBeam
+    satellite: 'GeoSatellite|None'
+    confidence: float
+    observations: int
+    unambiguous: bool
+
+
+class BeamCoverageIndex:
+    """A grid of GeoBeam coverage learned from observations and footprints.
+    
+    Cells are `resolution` degrees of latitude and longitude. Instances may
+    be shared by many modems and are thread safe.
+    
+    Attributes:
+        min_observations (int): Support required for an unambiguous beam.
+        min_confidence (float): Proportion of support required for an
+            unambiguous beam.
+    
+    """
+    def __init__(self,
+                 resolution: float = DEFAULT_RESOLUTION_DEG,
+                 min_observations: int = DEFAULT_MIN_OBSERVATIONS,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> None:
+        if not isinstance(resolution, (int, float)) or not 0 < resolution <= 90:
+            raise ValueError('Invalid resolution')
+        self._resolution = float(resolution)
+        self.min_observations = min_observations
+        self.min_confidence = min_confidence
+        self._cells: 'dict[tuple[int, int], dict[GeoBeam, int]]' = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._cells)
+    
+    @property
+    def resolution(self) -> float:
+        """The cell size in degrees."""
+        return self._resolution
+    
+    def _cell(self, latitude: float, longitude: float) -> 'tuple[int, int]':
+        return (math.floor(latitude / self._resolution),
+                math.floor(longitude / self._resolution))
+    
+    def observe(self,
+                latitude: float,
+                longitude: float,
+                geobeam: GeoBeam,
+                weight: int = 1) -> None:
+        """Records a beam serving a location.
+        
+        The global beam is not recorded since it does not locate a modem.
+        
+        """
+        geobeam = GeoBeam(geobeam)
+        if geobeam == GeoBeam.GLOBAL_BB:
+            return
+        cell = self._cell(latitude, longitude)
+        with self._lock:
+            beams = self._cells.setdefault(cell, {})
+            beams[geobeam] = beams.get(geobeam, 0) + weight
+        if vlog(VLOG_TAG):
+            _log.debug('Observed %s in cell %s', geobeam.name, cell)
+    
+    def predict(self,
+                latitude: float,
+                longitude: float) -> 'BeamPrediction|None':
+        """Predicts the serving beam at a location.
+        
+        Returns:
+            `BeamPrediction`, or `None` if no beam is known for the location.
+        
+        """
+        beams = self._cells.get(self._cell(latitude, longitude))
+        if not beams:
+            return None
+        with self._lock:
+            items = list(beams.items())
+        geobeam, observations = max(items, key=lambda item: item[1])
+        confidence = observations / sum(count for _, count in items)
+        return BeamPrediction(
+            geobeam=geobeam,
+            satellite=get_geobeam_satellite(geobeam),
+            confidence=confidence,
+            observations=observations,
+            unambiguous=(observations >= self.min_observations and
+                         confidence >= self.min_confidence),
+        )
+    
+    def load_footprints(self, source: 'str|os.PathLike|Mapping') -> int:
+        """Adds beam footprint polygons to the index.
+        
+        Each cell whose centre lies within a footprint is credited with
+        `FOOTPRINT_WEIGHT` observations of the beam. Cells of overlapping
+        footprints are ambiguous.
+        
+        Args:
+            source: A GeoJSON `FeatureCollection` or the path of a file
+                containing one. Each feature is a `Polygon` or `MultiPolygon`
+                with a `geobeam` property of the `GeoBeam` name or value.
+        
+        Returns:
+            The number of cells covered.
+        
+        Raises:
+            `ValueError` if the GeoJSON is invalid.
+        
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source) as f:
+                source = json.load(f)
+        try:
+            features = source['features']
+            covered = 0
+            for feature in features:
+                geobeam = _to_geobeam(feature['properties']['geobeam'])
+                geometry = feature['geometry']
+                polygons = geometry['coordinates']
+                if geometry['type'] == 'Polygon':
+                    polygons = [polygons]
+                elif geometry['type'] != 'MultiPolygon':
+                    raise ValueError(f'Unsupported geometry {geometry["type"]}')
+                for polygon in polygons:
+                    covered += self._add_polygon(geobeam, polygon[0])
+        except (KeyError, IndexError, TypeError) as exc:
+            raise ValueError(f'Invalid footprint GeoJSON: {exc}') from exc
+        return covered
+    
+    def _add_polygon(self,
+                     geobeam: GeoBeam,
+                     ring: 'Iterable[Iterable[float]]') -> int:
+        """Credits the cells within a ring of GeoJSON `[lon, lat]` points."""
+        points = [(float(p[1]), float(p[0])) for p in ring]
+        res = self._resolution
+        lat_min, lon_min = self._cell(min(p[0] for p in points),
+                                      min(p[1] for p in points))
+        lat_max, lon_max = self._cell(max(p[0] for p in points),
+                                      max(p[1] for p in points))
+        covered = 0
+        for i in range(lat_min, lat_max + 1):
+            for j in range(lon_min, lon_max + 1):
+                if _in_polygon((i + 0.5) * res, (j + 0.5) * res, points):
+                    self.observe((i + 0.5) * res, (j + 0.5) * res, geobeam,
+                                 FOOTPRINT_WEIGHT)
+                    covered += 1
+        return covered
+    
+    def to_dict(self) -> 'dict[str, Any]':
+        """Exports the index as a JSON-serializable dictionary."""
+        with self._lock:
+            cells = [[i, j, {beam.name: count for beam, count in beams.items()}]
+                     for (i, j), beams in self._cells.items()]
+        return {'resolution': self._resolution, 'cells': cells}
+    
+    @classmethod
+    def from_dict(cls,
+                  data: 'Mapping[str, Any]',
+                  **kwargs) -> 'BeamCoverageIndex':
+        """Restores an index exported by `to_dict`."""
+        index = cls(data['resolution'], **kwargs)
+        for i, j, beams in data['cells']:
+            index._cells[(i, j)] = {GeoBeam[name]: count
+                                    for name, count in beams.items()}
+        return index
+
+
+def _to_geobeam(value: 'str|int') -> GeoBeam:
+    if isinstance(value, str):
+        return GeoBeam[value]
+    return GeoBeam(value)
+
+
+def _in_polygon(latitude: float,
+                longitude: float,
+                points: 'list[tuple[float, float]]') -> bool:
+    """Ray casting test of a point within a polygon of (lat, lon) points."""
+    inside = False
+    j = len(points) - 1
+    for i, (lat_i, lon_i) in enumerate(points):
+        lat_j, lon_j = points[j]
+        if ((lat_i > latitude) != (lat_j > latitude) and
+            longitude < ((lon_j - lon_i) * (latitude - lat_i) /
+                         (lat_j - lat_i) + lon_i)):
+            inside = not inside
+        j = i
+    return inside
@@ -3,80 +3,92 @@
 This module enables CRC error checking on a serial AT command interface, useful
 for increasing robustness in electrically noisy environments or long cable runs.
 
+The CRC is the XMODEM variant (polynomial 0x1021) seeded with 0xFFFF, computed
+by `binascii.crc_hqx`. `CrcXmodem` calculates it incrementally as data arrives.
+
 """
 import logging
+from binascii import crc_hqx
 
 from .nimoutils import dprint, vlog
 
 POLYNOMIAL = 0x1021
+CRC_INITIAL_VALUE = 0xFFFF
 CRCXMODEM_SEPARATOR = '*'
 VLOG_TAG = 'crcxmodem'
 
 _log = logging.getLogger(__name__)
-_crcxmodem_table: 'list[int]' = []
-_crc_table_is_initialized: bool = False
+
+
+class CrcXmodem:
+    """A running CRC-16-CCITT of data received in parts.
+    
+    Attributes:
+        value (int): The CRC of the data so far.
+        length (int): The number of bytes so far.
+    
+    """
+    __slots__ = ('value', 'length')
+    
+    def __init__(self,
+                 data: 'bytes|bytearray|memoryview|str' = b'',
+                 initial_value: int = CRC_INITIAL_VALUE) -> None:
+        self.value: int = initial_value
+        self.length: int = 0
+        if data:
+            self.update(data)
+    
+    def update(self, data: 'bytes|bytearray|memoryview|str') -> int:
+        """Adds data to the CRC, returning the updated value."""
+        if isinstance(data, str):
+            data = data.encode('latin-1')
+        self.value = crc_hqx(data, self.value)
+        self.length += len(data)
+        return self.value
+    
+    def copy(self) -> 'CrcXmodem':
+        """Get an independent copy of the running CRC."""
+        clone = CrcXmodem(initial_value=self.value)
+        clone.length = self.length
+        return clone
+    
+    def hexdigest(self) -> str:
+        """Get the CRC as 4 uppercase hex characters, as sent by the modem."""
+        return f'{self.value:04X}'
+    
+    def matches(self, hex_crc: 'str|bytes') -> bool:
+        """Indicates if a received hex CRC matches the running CRC."""
+        try:
+            return self.value == int(hex_crc, 16)
+        except ValueError:
+            return False
+
+
+def calculate_crc(data: 'bytes|bytearray|memoryview|str',
+                  initial_value: int = CRC_INITIAL_VALUE) -> int:
+    """Calculates the CRC of a string or bytes."""
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    return crc_hqx(data, initial_value)
 
 
 def apply_crc(at_command: str, sep: str = CRCXMODEM_SEPARATOR) -> str:
     """Applies a CRC-16-CCITT checksum to the at_command."""
-    crc = _calculate_crc(at_command)
+    crc = calculate_crc(at_command)
     hex_crc = f'{crc:04X}'
     if vlog(VLOG_TAG):
         _log.debug('Applying CRC: %d -> %s', crc, hex_crc)
     return at_command + sep + hex_crc
 
 
-def validate_crc(response: str, sep = CRCXMODEM_SEPARATOR) -> bool:
+def validate_crc(response: 'str|bytes', sep = CRCXMODEM_SEPARATOR) -> bool:
     """Validates a modem response with checksum."""
+    if isinstance(response, (bytes, bytearray)):
+        response = response.decode('latin-1')
     if sep not in response:
         _log.warning('No CRC in response %s', dprint(response))
         return False
     if vlog(VLOG_TAG):
         _log.debug('Validating CRC for %s', dprint(response))
     res, res_crc = response.rsplit(sep, 1)
-    expected = _calculate_crc(res)
-    received = int(res_crc, 16)
-    return expected == received
-
-
-def _initial_crc(c: int) -> int:
-    """Generates an initial CRC for each element in the table."""
-    crc = 0
-    c = c << 8
-    for i in range(8):
-        if (crc ^ c) & 0x8000:
-            crc = (crc << 1) ^ POLYNOMIAL
-        else:
-            crc = crc << 1
-        c = c << 1
-    return crc
-
-
-def _initialize_crc_table() -> bool:
-    """Initializes the table of CRC values for lookup."""
-    global _crcxmodem_table
-    global _crc_table_is_initialized
-    if not _crc_table_is_initialized:
-        if vlog(VLOG_TAG):
-            _log.debug('Initializing CRC table')
-        _crcxmodem_table = [_initial_crc(i) for i in range(256)]
-        _crc_table_is_initialized = True
-    return _crc_table_is_initialized
-
-
-def _update_crc(crc: int, c: int) -> int:
-    """Call iteratively to build a CRC a character at a time."""
-    global _crcxmodem_table
-    cc = 0xFF & c
-    tmp = (crc >> 8) ^ cc
-    crc = (crc << 8) ^ _crcxmodem_table[tmp & 0xFF]
-    crc = crc & 0xFFFF
-    return crc
-
-def _calculate_crc(string: str, initial_value: int = 0xFFFF) -> int:
-    """Calculates the CRC of a string."""
-    _initialize_crc_table()
-    crc: int = initial_value
-    for c in string:
-        crc = _update_crc(crc, ord(c))
-    return crc
+    return CrcXmodem(res).matches(res_crc)
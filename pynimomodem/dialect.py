@@ -0,0 +1,255 @@
+"""Command dialects of the supported NIMO modem manufacturers.
+
+Each `Dialect` maps a `NimoModem` operation name to its command template and
+response prefix, and holds the field layouts of message metadata and the
+parsers of manufacturer-specific responses. Operations resolve their command
+with a single lookup, so supporting another modem family means adding a
+table rather than editing each operation.
+
+"""
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, NamedTuple
+
+from .constants import (
+    MSG_MO_NAME_MAX_LEN,
+    MSG_MO_NAME_QMAX_LEN,
+    BeamState,
+    ControlState,
+    GnssModeOrbcomm,
+    GnssModeQuectel,
+    Manufacturer,
+    MessagePriority,
+    MessageState,
+)
+
+
+class DialectCommand(NamedTuple):
+    """An AT command template and the prefix removed from its response.
+    
+    The template may contain `str.format` fields for parameters.
+    
+    """
+    template: str
+    prefix: str = ''
+    
+    def format(self, *args, **kwargs) -> str:
+        """Get the command with any parameters filled in."""
+        if not args and not kwargs:
+            return self.template
+        return self.template.format(*args, **kwargs)
+
+
+def _unquote(value: str) -> str:
+    return value.replace('"', '')
+
+
+def _priority(value: str) -> MessagePriority:
+    return MessagePriority(int(value))
+
+
+def _state(value: str) -> MessageState:
+    return MessageState(int(value))
+
+
+MESSAGE_FIELD_PARSERS: 'Mapping[str, Callable[[str], Any]]' = {
+    'name': _unquote,
+    'priority': _priority,
+    'state': _state,
+    'length': int,
+    'bytes_delivered': int,
+}
+
+
+def _compile_layout(layout: 'tuple[str|None, ...]',
+                    ) -> 'tuple[tuple[str, Callable]|None, ...]':
+    """Pairs each message state field with its parser."""
+    return tuple(None if name is None else (name, MESSAGE_FIELD_PARSERS[name])
+                 for name in layout)
+
+
+@dataclass(frozen=True)
+class Dialect:
+    """The command set and response formats of a modem manufacturer.
+    
+    Attributes:
+        manufacturer (Manufacturer): The modem family.
+        commands (Mapping): `DialectCommand` by operation name. Operations
+            absent are not supported by the modem.
+        parsers (Mapping): Response parsers by operation name, where the
+            response format differs between manufacturers.
+        message_state_fields (tuple): The `NimoMessage` attribute of each
+            message state field, `None` if ignored.
+        mt_message_fields (tuple): The name of each field of a retrieved
+            mobile-terminated message, `None` if ignored.
+        mo_name_max_len (int): The maximum length of a MO message name.
+        codec_separator (str): Separates codec SIN and MIN in a MO message.
+        sreg_separator (str): Separates chained S-register commands.
+        gnss_mode (type): The `GnssMode` enumeration of the modem.
+        chained (frozenset): Operations whose commands may be chained with
+            `;` on one command line.
+    
+    """
+    manufacturer: Manufacturer
+    commands: 'Mapping[str, DialectCommand]'
+    parsers: 'Mapping[str, Callable[[str], Any]]'
+    message_state_fields: 'tuple[str|None, ...]'
+    mt_message_fields: 'tuple[str|None, ...]'
+    mo_name_max_len: int
+    codec_separator: str
+    sreg_separator: str
+    gnss_mode: type
+    chained: 'frozenset[str]' = frozenset()
+    message_state_layout: tuple = field(init=False, repr=False)
+    
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'commands',
+                           MappingProxyType(dict(self.commands)))
+        object.__setattr__(self, 'parsers',
+                           MappingProxyType(dict(self.parsers)))
+        object.__setattr__(self, 'message_state_layout',
+                           _compile_layout(self.message_state_fields))
+    
+    def supports(self, operation: str) -> bool:
+        """Indicates if the modem supports an operation."""
+        return operation in self.commands
+    
+    def chains(self, operation: str) -> bool:
+        """Indicates if an operation's commands may share a command line."""
+        return operation in self.chained
+    
+    def parse(self, operation: str, response: str) -> Any:
+        """Parses a response with the operation's parser, if any."""
+        parser = self.parsers.get(operation)
+        return parser(response) if parser else response
+
+
+def _orbcomm_acquisition(response: str) -> 'tuple':
+    """Parses S-registers 122, 123, 116 and 101 of trace class 3.1."""
+    results = [int(x) for x in response.split('\n')]
+    return (ControlState(results[0]), BeamState(results[1]),
+            float(results[2]) / 100, results[3])
+
+
+def _quectel_trace(response: str) -> 'list[str]':
+    # Workaround Quectel 20230731 documentation error says +QEVNT:
+    return response.replace('+QEVENT:', '').strip().split(',')
+
+
+def _quectel_acquisition(response: str) -> 'tuple':
+    """Parses the trace class 3.1 event."""
+    results = [int(x) for x in _quectel_trace(response)]
+    # <dataCount>,<signedBitmask>,<MTID>,<timestamp>,
+    #   <class>,<subclass>,<priority>,<data0>,...
+    data0 = 7   # list index where trace data starts
+    return (ControlState(results[data0+22]), BeamState(results[data0+23]),
+            float(results[data0+16]) / 100, results[data0+1])
+
+
+ORBCOMM = Dialect(
+    manufacturer=Manufacturer.ORBCOMM,
+    commands={
+        'get_model': DialectCommand('ATI4'),
+        'get_network_status': DialectCommand('ATS54?'),
+        'get_rssi': DialectCommand('ATS90=3 S91=1 S92=1 S116?'),
+        'get_acquisition_detail': DialectCommand(
+            'ATS90=3 S91=1 S92=1 S122? S123? S116? S101?'),
+        'send_data': DialectCommand('AT%MGRT='),
+        'cancel_mo_message': DialectCommand('AT%MGRC="{}"'),
+        'get_mo_message_states': DialectCommand('AT%MGRS', '%MGRS:'),
+        'get_mt_message_states': DialectCommand('AT%MGFN', '%MGFN:'),
+        'get_mt_message_state': DialectCommand('AT%MGFS', '%MGFS:'),
+        'get_mt_message': DialectCommand('AT%MGFG', '%MGFG:'),
+        'delete_mt_message': DialectCommand('AT%MGFM="{}"'),
+        'get_gnss_mode': DialectCommand('ATS39?'),
+        'set_gnss_mode': DialectCommand('ATS39={}'),
+        'get_gnss_continuous': DialectCommand('ATS55?'),
+        'set_gnss_continuous': DialectCommand('ATS55={}'),
+        'get_nmea_data': DialectCommand('AT%GPS', '%GPS:'),
+        'get_satellite_info': DialectCommand('ATS90=3 S91=5 S92=1 S102?'),
+        'get_event_mask': DialectCommand('ATS88?'),
+        'set_event_mask': DialectCommand('ATS88={}'),
+        'get_events_asserted_mask': DialectCommand('ATS89?'),
+        'get_trace_event_monitor': DialectCommand('AT%EVMON', '%EVMON:'),
+        'get_trace_event_data': DialectCommand('AT%EVNT={},{}', '%EVNT:'),
+        'get_power_mode': DialectCommand('ATS50?'),
+        'set_power_mode': DialectCommand('ATS50={}'),
+        'get_wakeup_period': DialectCommand('ATS51?'),
+        'set_wakeup_period': DialectCommand('ATS51={}'),
+        'power_down': DialectCommand('AT%OFF'),
+    },
+    parsers={
+        'get_acquisition_detail': _orbcomm_acquisition,
+    },
+    message_state_fields=('name', None, 'priority', None, 'state',
+                          'length', 'bytes_delivered'),
+    mt_message_fields=('name', None, 'priority', 'codec_sin', 'state',
+                       'length', 'data_format', 'payload'),
+    mo_name_max_len=MSG_MO_NAME_MAX_LEN,
+    codec_separator='.',
+    sreg_separator=' ',
+    gnss_mode=GnssModeOrbcomm,
+    chained=frozenset(('get_mt_message', 'delete_mt_message')),
+)
+
+QUECTEL = Dialect(
+    manufacturer=Manufacturer.QUECTEL,
+    commands={
+        'get_model': DialectCommand('ATI'),
+        'get_network_status': DialectCommand('AT+QREG?', '+QREG:'),
+        'get_rssi': DialectCommand('AT+QSCN', '+QSCN:'),
+        'get_acquisition_detail': DialectCommand('AT+QEVNT=3,1', '+QEVNT:'),
+        'send_data': DialectCommand('AT+QSMGT='),
+        'cancel_mo_message': DialectCommand('AT+QSMGC="{}"'),
+        'get_mo_message_states': DialectCommand('AT+QSMGS', '+QSMGS:'),
+        'get_mt_message_states': DialectCommand('AT+QRMGN', '+QRMGN:'),
+        'get_mt_message_state': DialectCommand('AT+QRMGS', '+QRMGS:'),
+        'get_mt_message': DialectCommand('AT+GRMGR', '+GRMGR:'),
+        'delete_mt_message': DialectCommand('AT+QRMGM="{}"'),
+        'get_gnss_mode': DialectCommand('AT+QGNSSMOD?', '+QGNSSMOD:'),
+        'set_gnss_mode': DialectCommand('AT+QGNSSMOD={}', '+QGNSSMOD:'),
+        'get_gnss_continuous': DialectCommand('AT+QGNSSCW?', '+QGNSSCW:'),
+        'set_gnss_continuous': DialectCommand('AT+QGNSSCW={}'),
+        'get_nmea_data': DialectCommand('AT+QGNSS', '+QGNSS:'),
+        'get_satellite_info': DialectCommand('AT+QEVNT=3,5', '+QEVNT:'),
+        # documented as +QEVNT
+        'get_trace_event_data': DialectCommand('AT+QEVNT={},{}', '+QEVENT:'),
+        'get_urc_ctl': DialectCommand('AT+QURCCTL?', '+QURCCTL:'),
+        'set_urc_ctl': DialectCommand('AT+QURCCTL=0x{:04X}'),
+        'get_power_mode': DialectCommand('AT+QPMD?', '+QPMD:'),
+        'set_power_mode': DialectCommand('AT+QPMD={}'),
+        'get_wakeup_period': DialectCommand('AT+QWKUPCFG?', '+QWKUPCFG:'),
+        'set_wakeup_period': DialectCommand('AT+QWKUPCFG={},{}'),
+        'get_wakeup_way': DialectCommand('AT+QWKUPCFG?', '+QWKUPCFG:'),
+        'power_down': DialectCommand('AT+QPOWD=2'),
+        'get_workmode': DialectCommand('AT+QMOD?', '+QMOD:'),
+        'set_workmode': DialectCommand('AT+QMOD={}'),
+        'get_deepsleep_enable': DialectCommand('AT+QSCLK?', '+QSCLK:'),
+        'set_deepsleep_enable': DialectCommand('AT+QSCLK={}'),
+    },
+    parsers={
+        'get_model': lambda response: response.split('\n')[1],
+        'get_acquisition_detail': _quectel_acquisition,
+        'get_satellite_info': lambda response: _quectel_trace(response)[9],
+        'get_wakeup_period': lambda response: response.split(',')[0],
+    },
+    message_state_fields=('name', 'priority', None, 'state', 'length',
+                          'bytes_delivered'),
+    mt_message_fields=('name', 'codec_sin', 'length', 'data_format',
+                       'payload'),
+    mo_name_max_len=MSG_MO_NAME_QMAX_LEN,
+    codec_separator=',',
+    sreg_separator=';',
+    gnss_mode=GnssModeQuectel,
+    chained=frozenset(('get_mt_message', 'delete_mt_message')),
+)
+
+DIALECTS: 'Mapping[Manufacturer, Dialect]' = MappingProxyType({
+    Manufacturer.ORBCOMM: ORBCOMM,
+    Manufacturer.QUECTEL: QUECTEL,
+})
+
+
+def get_dialect(manufacturer: Manufacturer) -> Dialect:
+    """Get the dialect of a manufacturer, defaulting to ORBCOMM."""
+    return DIALECTS.get(manufacturer, ORBCOMM)
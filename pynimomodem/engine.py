@@ -0,0 +1,380 @@
+"""A single-threaded engine multiplexing the serial ports of many modems.
+
+`ModemEngine` registers each modem's serial port file descriptor with a
+`selectors` selector (epoll on Linux) and runs `NimoModem` operations from one
+thread. Bytes ready on each port advance that modem's response parser and the
+operation's `Future` completes when its final result code arrives, so a large
+fleet does not need a thread per modem.
+
+Modems added to an engine must not be used directly until removed.
+
+"""
+import heapq
+import logging
+import os
+import selectors
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable
+
+from .constants import AtParsingState, CommandPriority
+from .modem import NimoModem
+from .nimoutils import dprint, vlog
+
+VLOG_TAG = 'modemengine'
+READ_CHUNK_SIZE = 4096
+
+_log = logging.getLogger(__name__)
+
+
+class _Port:
+    """The engine state of one modem."""
+    __slots__ = ('modem', 'buffer', 'fd', 'queue', 'operation', 'future',
+                 'prefix', 'output', 'writing', 'token')
+    
+    def __init__(self, modem: NimoModem, fd: int) -> None:
+        self.modem = modem
+        self.buffer = modem._modem
+        self.fd = fd
+        self.queue: 'deque[tuple[Future, object]]' = deque()
+        self.operation = None
+        self.future: 'Future|None' = None
+        self.prefix: str = ''
+        self.output: 'memoryview|None' = None
+        self.writing: bool = False
+        self.token: int = 0   # invalidates superseded deadlines
+
+
+class ModemEngine:
+    """Runs operations for many modems from a single selector thread.
+    
+    Operations are submitted from any thread as the bound `NimoModem` method,
+    returning a `concurrent.futures.Future` for the result::
+        
+        engine = ModemEngine()
+        engine.add(modem)
+        engine.start()
+        status = engine.submit(modem.get_network_status).result()
+    
+    Operations on a modem run one at a time in the order submitted. Different
+    modems run concurrently.
+    
+    """
+    def __init__(self) -> None:
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._ports: 'dict[NimoModem, _Port]' = {}
+        self._calls: 'deque[Callable]' = deque()
+        self._deadlines: 'list[tuple[float, int, int, _Port, bool]]' = []
+        self._sequence: int = 0
+        self._thread: 'threading.Thread|None' = None
+        self._stop = threading.Event()
+        self.commands_completed: int = 0
+    
+    def __enter__(self) -> 'ModemEngine':
+        self.start()
+        return self
+    
+    def __exit__(self, *args) -> None:
+        self.stop()
+    
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        """Starts the engine thread."""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='ModemEngine',
+                                        daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stops the engine thread, failing operations not yet completed."""
+        if not self.is_running:
+            return
+        self._stop.set()
+        self._wakeup()
+        self._thread.join()
+        self._thread = None
+        exc = ConnectionError('Modem engine stopped')
+        while self._calls:
+            func, args = self._calls.popleft()
+            if func != self._submit:
+                func(*args)
+                continue
+            _, future, operation = args   # not started, so never sent
+            operation.close()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exc)
+        for port in list(self._ports.values()):
+            self._fail(port, exc)
+    
+    def add(self, modem: NimoModem) -> None:
+        """Adds a modem to be driven by the engine.
+        
+        Raises:
+            `ValueError` if the modem serial port cannot be selected.
+        
+        """
+        if not isinstance(modem, NimoModem):
+            raise ValueError('Invalid modem')
+        fd = modem._modem._fileno()
+        if fd is None or not modem._serial.is_open:
+            raise ValueError('Modem serial port cannot be selected')
+        modem._modem.stop_reader()
+        self._call(self._add, modem, fd)
+    
+    def remove(self, modem: NimoModem) -> None:
+        """Removes a modem, failing its operations not yet completed."""
+        self._call(self._remove, modem)
+    
+    def submit(self, operation: Callable, *args, **kwargs) -> Future:
+        """Submits a modem operation to run on the engine.
+        
+        Args:
+            operation (Callable): A bound operation method of a modem added
+                to the engine, e.g. `modem.get_network_status`.
+            *args: Passed to the operation.
+            **kwargs: Passed to the operation.
+        
+        Returns:
+            A `Future` for the operation's return value or exception.
+        
+        Raises:
+            `ValueError` if the operation is not a modem operation.
+        
+        """
+        modem = getattr(operation, '__self__', None)
+        if (not isinstance(modem, NimoModem) or
+            not hasattr(operation, '__wrapped__')):
+            raise ValueError('Invalid modem operation')
+        generator = modem._nested(operation, *args, **kwargs)
+        future = Future()
+        self._call(self._submit, modem, future, generator)
+        return future
+    
+    def submit_command(self,
+                       modem: NimoModem,
+                       command: str,
+                       prefix: str = '',
+                       timeout: 'float|None' = None) -> Future:
+        """Submits an AT command to a modem, for a `Future` of the response.
+        
+        Raises as `NimoModem` operations for error responses.
+        
+        """
+        future = Future()
+        self._call(self._submit, modem, future,
+                   modem._command(command, prefix, timeout))
+        return future
+    
+    def _call(self, func: Callable, *args) -> None:
+        """Queues a call to run on the engine thread."""
+        self._calls.append((func, args))
+        self._wakeup()
+    
+    def _wakeup(self) -> None:
+        try:
+            os.write(self._wakeup_w, b'\0')
+        except BlockingIOError:
+            pass   # already pending
+    
+    def _run(self) -> None:
+        """The engine loop."""
+        select = self._selector.select
+        while not self._stop.is_set():
+            timeout = None
+            if self._deadlines:
+                timeout = max(0, self._deadlines[0][0] - time.monotonic())
+            for key, events in select(timeout):
+                port = key.data
+                if port is None:
+                    try:
+                        while os.read(self._wakeup_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                if events & selectors.EVENT_WRITE:
+                    self._write(port)
+                if events & selectors.EVENT_READ:
+                    self._read(port)
+            while self._calls and not self._stop.is_set():
+                func, args = self._calls.popleft()
+                func(*args)
+            self._expire_deadlines()
+    
+    def _add(self, modem: NimoModem, fd: int) -> None:
+        if modem in self._ports:
+            return
+        port = _Port(modem, fd)
+        self._ports[modem] = port
+        self._selector.register(fd, selectors.EVENT_READ, port)
+        if vlog(VLOG_TAG):
+            _log.debug('Added %s to engine', modem._serial.name)
+    
+    def _remove(self, modem: NimoModem) -> None:
+        port = self._ports.pop(modem, None)
+        if port is None:
+            return
+        self._selector.unregister(port.fd)
+        self._fail(port, ConnectionError('Modem removed from engine'))
+    
+    def _fail(self, port: _Port, exc: Exception) -> None:
+        """Fails the active and queued operations of a port."""
+        if port.future is not None:
+            port.token += 1
+            with port.buffer._rx_cond:
+                port.buffer._complete_parsing()
+            port.operation.close()
+            port.future.set_exception(exc)
+            port.operation = port.future = None
+        while port.queue:
+            future, operation = port.queue.popleft()
+            operation.close()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exc)
+    
+    def _submit(self, modem: NimoModem, future: Future, operation) -> None:
+        port = self._ports.get(modem)
+        if port is None:
+            operation.close()
+            future.set_exception(ValueError('Modem not added to engine'))
+            return
+        port.queue.append((future, operation))
+        if port.future is None:
+            self._next_operation(port)
+    
+    def _next_operation(self, port: _Port) -> None:
+        while port.queue:
+            future, operation = port.queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                operation.close()
+                continue
+            port.future = future
+            port.operation = operation
+            self._advance(port, None)
+            return
+    
+    def _advance(self, port: _Port, result) -> None:
+        """Sends the operation its last result, then its next command."""
+        try:
+            command, prefix, timeout = port.operation.send(result)
+            self._send(port, command, prefix, timeout)
+        except StopIteration as stop:
+            port.future.set_result(stop.value)
+        except Exception as exc:   # raised by the operation
+            port.future.set_exception(exc)
+        else:
+            return
+        port.operation = port.future = None
+        self._next_operation(port)
+    
+    def _send(self,
+              port: _Port,
+              command: str,
+              prefix: str,
+              timeout: 'float|None') -> None:
+        buffer = port.buffer
+        buffer._scheduler.acquire(CommandPriority.POLL)
+        with buffer._rx_cond:
+            dump_buffer = buffer._drain_rx()
+        data = buffer._start_command(command, dump_buffer)
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            timeout = buffer.response_timeout(buffer._pending_command)
+        port.prefix = prefix
+        port.output = memoryview(data)
+        self._set_deadline(port, timeout)
+        if vlog(VLOG_TAG):
+            _log.debug('Sending on %s: %s', buffer.serial.name,
+                       dprint(command))
+        self._write(port)
+        buffer._dispatch_unsolicited()
+    
+    def _write(self, port: _Port) -> None:
+        output = port.output
+        if output:
+            try:
+                output = output[os.write(port.fd, output):]
+            except BlockingIOError:
+                pass
+            except OSError as exc:
+                self._remove(port.modem)
+                _log.error('Serial write failed: %s', exc)
+                return
+            port.output = output
+        writing = bool(output)
+        if writing != port.writing:
+            events = selectors.EVENT_READ
+            if writing:
+                events |= selectors.EVENT_WRITE
+            self._selector.modify(port.fd, events, port)
+            port.writing = writing
+    
+    def _read(self, port: _Port) -> None:
+        buffer = port.buffer
+        try:
+            data = os.read(port.fd, READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as exc:
+            _log.error('Serial read failed: %s', exc)
+            self._remove(port.modem)
+            return
+        if not data:
+            _log.error('Serial port closed')
+            self._remove(port.modem)
+            return
+        with buffer._rx_cond:
+            buffer._receive(data)
+            settling = buffer._error_settling
+            complete = buffer._parsing >= AtParsingState.OK
+        buffer._dispatch_unsolicited()
+        if port.future is None:
+            return
+        if settling:
+            # allow a character time for a CRC following the error
+            self._set_deadline(port, buffer._char_delay, settling=True)
+        elif complete:
+            self._finish(port)
+    
+    def _set_deadline(self,
+                      port: _Port,
+                      timeout: float,
+                      settling: bool = False) -> None:
+        port.token += 1
+        self._sequence += 1
+        heapq.heappush(self._deadlines, (time.monotonic() + timeout,
+                                         self._sequence, port.token, port,
+                                         settling))
+    
+    def _expire_deadlines(self) -> None:
+        deadlines = self._deadlines
+        now = time.monotonic()
+        while deadlines and deadlines[0][0] <= now:
+            _, _, token, port, settling = heapq.heappop(deadlines)
+            if token != port.token or port.future is None:
+                continue   # superseded
+            if settling:
+                with port.buffer._rx_cond:
+                    port.buffer._error_settling = False
+            self._finish(port)
+    
+    def _finish(self, port: _Port) -> None:
+        """Completes the pending command and advances its operation."""
+        buffer = port.buffer
+        port.token += 1
+        with buffer._rx_cond:
+            error = buffer._complete_parsing(port.prefix)
+        buffer._dispatch_unsolicited()
+        self.commands_completed += 1
+        self._advance(port, (error, buffer.get_response()))
@@ -0,0 +1,227 @@
+"""A shared GNSS fix cache and continuous location stream for a modem.
+
+Waiting for a GNSS fix can hold the modem's serial port for the longest of
+any operation. `LocationService` keeps the last `ModemLocation` reported by
+`NimoModem.get_location` with its age, so callers within a staleness bound
+are served without a command. Once started, it sets the modem's GNSS
+continuous refresh so the receiver keeps a fix, and polls it on a background
+thread with a short wait, passing each new fix to callbacks or a stream::
+
+    service = modem.location_service
+    service.start(interval=10)
+    for location in service.stream():
+        print(location.latitude, location.longitude)
+
+"""
+import logging
+import threading
+import time
+from typing import Callable, Generator
+
+from .location import ModemLocation
+from .nimoutils import vlog
+
+VLOG_TAG = 'locationservice'
+DEFAULT_GNSS_INTERVAL = 10   # seconds between continuous GNSS refreshes
+DEFAULT_FIX_MAX_AGE = 30   # seconds a fix is served while running
+LOCATION_POLL_WAIT = 1   # seconds the modem may wait for a fix when polled
+
+_log = logging.getLogger(__name__)
+
+
+class LocationService:
+    """The last GNSS fix of a modem, optionally refreshed in the background.
+    
+    Fixes are published by every `NimoModem.get_location` call. While the
+    service is running, `get_location` calls without a `max_age` are served
+    from the cache if the fix is younger than `max_age`.
+    
+    The background poller requires a blocking `NimoModem`. With
+    `AsyncNimoModem` the cache, callbacks and stream may be used.
+    
+    Attributes:
+        max_age (float): Maximum age in seconds of a fix served by default
+            while running.
+    
+    """
+    def __init__(self, modem, max_age: float = DEFAULT_FIX_MAX_AGE) -> None:
+        self.max_age: float = max_age
+        self._modem = modem
+        self._cond = threading.Condition()
+        self._location: 'ModemLocation|None' = None
+        self._timestamp: float = 0.0
+        self._fixes: int = 0
+        self._stops: int = 0
+        self._callbacks: 'list[Callable[[ModemLocation], None]]' = []
+        self._interval: int = 0
+        self._thread: 'threading.Thread|None' = None
+        self._stop = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """Indicates if the background poller is running."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def interval(self) -> int:
+        """The continuous GNSS refresh interval in seconds, 0 if stopped."""
+        return self._interval
+    
+    @property
+    def location(self) -> 'ModemLocation|None':
+        """The last fix, regardless of age."""
+        return self._location
+    
+    @property
+    def age(self) -> 'float|None':
+        """The age of the last fix in seconds, `None` if no fix."""
+        if self._location is None:
+            return None
+        return time.monotonic() - self._timestamp
+    
+    @property
+    def fixes(self) -> int:
+        """The number of fixes published."""
+        return self._fixes
+    
+    def get(self, max_age: 'float|None' = None) -> 'ModemLocation|None':
+        """Get the last fix if it is recent enough, without a command.
+        
+        Args:
+            max_age (float): Maximum fix age in seconds, default `max_age`.
+        
+        """
+        if max_age is None:
+            max_age = self.max_age
+        with self._cond:
+            if (self._location is not None and
+                time.monotonic() - self._timestamp <= max_age):
+                return self._location
+        return None
+    
+    def publish(self, location: ModemLocation) -> None:
+        """Records a new fix and passes it to callbacks and streams."""
+        if not isinstance(location, ModemLocation):
+            raise ValueError('Invalid ModemLocation')
+        with self._cond:
+            self._location = location
+            self._timestamp = time.monotonic()
+            self._fixes += 1
+            callbacks = list(self._callbacks)
+            self._cond.notify_all()
+        if vlog(VLOG_TAG):
+            _log.debug('New fix %0.5f, %0.5f', location.latitude,
+                       location.longitude)
+        for callback in callbacks:
+            try:
+                callback(location)
+            except Exception as exc:
+                _log.error('Location callback %s failed: %s', callback, exc)
+    
+    def add_callback(self,
+                     callback: 'Callable[[ModemLocation], None]') -> None:
+        """Register a callback for each new fix.
+        
+        Callbacks run on the thread that got the fix and must not wait on
+        commands.
+        
+        """
+        if not callable(callback):
+            raise ValueError('Invalid callback')
+        with self._cond:
+            self._callbacks.append(callback)
+    
+    def remove_callback(self, callback: 'Callable[[ModemLocation], None]'):
+        """Remove a previously registered callback."""
+        with self._cond:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+    
+    def stream(self,
+               timeout: 'float|None' = None,
+               ) -> 'Generator[ModemLocation, None, None]':
+        """Get each new fix as it is published.
+        
+        Args:
+            timeout (float): Maximum time in seconds to wait for each fix.
+                If `None` waits until the service is stopped.
+        
+        Yields:
+            `ModemLocation` for each fix after the stream starts, ending on
+                timeout or when the service is stopped.
+        
+        """
+        with self._cond:
+            fixes, stops = self._fixes, self._stops
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(
+                        lambda: self._fixes != fixes or self._stops != stops,
+                        timeout):
+                    return
+                if self._stops != stops:
+                    return
+                fixes = self._fixes
+                location = self._location
+            yield location
+    
+    def start(self, interval: int = DEFAULT_GNSS_INTERVAL) -> None:
+        """Enable continuous GNSS and poll the modem for each refresh.
+        
+        Args:
+            interval (int): Continuous refresh interval 1..30 seconds.
+        
+        Raises:
+            `ValueError` if invalid interval is specified.
+            `TypeError` if the modem is an `AsyncNimoModem`.
+            `ModemError` if the modem rejects continuous mode.
+        
+        """
+        from .asyncmodem import AsyncNimoModem   # imports this module
+        if isinstance(self._modem, AsyncNimoModem):
+            raise TypeError('Background polling requires a blocking modem')
+        if interval not in range(1, 31):
+            raise ValueError('Invalid GNSS refresh interval')
+        if self.running:
+            self.stop(disable=False)
+        self._modem.set_gnss_continuous(interval)
+        self._interval = interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='LocationService',
+                                        daemon=True)
+        self._thread.start()
+    
+    def stop(self, disable: bool = True) -> None:
+        """Stop polling and end any streams.
+        
+        Args:
+            disable (bool): Disable continuous GNSS on the modem.
+        
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        with self._cond:
+            self._stops += 1
+            self._cond.notify_all()
+        if disable and self._interval:
+            try:
+                self._modem.set_gnss_continuous(0)
+            except Exception as exc:
+                _log.warning('Unable to disable continuous GNSS: %s', exc)
+        self._interval = 0
+    
+    def _run(self) -> None:
+        """Polls the modem for the continuously refreshed fix."""
+        interval = self._interval
+        while not self._stop.is_set():
+            try:
+                self._modem.get_location(stale_secs=interval,
+                                         wait_secs=LOCATION_POLL_WAIT,
+                                         max_age=0)
+            except Exception as exc:
+                _log.warning('Location poll failed: %s', exc)
+            self._stop.wait(interval)
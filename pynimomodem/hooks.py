@@ -0,0 +1,91 @@
+"""Command lifecycle hooks for profiling and tracing.
+
+Subclass `CommandHooks`, overriding the events of interest, and register an
+instance with `NimoModem.add_command_hooks` or
+`AtCommandBuffer.add_command_hooks`. Each event receives a `CommandEvent`
+with the monotonic timestamps of the command's progress so far, allowing time
+to be attributed to the modem, the wire or parsing::
+
+    class Tracer(CommandHooks):
+        def on_complete(self, event):
+            print(event.command, event.modem_time, event.transfer_time,
+                  event.parse_time)
+
+Hooks run on the thread parsing the response, possibly holding the receive
+lock. They should return quickly and must not send commands.
+
+"""
+from dataclasses import dataclass
+
+from .constants import AtErrorCode
+
+
+@dataclass
+class CommandEvent:
+    """The progress of a command at a lifecycle event.
+    
+    Timestamps are `time.monotonic()` values, `None` if not yet reached.
+    
+    Attributes:
+        command (str): The command sent, including any CRC and `\\r`.
+        timestamp (float): The time of the event.
+        sent (float): The time the command was submitted to the port.
+        first_byte (float): The time the first response byte was received.
+        echo (float): The time the command echo was received.
+        result (float): The time the result code was received.
+        bytes_sent (int): The encoded command size.
+        bytes_received (int): The response bytes received so far.
+        error (AtErrorCode): The result, for completion and error events.
+    
+    """
+    command: str
+    timestamp: float
+    sent: float
+    first_byte: 'float|None' = None
+    echo: 'float|None' = None
+    result: 'float|None' = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    error: AtErrorCode = AtErrorCode.OK
+    
+    @property
+    def modem_time(self) -> 'float|None':
+        """Time from sending to the first response byte."""
+        if self.first_byte is None:
+            return None
+        return self.first_byte - self.sent
+    
+    @property
+    def transfer_time(self) -> 'float|None':
+        """Time from the first response byte to the result code."""
+        if self.first_byte is None or self.result is None:
+            return None
+        return self.result - self.first_byte
+    
+    @property
+    def parse_time(self) -> 'float|None':
+        """Time from the result code to the event, e.g. completion."""
+        if self.result is None:
+            return None
+        return self.timestamp - self.result
+
+
+class CommandHooks:
+    """Callbacks for command lifecycle events. Override those needed."""
+    def on_send(self, event: CommandEvent) -> None:
+        """Called as the command is about to be written to the port."""
+    
+    def on_first_byte(self, event: CommandEvent) -> None:
+        """Called when the first byte of the response is received."""
+    
+    def on_echo(self, event: CommandEvent) -> None:
+        """Called when the command echo is received."""
+    
+    def on_result_code(self, event: CommandEvent) -> None:
+        """Called when the result code (and any CRC) is received."""
+    
+    def on_error(self, event: CommandEvent) -> None:
+        """Called on completing with an error, including timeout."""
+    
+    def on_complete(self, event: CommandEvent) -> None:
+        """Called when the response is materialized, after any error."""
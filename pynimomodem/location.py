@@ -3,17 +3,30 @@
 This module:
 
 * Parses NMEA-0183 data into a `ModemLocation` object.
-* Calculates azimuth and elevation to a geostationary `SatelliteLocation`.
+* Ingests large sets of NMEA-0183 data into columnar `NmeaTrack` fixes.
+* Calculates azimuth and elevation to a geostationary `SatelliteLocation`,
+  for one location or arrays of many.
 
 Thanks for Azimuth/Elevation derived from code at:
 https://github.com/sq3tle/altazrange/tree/master
 
 """
+import calendar
 import json
 import logging
 import math
-from copy import deepcopy
-from dataclasses import dataclass
+import mmap
+import os
+from array import array
+from dataclasses import asdict, dataclass
+from functools import lru_cache, reduce
+from operator import itemgetter, xor
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+try:
+    import numpy as np
+except ImportError:   # optional, for columnar NMEA tracks
+    np = None
 
 from .constants import (
     GEOSTATIONARY_DISTANCE_M,
@@ -21,12 +34,19 @@ from .constants import (
     GeoSatellite,
     NimoIntEnum,
 )
-from .nimoutils import iso_to_ts, ts_to_iso, vlog
+from .nimoutils import ts_to_iso, vlog
 
 VLOG_TAG = 'nmealocation'
 TRACE_TAG = VLOG_TAG + 'trace'
+NAN = float('nan')
+EARTH_EQUATORIAL_RADIUS_M = 6378137.0
+EARTH_POLAR_RADIUS_M = 6356752.3
+EARTH_ECCENTRICITY_SQ = 0.00669437999014   # first eccentricity squared
+SATELLITE_LOCATION_CACHE_SIZE = 1024
+SATELLITE_LOCATION_CACHE_DECIMALS = 4   # about 10 m
 
 _log = logging.getLogger(__name__)
+_SATELLITES: 'tuple[GeoSatellite, ...]' = tuple(GeoSatellite)
 
 
 class GnssFixType(NimoIntEnum):
@@ -84,6 +104,7 @@ class ModemLocation:
         hdop (float): Horizontal Dilution of Precision
         vdop (float): Vertical Dilution of Precision
         time_iso (str): ISO 8601 formatted timestamp
+        satellites_info (list): `GnssSatelliteInfo` from any GSV data
 
     """
     def __init__(self, **kwargs):
@@ -100,35 +121,39 @@ class ModemLocation:
         self.pdop = float(kwargs.get('pdop', 99))
         self.hdop = float(kwargs.get('hdop', 99))
         self.vdop = float(kwargs.get('vdop', 99))
-        # self.satellites_info: 'list[GnssSatelliteInfo]' = kwargs.get(
-        #     'satellites_info', []
-        # )
+        self.satellites_info: 'list[GnssSatelliteInfo]' = list(
+            kwargs.get('satellites_info', [])
+        )
 
     @property
     def time_iso(self) -> str:
         return f'{ts_to_iso(self.timestamp)}'
 
-    # def _update_satellites_info(self,
-    #                             satellites_info: 'list[GnssSatelliteInfo]'):
-    #     """Populates satellite information based on NMEA GSV data."""
-    #     for satellite_info in satellites_info:
-    #         if isinstance(satellite_info, GnssSatelliteInfo):
-    #             new = True
-    #             for i, info in enumerate(self.satellites_info):
-    #                 if info.prn == satellite_info.prn:
-    #                     new = False
-    #                     self.satellites_info[i] = satellite_info
-    #                     break
-    #             if new:
-    #                 self.satellites_info.append(satellite_info)
+    def _update_satellites_info(self,
+                                satellites_info: 'list[GnssSatelliteInfo]'):
+        """Populates satellite information based on NMEA GSV data."""
+        index = {info.prn: i for i, info in enumerate(self.satellites_info)}
+        for satellite_info in satellites_info:
+            if isinstance(satellite_info, GnssSatelliteInfo):
+                i = index.get(satellite_info.prn)
+                if i is None:
+                    index[satellite_info.prn] = len(self.satellites_info)
+                    self.satellites_info.append(satellite_info)
+                else:
+                    self.satellites_info[i] = satellite_info
 
     def __repr__(self) -> str:
-        obj = deepcopy(self.__dict__)
-        for k, v in obj.items():
+        obj = {}
+        for k, v in self.__dict__.items():
             if k in ['latitude', 'longitude']:
-                obj[k] = round(v, 5)
+                v = round(v, 5)
             elif isinstance(v, float):
-                obj[k] = round(v, 1)
+                v = round(v, 1)
+            elif k == 'satellites_info':
+                if not v:
+                    continue
+                v = [asdict(info) for info in v]
+            obj[k] = v
         return json.dumps(obj, skipkeys=True)
 
 
@@ -144,18 +169,6 @@ class SatelliteLocation:
     geobeam: 'GeoBeam|None' = None
 
 
-@dataclass
-class _PointLocation:
-    """Location used for spherical coordinates (for azimuth/elevation)."""
-    x: float = 0.0
-    y: float = 0.0
-    z: float = 0.0
-    radius: float = 0.0
-    nx: float = 0.0
-    ny: float = 0.0
-    nz: float = 0.0
-
-
 def validate_nmea(nmea_sentence: str) -> bool:
     """Validates a given NMEA-0183 sentence with CRC.
     
@@ -167,130 +180,161 @@ def validate_nmea(nmea_sentence: str) -> bool:
         return False
     data, cs_hex = nmea_sentence.split('*')
     candidate = int(cs_hex, 16)
-    crc = 0   # initial
-    for i in range(1, len(data)):   # ignore initial $
-        crc ^= ord(data[i])
+    crc = reduce(xor, data[1:].encode(), 0)   # ignore initial $
     return candidate == crc
 
 
+def _nmea_timestamp(fix_time: str, fix_date: str) -> int:
+    """Converts RMC `hhmmss.sss` and `ddmmyy` fields to a unix timestamp."""
+    fix_yy = int(fix_date[4:6])
+    fix_yy += 1900 if fix_yy >= 73 else 2000
+    return calendar.timegm((fix_yy, int(fix_date[2:4]), int(fix_date[0:2]),
+                            int(fix_time[0:2]), int(fix_time[2:4]),
+                            int(fix_time[4:6])))
+
+
+def _latitude(value: str, hemisphere: str) -> float:
+    latitude = float(value[0:2]) + float(value[2:]) / 60.0
+    return -latitude if hemisphere == 'S' else latitude
+
+
+def _longitude(value: str, hemisphere: str) -> float:
+    longitude = float(value[0:3]) + float(value[3:]) / 60.0
+    return -longitude if hemisphere == 'W' else longitude
+
+
+def _fix_quality(value: str) -> GnssFixQuality:
+    return GnssFixQuality(int(value))
+
+
+def _fix_type(value: str) -> GnssFixType:
+    return GnssFixType(int(value))
+
+
+def _dop(value: str) -> float:
+    return round(float(value), 1)
+
+
+def _fix_status(value: str) -> None:
+    if value == 'V':
+        _log.warning('Fix Void')
+
+
+def _altitude_units(value: str) -> None:
+    if value != 'M':
+        _log.warning('Unexpected altitude units: %s', value)
+
+
+# (ModemLocation attribute or None to only check, field indices, converter)
+NMEA_FIELDS: 'dict[str, tuple[tuple[str|None, tuple[int, ...], Callable]]]' = {
+    'RMC': (
+        (None, (2,), _fix_status),
+        ('latitude', (3, 4), _latitude),
+        ('longitude', (5, 6), _longitude),
+        ('speed', (7,), float),
+        ('heading', (8,), float),
+        ('timestamp', (1, 9), _nmea_timestamp),
+    ),
+    'GGA': (
+        ('fix_quality', (6,), _fix_quality),
+        ('satellites', (7,), int),
+        ('hdop', (8,), _dop),
+        ('altitude', (9,), float),
+        (None, (10,), _altitude_units),
+    ),
+    'GSA': (
+        ('fix_type', (2,), _fix_type),
+        ('pdop', (15,), _dop),
+        ('vdop', (17,), _dop),
+    ),
+}
+
+
+def _compile_extractor(fields: tuple) -> Callable:
+    """Builds a function applying a sentence's field table to a location.
+    
+    Only the fields in the table are read, by index. Empty fields leave the
+    location attribute unchanged.
+    
+    """
+    compiled = tuple((attr, itemgetter(*indices), converter, len(indices) > 1)
+                     for attr, indices, converter in fields)
+    min_fields = max(i for _, indices, _ in fields for i in indices) + 1
+    
+    def extract(location: ModemLocation, values: 'list[str]') -> None:
+        if len(values) < min_fields:
+            raise ValueError('Incomplete NMEA-0183 sentence')
+        for attr, get, converter, multiple in compiled:
+            if multiple:
+                args = get(values)
+                if not all(args):
+                    continue
+                value = converter(*args)
+            else:
+                arg = get(values)
+                if not arg:
+                    continue
+                value = converter(arg)
+            if attr is not None:
+                setattr(location, attr, value)
+    
+    return extract
+
+
+def _extract_gsv(location: ModemLocation, values: 'list[str]') -> None:
+    """Updates the location's satellite details from a GSV sentence.
+    
+    Each sentence has up to 4 satellites of (PRN, elevation, azimuth, SNR)
+    following the sentence count, sentence number and satellites in view.
+    
+    """
+    satellites_info = []
+    for i in range(4, len(values) - 3, 4):
+        if not values[i]:
+            continue
+        satellites_info.append(GnssSatelliteInfo(
+            int(values[i]),
+            int(values[i + 1] or 0),
+            int(values[i + 2] or 0),
+            int(values[i + 3] or 0),
+        ))
+    location._update_satellites_info(satellites_info)
+
+
+NMEA_EXTRACTORS: 'dict[str, Callable[[ModemLocation, list[str]], None]]' = {
+    nmea_type: _compile_extractor(fields)
+    for nmea_type, fields in NMEA_FIELDS.items()
+}
+NMEA_EXTRACTORS['GSV'] = _extract_gsv
+
+
 def parse_nmea_to_location(location: ModemLocation, nmea_sentence: str) -> None:
-    """Parses a NMEA-0183 sentence to update a ModemLocation."""
+    """Parses a NMEA-0183 sentence to update a ModemLocation.
+    
+    Sentence types without an extractor in `NMEA_EXTRACTORS` are ignored.
+    
+    Raises:
+        `ValueError` if the sentence is invalid.
+    
+    """
     if vlog(VLOG_TAG):
         _log.debug('Parsing NMEA: %s', nmea_sentence)
     if not validate_nmea(nmea_sentence):
         raise ValueError('Invalid NMEA-0183 sentence')
-    data = nmea_sentence.split('*')[0]
-    nmea_type = ''
-    cache = {}
-    for i, field_data in enumerate(data.split(',')):
-        if i == 0:
-            nmea_type = field_data[-3:]
-            if nmea_type == 'GSV':
-                _log.warn('No processing required for GSV sentence')
-                return
-            if nmea_type == 'GSA' and location.vdop != 99:
-                if vlog(TRACE_TAG):
-                    _log.debug('Skipping redundant GSA data')
-                return
-            if vlog(TRACE_TAG):
-                _log.debug('Processing NMEA type: %s', nmea_type)
-        elif i == 1:
-            if nmea_type == 'RMC':
-                cache['fix_hour'] = field_data[0:2]
-                cache['fix_min'] = field_data[2:4]
-                cache['fix_sec'] = field_data[4:6]
-                if vlog(TRACE_TAG):
-                    _log.debug('Fix time %s:%s:%s', cache['fix_hour'],
-                               cache['fix_min'], cache['fix_sec'])
-        elif i == 2:
-            if nmea_type == 'RMC':
-                if (field_data == 'V'):
-                    _log.warn('Fix Void')
-            elif nmea_type == 'GSA':
-                location.fix_type = GnssFixType(int(field_data))
-                if vlog(TRACE_TAG):
-                    _log.debug('Fix type: %s', location.fix_type.name)
-        elif i == 3:
-            if nmea_type == 'RMC':
-                location.latitude = (float(field_data[0:2]) +
-                                     float(field_data[2]) / 60.0)
-        elif i == 4:
-            if nmea_type == 'RMC':
-                if field_data == 'S':
-                    location.latitude *= -1
-                if vlog(TRACE_TAG):
-                    _log.debug('Latitude: %.5f', location.latitude)
-        elif i == 5:
-            if nmea_type == 'RMC':
-                location.longitude = (float(field_data[0:3]) +
-                                      float(field_data[3]) / 60.0)
-        elif i == 6:
-            if nmea_type == 'RMC':
-                if field_data == 'W':
-                    location.longitude *= -1
-                if vlog(TRACE_TAG):
-                    _log.debug('Longitude: %.5f', location.longitude)
-            elif nmea_type == 'GGA':
-                location.fix_quality = GnssFixQuality(int(field_data))
-                if vlog(TRACE_TAG):
-                    _log.debug('Fix quality: %s', location.fix_quality.name)
-        elif i == 7:
-            if nmea_type == 'RMC':
-                location.speed = float(field_data)
-                if vlog(TRACE_TAG):
-                    _log.debug('Speed: %.1f', location.speed)
-            elif nmea_type == 'GGA':
-                location.satellites = int(field_data)
-                if vlog(TRACE_TAG):
-                    _log.debug('GNSS satellites used: %d', location.satellites)
-        elif i == 8:
-            if nmea_type == 'RMC':
-                location.heading = float(field_data)
-                if vlog(TRACE_TAG):
-                    _log.debug('Heading: %.1f', location.heading)
-            elif nmea_type == 'GGA':
-                location.hdop = round(float(field_data), 1)
-                if vlog(TRACE_TAG):
-                    _log.debug('HDOP: %.1f', location.heading)
-        elif i == 9:
-            if nmea_type == 'RMC':
-                fix_day = field_data[0:2]
-                fix_month = field_data[2:4]
-                fix_yy = int(field_data[4:])
-                fix_yy += 1900 if fix_yy >= 73 else 2000
-                if vlog(TRACE_TAG):
-                    _log.debug('Fix date %d-%s-%s', fix_yy, fix_month, fix_day)
-                iso_time = (f'{fix_yy}-{fix_month}-{fix_day}T'
-                            f'{cache["fix_hour"]}:{cache["fix_min"]}'
-                            f':{cache["fix_sec"]}Z')
-                unix_timestamp = iso_to_ts(iso_time)
-                if vlog(TRACE_TAG):
-                    _log.debug('Fix time ISO 8601: %s | Unix: %d',
-                               iso_time, unix_timestamp)
-                location.timestamp = unix_timestamp
-            elif nmea_type == 'GGA':
-                location.altitude = float(field_data)
-                if vlog(TRACE_TAG):
-                    _log.debug('Altitude: %.1f', location.altitude)
-        elif i == 10:
-            # RMC magnetic variation - ignore
-            if nmea_type == 'GGA' and field_data != 'M':
-                _log.warning('Unexpected altitude units: %s', field_data)
-        # elif i == 11:   # RMC magnetic variation direction, GGA height of geoid - ignore
-        # elif i == 12:   # GGA units height of geoid - ignore
-        # elif i == 13:   # GGA seconds since last DGPS update - ignore
-        # elif i == 14:   # GGA DGPS station ID - ignore
-        elif i == 15:   # GSA PDOP - ignore (unused)
-            if nmea_type == 'GSA':
-                location.pdop = round(float(field_data), 1)
-                if vlog(TRACE_TAG):
-                    _log.debug('PDOP: %d', location.pdop)
-        # elif i == 16:   # GSA HDOP - ignore (use GGA)
-        elif i == 17:
-            if nmea_type == 'GSA':
-                location.vdop = round(float(field_data), 1)
-                if vlog(TRACE_TAG):
-                    _log.debug('VDOP: %d', location.vdop)
+    values = nmea_sentence.split('*', 1)[0].split(',')
+    nmea_type = values[0][-3:]
+    if nmea_type == 'GSA' and location.vdop != 99:
+        if vlog(TRACE_TAG):
+            _log.debug('Skipping redundant GSA data')
+        return
+    extractor = NMEA_EXTRACTORS.get(nmea_type)
+    if extractor is None:
+        if vlog(TRACE_TAG):
+            _log.debug('Ignoring NMEA type: %s', nmea_type)
+        return
+    extractor(location, values)
+    if vlog(TRACE_TAG):
+        _log.debug('Processed NMEA type %s: %s', nmea_type, location)
 
 
 def get_location_from_nmea_data(nmea_data: 'str|list[str]') -> ModemLocation:
@@ -317,10 +361,265 @@ def get_location_from_nmea_data(nmea_data: 'str|list[str]') -> ModemLocation:
     return location
 
 
+NMEA_TRACK_COLUMNS = ('timestamp', 'latitude', 'longitude', 'altitude',
+                      'speed', 'heading', 'hdop', 'pdop', 'vdop')
+NMEA_TRACK_CHUNK_SIZE = 2**22   # bytes of a file processed at a time
+NMEA_TRACK_BATCH = 16384   # sentences validated at a time
+_TRACK_TYPES = (b'RMC', b'GGA', b'GSA')
+_TRACK_MIN_FIELDS = {'RMC': 10, 'GGA': 11, 'GSA': 18}
+_HEX_VALUES = bytes(int(chr(c), 16) if chr(c) in '0123456789ABCDEFabcdef'
+                    else 0xFF for c in range(256))
+
+
+@dataclass
+class NmeaTrack:
+    """Columnar fixes derived from a batch of NMEA-0183 sentences.
+    
+    Each column has one row per fix: NumPy arrays if NumPy is installed,
+    otherwise `array.array`. Unknown values are `nan`, or 0 for timestamp.
+    
+    Attributes:
+        timestamp: Seconds since 1970-01-01T00:00:00Z (int64).
+        latitude: Decimal degrees.
+        longitude: Decimal degrees.
+        altitude: Metres.
+        speed: Knots.
+        heading: Degrees.
+        hdop: Horizontal Dilution of Precision.
+        pdop: Probability Dilution of Precision.
+        vdop: Vertical Dilution of Precision.
+        sentences (int): The RMC, GGA and GSA sentences read.
+        invalid (int): Sentences rejected for checksum or length.
+    
+    """
+    timestamp: Any
+    latitude: Any
+    longitude: Any
+    altitude: Any
+    speed: Any
+    heading: Any
+    hdop: Any
+    pdop: Any
+    vdop: Any
+    sentences: int = 0
+    invalid: int = 0
+    
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+
+class _NmeaTrackBuilder:
+    """Groups valid sentences into fix rows of the track columns.
+    
+    A row begins with a RMC or GGA sentence for a new time or repeating the
+    row's sentence type. GSA sentences add to the current row, with any
+    after the first ignored as redundant.
+    
+    """
+    def __init__(self) -> None:
+        self.columns: 'dict[str, array]' = {
+            name: array('q' if name == 'timestamp' else 'd')
+            for name in NMEA_TRACK_COLUMNS
+        }
+        self._days: 'dict[str, int]' = {}   # unix day start by ddmmyy
+        self.sentences: int = 0
+        self.invalid: int = 0
+        self._clear()
+    
+    def _clear(self) -> None:
+        self._time = ''
+        self._seen: 'set[str]' = set()
+        self._timestamp = 0
+        self._row = [NAN] * (len(NMEA_TRACK_COLUMNS) - 1)
+    
+    def flush(self) -> None:
+        """Appends the current row, if any, to the columns."""
+        if not self._seen:
+            return
+        columns = self.columns
+        columns['timestamp'].append(self._timestamp)
+        for name, value in zip(NMEA_TRACK_COLUMNS[1:], self._row):
+            columns[name].append(value)
+        self._clear()
+    
+    def add(self, sentence: str) -> None:
+        """Adds a valid sentence, without checksum, to the track."""
+        fields = sentence.split(',')
+        nmea_type = fields[0][-3:]
+        if len(fields) < _TRACK_MIN_FIELDS[nmea_type]:
+            self.invalid += 1
+            return
+        row = self._row
+        if nmea_type == 'GSA':
+            if nmea_type not in self._seen:
+                self._seen.add(nmea_type)
+                if fields[15]:
+                    row[6] = float(fields[15])
+                if fields[17]:
+                    row[7] = float(fields[17])
+                if fields[16] and row[5] != row[5]:   # nan until GGA
+                    row[5] = float(fields[16])
+            return
+        fix_time = fields[1]
+        if nmea_type in self._seen or (self._time and fix_time != self._time):
+            self.flush()
+            row = self._row
+        self._seen.add(nmea_type)
+        self._time = fix_time
+        if nmea_type == 'RMC':
+            if fields[3] and fields[4]:
+                row[0] = _latitude(fields[3], fields[4])
+            if fields[5] and fields[6]:
+                row[1] = _longitude(fields[5], fields[6])
+            if fields[7]:
+                row[3] = float(fields[7])
+            if fields[8]:
+                row[4] = float(fields[8])
+            fix_date = fields[9]
+            if len(fix_time) >= 6 and len(fix_date) == 6:
+                day = self._days.get(fix_date)
+                if day is None:
+                    day = self._days[fix_date] = _nmea_timestamp('000000',
+                                                                 fix_date)
+                self._timestamp = (day + int(fix_time[0:2]) * 3600 +
+                                   int(fix_time[2:4]) * 60 +
+                                   int(fix_time[4:6]))
+        else:   # GGA
+            if fields[8]:
+                row[5] = float(fields[8])
+            if fields[9]:
+                row[2] = float(fields[9])
+
+
+def _valid_checksums(bodies: 'list[bytes]',
+                     checksums: 'list[bytes]') -> 'list[bool]':
+    """Validates the XOR checksums of a batch of sentences.
+    
+    Args:
+        bodies: The sentences between `$` and `*`.
+        checksums: The 2 hex characters following each `*`.
+    
+    """
+    if np is None:
+        valid = []
+        for body, checksum in zip(bodies, checksums):
+            try:
+                valid.append(reduce(xor, body, 0) == int(checksum, 16))
+            except ValueError:
+                valid.append(False)
+        return valid
+    lengths = np.fromiter(map(len, bodies), np.int64, len(bodies))
+    starts = np.zeros(len(bodies), np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    data = np.frombuffer(b''.join(bodies), np.uint8)
+    calculated = np.bitwise_xor.reduceat(data, starts)
+    digits = np.frombuffer(b''.join(checksums).translate(_HEX_VALUES),
+                           np.uint8).reshape(-1, 2).astype(np.uint16)
+    expected = digits[:, 0] * 16 + digits[:, 1]   # over 255 if not hex
+    return (calculated == expected).tolist()
+
+
+def _ingest_lines(builder: _NmeaTrackBuilder, lines: 'list[bytes]') -> None:
+    """Validates a batch of lines and adds the track sentences."""
+    bodies = []
+    checksums = []
+    for line in lines:
+        if line[3:6] not in _TRACK_TYPES or not line.startswith(b'$'):
+            continue
+        builder.sentences += 1
+        star = line.rfind(b'*')
+        checksum = line[star + 1:star + 3]
+        if star < 6 or len(checksum) != 2:
+            builder.invalid += 1
+            continue
+        bodies.append(line[1:star])
+        checksums.append(checksum)
+    if not bodies:
+        return
+    for body, valid in zip(bodies, _valid_checksums(bodies, checksums)):
+        if valid:
+            builder.add(body.decode('latin-1'))
+        else:
+            builder.invalid += 1
+
+
+def _file_lines(path, chunk_size: int) -> 'Iterator[list[bytes]]':
+    """Reads a memory-mapped file in chunks of whole lines."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            pos = 0
+            while pos < size:
+                end = min(pos + chunk_size, size)
+                if end < size:
+                    eol = data.rfind(b'\n', pos, end)
+                    if eol == -1:
+                        eol = data.find(b'\n', end)
+                    end = size if eol == -1 else eol + 1
+                yield data[pos:end].split(b'\n')
+                pos = end
+
+
+def _batched_lines(sentences: Iterable,
+                   batch_size: int) -> 'Iterator[list[bytes]]':
+    """Groups sentences as lines of bytes."""
+    batch = []
+    for sentence in sentences:
+        if isinstance(sentence, str):
+            sentence = sentence.encode('latin-1', 'replace')
+        batch.append(sentence)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def get_track_from_nmea_data(source: 'str|os.PathLike|bytes|Iterable',
+                             chunk_size: int = NMEA_TRACK_CHUNK_SIZE,
+                             ) -> NmeaTrack:
+    """Derives columnar fixes from a large set of NMEA-0183 sentences.
+    
+    Intended for offline processing of archived `get_nmea_data` output.
+    Checksums are validated in bulk and sentences with an invalid checksum
+    are counted and skipped rather than raising. Only RMC, GGA and GSA
+    sentences contribute to the track.
+    
+    Args:
+        source: The path of a file to memory-map, bytes of NMEA data
+            separated by `\\n`, or an iterable of sentences (`str` or bytes).
+        chunk_size: The bytes of a file processed at a time.
+    
+    Returns:
+        `NmeaTrack` with a row per fix.
+    
+    """
+    builder = _NmeaTrackBuilder()
+    if isinstance(source, (str, os.PathLike)):
+        batches = _file_lines(source, chunk_size)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        batches = _batched_lines(bytes(source).split(b'\n'), NMEA_TRACK_BATCH)
+    else:
+        batches = _batched_lines(source, NMEA_TRACK_BATCH)
+    for lines in batches:
+        _ingest_lines(builder, [line.strip() for line in lines])
+    builder.flush()
+    columns = builder.columns
+    if np is not None:
+        columns = {name: np.frombuffer(column, column.typecode)
+                   for name, column in columns.items()}
+    if builder.invalid:
+        _log.warning('Skipped %d invalid NMEA sentences of %d',
+                     builder.invalid, builder.sentences)
+    return NmeaTrack(**columns, sentences=builder.sentences,
+                     invalid=builder.invalid)
+
+
 def get_closest_satellite(latitude: float, longitude: float) -> GeoSatellite:
     """Get the closest geostationary satellite to a given location."""
-    satellites = list(map(lambda x: x.value,GeoSatellite._member_map_.values()))
-    closest = GeoSatellite(min(satellites, key=lambda x:abs(x-longitude)))
+    closest = min(_SATELLITES, key=lambda x: abs(x.value - longitude))
     if closest == GeoSatellite.AORWSC:   #: single regional beam only
         if latitude >= 15.0 or latitude <= -45.0:
             if longitude >= -27.0:
@@ -342,13 +641,118 @@ def get_closest_satellite(latitude: float, longitude: float) -> GeoSatellite:
     return closest
 
 
+def get_geobeam_satellite(geobeam: GeoBeam) -> 'GeoSatellite|None':
+    """Get the satellite serving a GeoBeam, `None` for the global beam."""
+    prefix = GeoBeam(geobeam).name.split('_')[0]
+    for satellite in _SATELLITES:
+        if satellite.name.startswith(prefix):
+            return satellite
+    return None
+
+
+def _geographic_radius(lat_rad: float) -> float:
+    """Adjust radius for earth shape."""
+    cos = math.cos(lat_rad)
+    sin = math.sin(lat_rad)
+    t1 = EARTH_EQUATORIAL_RADIUS_M**2 * cos
+    t2 = EARTH_POLAR_RADIUS_M**2 * sin
+    t3 = EARTH_EQUATORIAL_RADIUS_M * cos
+    t4 = EARTH_POLAR_RADIUS_M * sin
+    return math.sqrt((t1 * t1 + t2 * t2) / (t3 * t3 + t4 * t4))
+
+
+def _geocentric_latitude(lat_rad: float) -> float:
+    """Derives the geocentric latitude."""
+    return math.atan((1.0 - EARTH_ECCENTRICITY_SQ) * math.tan(lat_rad))
+
+
+def _location_to_point(latitude: float,
+                       longitude: float,
+                       altitude: float,
+                       ) -> 'tuple[float, float, float, float, float, float]':
+    """Converts lat/lon/alt to Earth-centred `(x, y, z, nx, ny, nz)`.
+    
+    `(nx, ny, nz)` is the unit normal of the surface at the location.
+    
+    """
+    lat_rad = math.radians(latitude)
+    lon_rad = math.radians(longitude)
+    radius = _geographic_radius(lat_rad)
+    clat = _geocentric_latitude(lat_rad)
+    cos_lon = math.cos(lon_rad)
+    sin_lon = math.sin(lon_rad)
+    cos_lat = math.cos(clat)
+    cos_glat = math.cos(lat_rad)
+    nx = cos_glat * cos_lon
+    ny = cos_glat * sin_lon
+    nz = math.sin(lat_rad)
+    return (radius * cos_lon * cos_lat + altitude * nx,
+            radius * sin_lon * cos_lat + altitude * ny,
+            radius * math.sin(clat) + altitude * nz,
+            nx, ny, nz)
+
+
+# Earth-centred positions of the satellites, computed once
+_SATELLITE_POINTS: 'dict[GeoSatellite, tuple[float, float, float]]' = {
+    satellite: _location_to_point(0.0, satellite.value,
+                                  GEOSTATIONARY_DISTANCE_M)[0:3]
+    for satellite in _SATELLITES
+}
+
+
+def _azimuth_elevation(latitude: float,
+                       longitude: float,
+                       altitude: float,
+                       satellite: GeoSatellite,
+                       ) -> 'tuple[float|None, float|None]':
+    """Calculates the azimuth and elevation of a satellite from a location."""
+    sx, sy, sz = _SATELLITE_POINTS[satellite]
+    mx, my, mz, nx, ny, nz = _location_to_point(latitude, longitude, altitude)
+    # rotate the globe so the location is at longitude 0 for the azimuth
+    lon_rad = math.radians(longitude)
+    cos_lon = math.cos(lon_rad)
+    sin_lon = math.sin(lon_rad)
+    rx = sx * cos_lon + sy * sin_lon
+    ry = sy * cos_lon - sx * sin_lon
+    alat = _geocentric_latitude(math.radians(-latitude))
+    rz = rx * math.sin(alat) + sz * math.cos(alat)
+    if rz**2 + ry**2 <= 1.0e-6:
+        return None, None
+    azimuth = 90.0 - math.degrees(math.atan2(rz, ry))
+    if azimuth < 0.0:
+        azimuth += 360.0
+    if azimuth > 360.0:
+        azimuth -= 360.0
+    dx, dy, dz = sx - mx, sy - my, sz - mz
+    dist = math.sqrt(dx**2 + dy**2 + dz**2)
+    if dist == 0:
+        return azimuth, None
+    elevation = 90.0 - math.degrees(
+        math.acos((dx * nx + dy * ny + dz * nz) / dist))
+    return azimuth, elevation
+
+
+@lru_cache(maxsize=SATELLITE_LOCATION_CACHE_SIZE)
+def _cached_azimuth_elevation(latitude: float,
+                              longitude: float,
+                              altitude: float,
+                              satellite: GeoSatellite,
+                              ) -> 'tuple[float|None, float|None]':
+    """Rounded azimuth and elevation for a quantized location."""
+    azimuth, elevation = _azimuth_elevation(latitude, longitude, altitude,
+                                            satellite)
+    return (None if azimuth is None else round(azimuth, 1),
+            None if elevation is None else round(elevation, 1))
+
+
 def get_satellite_location(modem_location: ModemLocation,
                            geobeam: 'GeoBeam|None' = None,
                            ) -> SatelliteLocation:
     """Derives the azimuth and elevation of the nearest satellite.
     
     If not provided the current GeoBeam, derives the closest satellite from
-    the location provided.
+    the location provided. Results are cached for locations quantized to
+    `SATELLITE_LOCATION_CACHE_DECIMALS` degrees and whole metres.
     
     Args:
         modem_location (ModemLocation): The modem's Location object.
@@ -364,146 +768,129 @@ def get_satellite_location(modem_location: ModemLocation,
     """
     if not isinstance(modem_location, ModemLocation):
         raise ValueError('Invalid modem location')
-    # internal helper functions
-    def location_to_point(latitude: float,
-                        longitude: float,
-                        altitude: float,
-                        ) -> _PointLocation:
-        """Converts lat/lon/alt to point location."""
-        lat_rad = latitude * math.pi / 180.0
-        lon_rad = longitude * math.pi / 180.0
-        radius = get_geographic_radius(lat_rad)
-        clat = get_geocentric_latitude(lat_rad)
-        cos_lon = math.cos(lon_rad)
-        sin_lon = math.sin(lon_rad)
-        cos_lat = math.cos(clat)
-        sin_lat = math.sin(clat)
-        x = radius * cos_lon * cos_lat
-        y = radius * sin_lon * cos_lat
-        z = radius * sin_lat
-        cos_glat = math.cos(lat_rad)
-        sin_glat = math.sin(lat_rad)
-        nx = cos_glat * cos_lon
-        ny = cos_glat * sin_lon
-        nz = sin_glat
-        x += altitude * nx
-        y += altitude * ny
-        z += altitude * nz
-        return _PointLocation(x, y, z, radius, nx, ny, nz)
-
-    def get_geographic_radius(lat_rad: float) -> float:
-        """Adjust radius for earth shape."""
-        equatorial = 6378137.0
-        polar = 6356752.3
-        cos = math.cos(lat_rad)
-        sin = math.sin(lat_rad)
-        t1 = equatorial**2 * cos
-        t2 = polar**2 * sin
-        t3 = equatorial * cos
-        t4 = polar * sin
-        return math.sqrt((t1 * t1 + t2 * t2) / (t3 * t3 + t4 * t4))
-
-    def get_geocentric_latitude(lat_rad: float) -> float:
-        """Derives the geocentric latitude."""
-        e2 = 0.00669437999014   # first eccentricity squared, constant
-        clat = math.atan((1.0 - e2) * math.tan(lat_rad))
-        return clat
-
-    def rotate_globe(b: SatelliteLocation, a: ModemLocation, b_radius: float):
-        """Rotate the globe for vector alignment."""
-        brp = location_to_point(b.latitude, b.longitude - a.longitude, b.altitude)
-        alat = get_geocentric_latitude(-a.latitude * math.pi / 180.0)
-        acos = math.cos(alat)
-        asin = math.sin(alat)
-        bx = (brp.x * acos) - (brp.z * asin)
-        by = brp.y
-        bz = (brp.x * asin) + (brp.z * acos)
-        return _PointLocation(bx, by, bz, b_radius, 0.0, 0.0, 0.0)
-
-    def normalize_vector(b: _PointLocation, a: _PointLocation):
-        """Normalize the difference between vectors."""
-        dx = b.x - a.x
-        dy = b.y - a.y
-        dz = b.z - a.z
-        dist2 = dx**2 + dy**2 +dz**2
-        if dist2 == 0:
-            return None
-        dist = math.sqrt(dist2)
-        return _PointLocation(dx/dist, dy/dist, dz/dist, 1.0, 0.0, 0.0, 0.0)
-
-    azimuth = None
-    elevation = None
     if isinstance(geobeam, GeoBeam) and geobeam > 0:
-        satellite_name = geobeam.name.split('_')[0]
-        satellite = GeoSatellite[satellite_name]
+        satellite = get_geobeam_satellite(geobeam)
     else:
         satellite = get_closest_satellite(modem_location.latitude,
                                           modem_location.longitude)
-    # modem and satellite Cartesian location
-    mc = modem_location
-    sc = SatelliteLocation(name=satellite.name,
-                           longitude=satellite.value, 
-                           altitude=GEOSTATIONARY_DISTANCE_M,
-                           geobeam=geobeam)
-    # modem and satellite Point location
-    mp = location_to_point(mc.latitude, mc.longitude, mc.altitude)
-    sp = location_to_point(sc.latitude, sc.longitude, sc.altitude)
-    ref_point = rotate_globe(sc, mc, sp.radius)
-    if ref_point.z**2 + ref_point.y**2 > 1.0e-6:
-        theta = math.atan2(ref_point.z, ref_point.y) * 180.0 / math.pi
-        azimuth = 90.0 - theta
-        if azimuth < 0.0:
-            azimuth += 360.0
-        if azimuth > 360.0:
-            azimuth -= 360.0
-        bma = normalize_vector(sp, mp)   # Bayesian model averaging
-        if isinstance(bma, _PointLocation):
-            elevation = (90.0 - (180.0 / math.pi) * math.acos(
-                bma.x * mp.nx + bma.y * mp.ny + bma.z * mp.nz))
-    sc.azimuth = round(azimuth, 1)
-    sc.elevation = round(elevation, 1)
-    return sc
-
-# Below is parked for potential future use
-
-# def _parse_gsv_to_location(location: Location, gsv_sentence: str) -> None:
-#     """Returns a Location object based on an NMEA sentences data set.
-#
-#     Placeholder - overcomplicates Location object
-#
-#     Args:
-#         location: The Location object to update
-#         gsv_sentence: The Satellites in View sentence to parse
-#
-#     """
-#     update_satellites = getattr(location, '_update_satellites_info', None)
-#     if not callable(update_satellites):
-#         raise ValueError('Location object does not support GSV parsing')
-#     gsv = gsv_sentence.split(',')       # $GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45*75
-#     '''
-#     gsv_sentences = gsv[1]           # Number of sentences for full data
-#     gsv_sentence = gsv[2]            # Sentence number (up to 4 satellites per sentence)
-#     '''
-#     gsv_satellites = gsv[3]          # Number of satellites in view
-#     # following supports up to 4 satellites per sentence
-#     satellites_info = []
-#     if (len(gsv) - 4) % 4 > 0:
-#         # TODO: warn/log this case of extra GSV data in sentence
-#         pass
-#     num_satellites_in_sentence = int((len(gsv)-4)/4)
-#     for i in range(1, num_satellites_in_sentence+1):
-#         prn = int(gsv[i*4]) if gsv[i*4] != '' else 0             # satellite PRN number
-#         elevation = int(gsv[i*4+1]) if gsv[i*4+1] != '' else 0   # Elevation in degrees
-#         azimuth = int(gsv[i*4+2]) if gsv[i*4+2] != '' else 0     # Azimuth in degrees
-#         snr = int(gsv[i*4+3]) if gsv[i*4+3] != '' else 0         # Signal to Noise Ratio
-#         satellites_info.append(GnssSatelliteInfo(prn,
-#                                                     elevation,
-#                                                     azimuth,
-#                                                     snr))
-#     location._update_satellites_info(satellites_info)
-#     satellites = int(gsv_satellites) if gsv_satellites != '' else 0
-#     if location.satellites < satellites:
-#         location.satellites = satellites
-#     else:
-#         # TODO: log this case; should be limited to GPS simulation in Modem Simulator (3 satellites)
-#         pass
+    azimuth, elevation = _cached_azimuth_elevation(
+        round(modem_location.latitude, SATELLITE_LOCATION_CACHE_DECIMALS),
+        round(modem_location.longitude, SATELLITE_LOCATION_CACHE_DECIMALS),
+        float(round(modem_location.altitude)),
+        satellite,
+    )
+    return SatelliteLocation(name=satellite.name,
+                             longitude=satellite.value,
+                             altitude=GEOSTATIONARY_DISTANCE_M,
+                             azimuth=azimuth,
+                             elevation=elevation,
+                             geobeam=geobeam)
+
+
+class SatelliteGeometry(NamedTuple):
+    """Azimuth and elevation of the closest satellite to many locations.
+    
+    Each is a NumPy array, or `array.array` if NumPy is not installed, with
+    an element per location. Undefined angles are `nan`.
+    
+    Attributes:
+        azimuth: Degrees, rounded to 0.1.
+        elevation: Degrees, rounded to 0.1.
+        satellite: The `GeoSatellite` value (longitude) used.
+    
+    """
+    azimuth: Any
+    elevation: Any
+    satellite: Any
+
+
+def get_satellite_geometry(latitudes: 'Iterable[float]',
+                           longitudes: 'Iterable[float]',
+                           altitudes: 'Iterable[float]|None' = None,
+                           ) -> SatelliteGeometry:
+    """Derives the closest satellite, azimuth and elevation for many locations.
+    
+    Equivalent to `get_closest_satellite` and `get_satellite_location` per
+    location, computed over arrays with NumPy if installed.
+    
+    Args:
+        latitudes: Decimal degrees.
+        longitudes: Decimal degrees.
+        altitudes: Metres, default 0.
+    
+    Raises:
+        `ValueError` if the inputs differ in length.
+    
+    """
+    if np is None:
+        latitudes = list(latitudes)
+        longitudes = list(longitudes)
+        altitudes = ([0.0] * len(latitudes) if altitudes is None
+                     else list(altitudes))
+        if not len(latitudes) == len(longitudes) == len(altitudes):
+            raise ValueError('Location arrays differ in length')
+        result = SatelliteGeometry(array('d'), array('d'), array('d'))
+        for lat, lon, alt in zip(latitudes, longitudes, altitudes):
+            satellite = get_closest_satellite(lat, lon)
+            azimuth, elevation = _azimuth_elevation(lat, lon, alt, satellite)
+            result.azimuth.append(NAN if azimuth is None
+                                  else round(azimuth, 1))
+            result.elevation.append(NAN if elevation is None
+                                    else round(elevation, 1))
+            result.satellite.append(satellite.value)
+        return result
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    alt = (np.zeros_like(lat) if altitudes is None
+           else np.asarray(altitudes, dtype=np.float64))
+    if not lat.shape == lon.shape == alt.shape:
+        raise ValueError('Location arrays differ in length')
+    # closest satellite, with the first of equals as `min`
+    values = np.array([s.value for s in _SATELLITES])
+    sat_index = np.abs(lon[..., None] - values).argmin(axis=-1)
+    aorwsc = _SATELLITES.index(GeoSatellite.AORWSC)
+    regional = (sat_index == aorwsc) & ((lat >= 15.0) | (lat <= -45.0))
+    sat_index = np.where(
+        regional,
+        np.where(lon >= -27.0, _SATELLITES.index(GeoSatellite.EMEA),
+                 _SATELLITES.index(GeoSatellite.AMER)),
+        sat_index)
+    points = np.array([_SATELLITE_POINTS[s] for s in _SATELLITES])
+    sx, sy, sz = points[sat_index].T
+    # location points
+    lat_rad = np.radians(lat)
+    lon_rad = np.radians(lon)
+    cos_glat = np.cos(lat_rad)
+    sin_glat = np.sin(lat_rad)
+    t1 = EARTH_EQUATORIAL_RADIUS_M**2 * cos_glat
+    t2 = EARTH_POLAR_RADIUS_M**2 * sin_glat
+    t3 = EARTH_EQUATORIAL_RADIUS_M * cos_glat
+    t4 = EARTH_POLAR_RADIUS_M * sin_glat
+    radius = np.sqrt((t1 * t1 + t2 * t2) / (t3 * t3 + t4 * t4))
+    clat = np.arctan((1.0 - EARTH_ECCENTRICITY_SQ) * np.tan(lat_rad))
+    cos_lon = np.cos(lon_rad)
+    sin_lon = np.sin(lon_rad)
+    nx = cos_glat * cos_lon
+    ny = cos_glat * sin_lon
+    nz = sin_glat
+    mx = radius * cos_lon * np.cos(clat) + alt * nx
+    my = radius * sin_lon * np.cos(clat) + alt * ny
+    mz = radius * np.sin(clat) + alt * nz
+    # azimuth in the frame rotated to the location's longitude
+    rx = sx * cos_lon + sy * sin_lon
+    ry = sy * cos_lon - sx * sin_lon
+    alat = -clat   # geocentric latitude is odd
+    rz = rx * np.sin(alat) + sz * np.cos(alat)
+    defined = rz**2 + ry**2 > 1.0e-6
+    azimuth = 90.0 - np.degrees(np.arctan2(rz, ry))
+    azimuth = np.where(azimuth < 0.0, azimuth + 360.0, azimuth)
+    azimuth = np.where(azimuth > 360.0, azimuth - 360.0, azimuth)
+    dx, dy, dz = sx - mx, sy - my, sz - mz
+    dist = np.sqrt(dx**2 + dy**2 + dz**2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        elevation = 90.0 - np.degrees(
+            np.arccos((dx * nx + dy * ny + dz * nz) / dist))
+    elevation = np.where(defined & (dist > 0), elevation, np.nan)
+    return SatelliteGeometry(np.where(defined, np.round(azimuth, 1), np.nan),
+                             np.round(elevation, 1),
+                             values[sat_index])
@@ -0,0 +1,216 @@
+"""Link performance metrics for a modem serial port.
+
+`ModemMetrics` collects command latency histograms, bytes on the wire, echo
+and CRC overhead and error counts from an `AtCommandBuffer`. Queue wait times
+and depth are taken from the port's command scheduler. Metrics export as a
+dictionary or in the Prometheus text exposition format.
+
+Collection is disabled by default, costing one attribute check per event.
+
+"""
+import threading
+from bisect import bisect_left
+from typing import Any
+
+DEFAULT_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                           1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_MAX_COMMANDS = 64   # distinct commands with their own histogram
+OTHER_COMMANDS = 'other'
+PROMETHEUS_PREFIX = 'nimo_'
+
+COUNTERS = {   # name: help
+    'bytes_sent': 'Bytes written to the serial port.',
+    'bytes_received': 'Bytes read from the serial port.',
+    'echo_bytes': 'Command echo bytes received.',
+    'crc_bytes': 'CRC bytes sent and received.',
+    'undecodable_bytes': 'Non-ASCII bytes discarded.',
+}
+
+
+class Histogram:
+    """A cumulative-bucket histogram of observed values.
+    
+    Attributes:
+        buckets (tuple): The ascending upper bounds, excluding infinity.
+        counts (list): The observations per bucket, the last for infinity.
+        sum (float): The sum of observed values.
+        count (int): The number of observations.
+    
+    """
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+    
+    def __init__(self, buckets: 'tuple[float]' = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: 'list[int]' = [0] * (len(self.buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+    
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def cumulative(self) -> 'list[tuple[float, int]]':
+        """Get `(upper_bound, count)` pairs, ending with infinity."""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class ModemMetrics:
+    """A registry of performance metrics for one modem port.
+    
+    Attributes:
+        enabled (bool): Collect metrics. Disabled by default.
+        scheduler: The command scheduler reporting queue wait and depth.
+    
+    """
+    def __init__(self,
+                 scheduler=None,
+                 enabled: bool = False,
+                 buckets: 'tuple[float]' = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.enabled: bool = enabled
+        self.scheduler = scheduler
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: 'dict[str, int]' = dict.fromkeys(COUNTERS, 0)
+        self._errors: 'dict[str, int]' = {}
+        self._latency: 'dict[str, Histogram]' = {}
+    
+    def reset(self) -> None:
+        """Clears the metrics collected."""
+        with self._lock:
+            self._counters = dict.fromkeys(COUNTERS, 0)
+            self._errors.clear()
+            self._latency.clear()
+        if self.scheduler is not None:
+            self.scheduler.reset_stats()
+    
+    def add(self, name: str, value: int = 1) -> None:
+        """Increments a counter of `COUNTERS`."""
+        with self._lock:
+            self._counters[name] += value
+    
+    def record_command(self, command: str, latency: float, error: str) -> None:
+        """Records a completed command.
+        
+        Args:
+            command: The command key, without parameters.
+            latency: The time in seconds from sending to completion.
+            error: The `AtErrorCode` name of the result.
+        
+        """
+        with self._lock:
+            histogram = self._latency.get(command)
+            if histogram is None:
+                if len(self._latency) >= METRICS_MAX_COMMANDS:
+                    command = OTHER_COMMANDS
+                histogram = self._latency.setdefault(
+                    command, Histogram(self._buckets))
+            histogram.observe(latency)
+            self._errors[error] = self._errors.get(error, 0) + 1
+    
+    def to_dict(self) -> 'dict[str, Any]':
+        """Exports the metrics as a dictionary.
+        
+        Latency histograms have cumulative bucket counts keyed by upper bound.
+        
+        """
+        with self._lock:
+            metrics: 'dict[str, Any]' = dict(self._counters)
+            metrics['results'] = dict(self._errors)
+            metrics['latency'] = {
+                command: {
+                    'buckets': dict(h.cumulative()),
+                    'sum': h.sum,
+                    'count': h.count,
+                }
+                for command, h in self._latency.items()
+            }
+        if self.scheduler is not None:
+            metrics['queue_wait'] = {
+                priority.name: {
+                    'count': s.count,
+                    'sum': s.total,
+                    'max': s.max,
+                    'depth': s.waiting,
+                }
+                for priority, s in self.scheduler.stats().items()
+            }
+        return metrics
+    
+    def to_prometheus(self,
+                      labels: 'dict[str, str]|None' = None,
+                      prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Exports the metrics in the Prometheus text exposition format.
+        
+        Args:
+            labels: Labels added to every sample, e.g. `{'port': 'COM3'}`.
+            prefix: The metric name prefix.
+        
+        """
+        metrics = self.to_dict()
+        base = [f'{k}="{_escape(v)}"' for k, v in (labels or {}).items()]
+        
+        def sample(name: str, value, **extra) -> str:
+            pairs = base + [f'{k}="{_escape(v)}"' for k, v in extra.items()]
+            label_str = '{' + ','.join(pairs) + '}' if pairs else ''
+            return f'{prefix}{name}{label_str} {_number(value)}'
+        
+        lines = []
+        
+        def header(name: str, kind: str, text: str) -> None:
+            lines.append(f'# HELP {prefix}{name} {text}')
+            lines.append(f'# TYPE {prefix}{name} {kind}')
+        
+        for name, text in COUNTERS.items():
+            header(f'{name}_total', 'counter', text)
+            lines.append(sample(f'{name}_total', metrics[name]))
+        header('command_results_total', 'counter',
+               'Commands completed by result code.')
+        for error, count in metrics['results'].items():
+            lines.append(sample('command_results_total', count, result=error))
+        name = 'command_latency_seconds'
+        header(name, 'histogram', 'Time from sending a command to its result.')
+        for command, h in metrics['latency'].items():
+            for bound, count in h['buckets'].items():
+                lines.append(sample(f'{name}_bucket', count,
+                                    command=command, le=_number(bound)))
+            lines.append(sample(f'{name}_sum', h['sum'], command=command))
+            lines.append(sample(f'{name}_count', h['count'], command=command))
+        if 'queue_wait' in metrics:
+            name = 'queue_wait_seconds'
+            header(name, 'summary', 'Time commands waited for the port.')
+            for priority, s in metrics['queue_wait'].items():
+                lines.append(sample(f'{name}_sum', s['sum'],
+                                    priority=priority))
+                lines.append(sample(f'{name}_count', s['count'],
+                                    priority=priority))
+            header('queue_wait_max_seconds', 'gauge',
+                   'The longest time a command waited for the port.')
+            for priority, s in metrics['queue_wait'].items():
+                lines.append(sample('queue_wait_max_seconds', s['max'],
+                                    priority=priority))
+            header('queue_depth', 'gauge', 'Commands waiting for the port.')
+            for priority, s in metrics['queue_wait'].items():
+                lines.append(sample('queue_depth', s['depth'],
+                                    priority=priority))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: Any) -> str:
+    """Escapes a Prometheus label value."""
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _number(value: 'int|float') -> str:
+    """Formats a Prometheus sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -12,26 +12,30 @@ details including signal level.
 """
 import base64
 import logging
+import re
 import time
 from dataclasses import dataclass
-from enum import IntEnum
+from functools import wraps
+from typing import Callable, Generator
 
 from serial import Serial
 
-from .atcommandbuffer import DEFAULT_AT_TIMEOUT, AtCommandBuffer
+from .atcommandbuffer import AtCommandBuffer
+from .cache import ResponseCache
 from .constants import (
+    AT_BATCH_LINE_MAX,
+    AUTOBAUD_ORDER,
     BAUDRATES,
     MSG_MO_MAX_SIZE,
-    MSG_MO_NAME_MAX_LEN,
-    MSG_MO_NAME_QMAX_LEN,
+    MSG_MT_MAX_SIZE,
     AtErrorCode,
     BeamState,
+    CommandPriority,
     ControlState,
     DataFormat,
     GeoBeam,
     GnssMode,
-    GnssModeOrbcomm,
-    GnssModeQuectel,
+    Manufacturer,
     MessagePriority,
     MessageState,
     NetworkStatus,
@@ -43,6 +47,10 @@ from .constants import (
     WakeupWay,
     WorkMode,
 )
+from .coverage import BeamCoverageIndex
+from .dialect import Dialect, get_dialect
+from .gnss import LocationService
+from .hooks import CommandHooks
 from .location import (
     ModemLocation,
     SatelliteLocation,
@@ -50,20 +58,30 @@ from .location import (
     get_satellite_location,
 )
 from .message import MoMessage, MtMessage, NimoMessage
+from .metrics import ModemMetrics
 from .nimoutils import iso_to_ts, vlog
+from .scheduler import WaitStats
 
 VLOG_TAG = 'nimomodem'
+BATCH_SREG = re.compile(r'S\d+(\?|=\d+)', re.IGNORECASE)
+AUTOBAUD_TIMEOUT = 0.25   # seconds per probe for the modem to respond
+AUTOBAUD_PROBE_BYTES = 24   # AT command, echo, result code and optional CRC
+MT_PUMP_BATCH = 10   # MT messages fetched and held at a time
+MT_FETCH_RESPONSE_MAX = 4096   # response bytes expected per chained fetch
+CACHED_SETTINGS = {   # setting written by a command: cached query it changes
+    'S39': 'get_gnss_mode',
+    'S50': 'get_power_mode',
+    'S51': 'get_wakeup_period',
+    'S88': 'get_event_mask',
+    '+QGNSSMOD': 'get_gnss_mode',
+    '+QPMD': 'get_power_mode',
+    '+QWKUPCFG': 'get_wakeup_period',
+    '+QURCCTL': 'get_urc_ctl',
+}
 
 _log = logging.getLogger(__name__)
 
 
-class Manufacturer(IntEnum):
-    """Supported NIMO modem implementations."""
-    NONE = 0
-    ORBCOMM = 1
-    QUECTEL = 2
-
-
 @dataclass
 class AcquisitionInfo:
     """Details about the satellite acquisition state of the modem.
@@ -104,6 +122,54 @@ class ModemAtError(ModemError):
         return AtErrorCode[self.args[0]]
 
 
+def _operation(func: 'Callable|None' = None,
+               *,
+               priority: CommandPriority = CommandPriority.POLL) -> Callable:
+    """Decorates a `NimoModem` generator method as a public operation.
+    
+    Calling the method runs the generator using the instance `_run` so the
+    same command logic serves blocking and asynchronous modem classes.
+    
+    Args:
+        priority (CommandPriority): The scheduling class of the operation's
+            commands when concurrent callers are waiting for the modem.
+    
+    """
+    if func is None:
+        return lambda func: _operation(func, priority=priority)
+    
+    @wraps(func)
+    def wrapper(self: 'NimoModem', *args, **kwargs):
+        return self._run(func(self, *args, **kwargs), priority)
+    return wrapper
+
+
+@dataclass
+class _Uncached:
+    """A fallback result of a `_cached` query, returned but not cached."""
+    value: object
+
+
+def _cached(func: Callable) -> Callable:
+    """Decorates an operation query to use the `NimoModem` response cache.
+    
+    The cache key is the query method name. A query returns `_Uncached` for
+    a fallback value so the next call queries the modem again.
+    
+    """
+    @wraps(func)
+    def wrapper(self: 'NimoModem', *args, **kwargs):
+        hit, value = self._cache.get(func.__name__)
+        if hit:
+            return value
+        value = yield from func(self, *args, **kwargs)
+        if isinstance(value, _Uncached):
+            return value.value
+        self._cache.put(func.__name__, value)
+        return value
+    return wrapper
+
+
 class NimoModem:
     """A class for NIMO satellite IoT modem interaction."""
     # __slots__ = ('_modem', '_mobile_id',
@@ -136,15 +202,104 @@ class NimoModem:
         self._modem_booted: bool = False
         self._mobile_id: str = ''
         self._manufacturer: Manufacturer = Manufacturer.NONE
+        self._urc_callbacks: dict = {}
+        self._echo_off_size: int = 0
+        self._cache = ResponseCache()
+        self._coverage = BeamCoverageIndex()
+        self._location_service = LocationService(self)
     
     @property
     def is_ready(self) -> bool:
-        return not self._modem._lock.locked()
+        return not self._modem._scheduler.locked()
+    
+    @property
+    def queue_wait_stats(self) -> 'dict[CommandPriority, WaitStats]':
+        """Time commands waited for the modem, by `CommandPriority` class."""
+        return self._modem._scheduler.stats()
+    
+    @property
+    def response_cache(self) -> ResponseCache:
+        """The cache of slow-changing query results, disabled by default.
+        
+        Set `response_cache.enabled = True` to opt in. Entries expire after
+        the TTL configured per query in `response_cache.ttls`, and are
+        updated or cleared when written by this class, or on reset or reboot.
+        
+        """
+        return self._cache
+    
+    @property
+    def metrics(self) -> ModemMetrics:
+        """Link performance metrics, disabled by default.
+        
+        Set `metrics.enabled = True` to collect command latency, bytes on the
+        wire, echo and CRC overhead and error counts. Export with
+        `metrics.to_dict()` or `metrics.to_prometheus()`.
+        
+        """
+        return self._modem.metrics
+    
+    @property
+    def location_service(self) -> LocationService:
+        """The last GNSS fix and continuous location stream.
+        
+        While started, `get_location` is served from its cached fix.
+        
+        """
+        return self._location_service
+    
+    @property
+    def coverage(self) -> BeamCoverageIndex:
+        """The GeoBeam coverage learned from `get_satellite_info`.
+        
+        Assign an index to share it between modems or to use one restored
+        with `BeamCoverageIndex.from_dict`.
+        
+        """
+        return self._coverage
+    
+    @coverage.setter
+    def coverage(self, index: BeamCoverageIndex):
+        if not isinstance(index, BeamCoverageIndex):
+            raise ValueError('Invalid BeamCoverageIndex')
+        self._coverage = index
+    
+    def add_command_hooks(self, hooks: CommandHooks) -> None:
+        """Registers callbacks for command lifecycle events.
+        
+        See `pynimomodem.hooks` for the events and their timestamps.
+        
+        Args:
+            hooks (CommandHooks): An instance of a `CommandHooks` subclass.
+        
+        """
+        self._modem.add_command_hooks(hooks)
+    
+    def remove_command_hooks(self, hooks: CommandHooks) -> None:
+        """Removes previously registered command lifecycle callbacks."""
+        self._modem.remove_command_hooks(hooks)
     
     @property
     def crc_enabled(self) -> bool:
         return self._modem.crc
     
+    @property
+    def echo_off_size(self) -> int:
+        """Command length from which echo is turned off for the command.
+        
+        When echo is on, commands of at least this many characters (e.g. a
+        large `send_data`) are wrapped with `ATE0`/`ATE1` so the modem does
+        not echo the payload back over the serial link. 0 (default) disables.
+        
+        """
+        return self._echo_off_size
+    
+    @echo_off_size.setter
+    def echo_off_size(self, size: int):
+        if not isinstance(size, int) or size < 0:
+            raise ValueError('Invalid echo off size')
+        self._echo_off_size = size
+    
     @property
     def modem_booted(self) -> bool:
         return self._modem_booted
@@ -152,23 +307,49 @@ class NimoModem:
     @property
     def _mfr(self) -> Manufacturer:
         """Used internally to support different manufacturer commands."""
+        return NimoModem._run(self, self._get_mfr())
+    
+    def _get_mfr(self) -> Generator:
+        """Operation resolving the manufacturer on first use."""
         if not self._manufacturer:
-            self.get_manufacturer()
+            yield from self._nested(self.get_manufacturer)
             _log.debug('Using %s manufacturer commands', self._manufacturer)
         return self._manufacturer
     
+    @property
+    def _dialect(self) -> Dialect:
+        """Used internally for the manufacturer's commands and formats."""
+        return get_dialect(self._mfr)
+    
+    def _get_dialect(self) -> Generator:
+        """Operation resolving the manufacturer's dialect on first use."""
+        mfr = yield from self._get_mfr()
+        return get_dialect(mfr)
+    
+    def _get_command(self,
+                     operation: str,
+                     unsupported: type = ModemError) -> Generator:
+        """Operation resolving the dialect and command for an operation.
+        
+        Raises:
+            `unsupported` if the modem does not support the operation.
+        
+        """
+        dialect = yield from self._get_dialect()
+        command = dialect.commands.get(operation)
+        if command is None:
+            raise unsupported('Operation not supported by this modem')
+        return dialect, command
+    
     @property
     def _mo_msg_name_len_max(self) -> int:
         """Used internally to restrict the length of the MO message name."""
-        maxlen = MSG_MO_NAME_MAX_LEN
-        if self._mfr == Manufacturer.QUECTEL:
-            maxlen = MSG_MO_NAME_QMAX_LEN
-        return maxlen
+        return self._dialect.mo_name_max_len
     
     def _at_command_response(self,
                              command: str,
                              prefix: str = '',
-                             timeout: int = DEFAULT_AT_TIMEOUT) -> str:
+                             timeout: 'float|None' = None) -> str:
         """Send a command and return the response.
         
         Blocks until response has been received.
@@ -176,7 +357,67 @@ class NimoModem:
         Args:
             command (str): The AT command to send.
             prefix (str): Optional prefix to remove from response.
-            timeout (int): Maximum time in seconds to wait for response.
+            timeout (float): Maximum time in seconds to wait for response.
+                If `None` it is derived from the command, expected response
+                size, baud rate and learned latency.
+        
+        Raises:
+            `ModemTimeout` if no response is received.
+            `ModemCrcConfig` if CRC is not used on both request/response.
+            `ModemAtError` for other cases of errored response.
+        
+        """
+        return NimoModem._run(self, self._command(command, prefix, timeout))
+    
+    def _run(self,
+             operation: Generator,
+             priority: CommandPriority = CommandPriority.POLL):
+        """Run an operation to completion, blocking on each command.
+        
+        Operations are generators that yield `(command, prefix, timeout)`
+        requests and are sent back `(AtErrorCode, response)` for each,
+        keeping the command/response logic independent of the I/O model.
+        Subclasses may override to drive operations differently.
+        
+        Args:
+            operation (Generator): The operation to run.
+            priority (CommandPriority): The scheduling class of its commands.
+        
+        Returns:
+            The operation's return value.
+        
+        """
+        result = None
+        while True:
+            try:
+                command, prefix, timeout = operation.send(result)
+            except StopIteration as stop:
+                return stop.value
+            self._modem.send_at_command(command, priority)
+            err = self._modem.read_at_response(prefix, timeout)
+            result = (err, self._modem.get_response())
+    
+    def _nested(self, method: Callable, *args, **kwargs) -> Generator:
+        """Get the operation of a public method, to use within an operation.
+        
+        Args:
+            method (Callable): The bound method decorated as an operation.
+        
+        """
+        return method.__wrapped__(self, *args, **kwargs)
+    
+    def _command(self,
+                 command: str,
+                 prefix: str = '',
+                 timeout: 'float|None' = None) -> Generator:
+        """Operation to send a command and return the response.
+        
+        Args:
+            command (str): The AT command to send.
+            prefix (str): Optional prefix to remove from response.
+            timeout (float): Maximum time in seconds to wait for response.
+                If `None` it is derived from the command, expected response
+                size, baud rate and learned latency.
         
         Raises:
             `ModemTimeout` if no response is received.
@@ -184,23 +425,49 @@ class NimoModem:
             `ModemAtError` for other cases of errored response.
         
         """
-        self._modem.send_at_command(command)
-        err = self._modem.read_at_response(prefix, timeout)
+        if (self._echo_off_size and self._modem.echo and
+            len(command) >= self._echo_off_size):
+            response = yield from self._echo_off_command(command, prefix,
+                                                         timeout)
+            return response
+        err, response = yield (command, prefix, timeout)
         if err == AtErrorCode.OK:
-            return self._modem.get_response()
+            return response
         elif err == AtErrorCode.TIMEOUT:
-            raise ModemTimeout(f'AT response timed out after {timeout} seconds')
+            raise ModemTimeout('AT response timed out{}'.format(
+                               f' after {timeout} seconds' if timeout else ''))
         elif err == AtErrorCode.CRC_CONFIG_MISMATCH:
             raise ModemCrcConfig('Reponse checksum {}expected'.format(
                                  '' if self.crc_enabled else 'un'))
         elif err == AtErrorCode.INVALID_RESPONSE_CRC:
             raise ModemCrc(err.name)
+        elif err == AtErrorCode.INVALID_RESPONSE:
+            raise ModemAtError(err.name)
         else:
-            err = self.get_last_error_code()
+            err = yield from self._nested(self.get_last_error_code)
             if err == AtErrorCode.INVALID_CRC:
                 raise ModemCrc(err.name)
             raise ModemAtError(err.name)
     
+    def _echo_off_command(self,
+                          command: str,
+                          prefix: str = '',
+                          timeout: 'float|None' = None) -> Generator:
+        """Operation to send a command with echo off, then restore echo."""
+        yield from self._set_echo(False)
+        try:
+            response = yield from self._command(command, prefix, timeout)
+        except ModemError:
+            yield from self._set_echo(True)
+            raise
+        yield from self._set_echo(True)
+        return response
+    
+    def _set_echo(self, enable: bool) -> Generator:
+        """Operation to set the modem echo and the parser to match."""
+        yield from self._command(f'ATE{int(enable)}')
+        self._modem.echo = enable
+    
     def connect(self) -> None:
         """Attach to the modem via serial communications.
         
@@ -219,13 +486,18 @@ class NimoModem:
         """
         self._is_connected = False
         self._modem_booted = False
+        if self._location_service.running:
+            self._location_service.stop(disable=False)
+        self._modem.stop_reader()
         if self._serial.is_open:
             self._serial.close()
     
+    @_operation(priority=CommandPriority.CONTROL)
     def is_connected(self) -> bool:
         """Indicates if the modem is responding to a basic AT query."""
         try:
-            self._at_command_response('AT')
+            yield from self._command('AT')
+            self._baudrate = self._modem.serial.baudrate
             self._is_connected = True
             self._modem_booted = True
             return True
@@ -241,18 +513,63 @@ class NimoModem:
     
     @baudrate.setter
     def baudrate(self, baudrate: int):
+        """Set the baud rate of the modem and adjust the serial rate."""
+        self.set_baudrate(baudrate)
+    
+    @_operation(priority=CommandPriority.CONTROL)
+    def set_baudrate(self, baudrate: int) -> None:
         """Set the baud rate of the modem and adjust the serial rate."""
         if baudrate not in [9600, 115200]:
             raise ValueError('Invalid baudrate')
-        self._at_command_response(f'AT+IPR={baudrate}')
+        yield from self._command(f'AT+IPR={baudrate}')
         self._modem.serial.baudrate = baudrate
+        self._baudrate = baudrate
     
-    def retry_baudrate(self) -> bool:
-        """"""
-        for baud in BAUDRATES:
-            self._modem.serial.baudrate = baud
-            if self.is_connected():
+    @_operation(priority=CommandPriority.CONTROL)
+    def retry_baudrate(self, probe_timeout: float = AUTOBAUD_TIMEOUT) -> bool:
+        """Finds the baud rate the modem is using.
+        
+        Probes start with the last rate the modem responded on, then the most
+        likely rates. Each waits only for the transfer time at its rate plus
+        `probe_timeout`, and non-ASCII data received indicates the wrong rate
+        without waiting further.
+        
+        Args:
+            probe_timeout (float): Time in seconds allowed per probe for the
+                modem to start responding.
+        
+        Returns:
+            True if the modem responded at one of the supported `BAUDRATES`.
+        
+        """
+        serial = self._modem.serial
+        rates = dict.fromkeys([self._baudrate, serial.baudrate] +
+                              AUTOBAUD_ORDER)
+        abort_on_garbage = self._modem.abort_on_garbage
+        self._modem.abort_on_garbage = True
+        try:
+            for baud in rates:
+                if baud not in BAUDRATES:
+                    continue
+                serial.baudrate = baud
+                timeout = probe_timeout + AUTOBAUD_PROBE_BYTES * 10 / baud
+                try:
+                    yield from self._command('AT', timeout=timeout)
+                except ModemAtError as exc:
+                    if exc.error_code == AtErrorCode.INVALID_RESPONSE:
+                        continue
+                    # an error result still shows the baud rate is correct
+                except ModemError:
+                    continue
+                _log.debug('Modem responded at %d baud', baud)
+                self._baudrate = baud
+                self._is_connected = True
+                self._modem_booted = True
                 return True
+        finally:
+            self._modem.abort_on_garbage = abort_on_garbage
+        self._is_connected = False
+        self._modem_booted = False
         return False
     
     def await_boot(self, boot_timeout: int = 10) -> bool:
@@ -269,41 +586,205 @@ class NimoModem:
         """
         boot_strings = ['ST Version', 'RDY']
         _log.debug('Awaiting modem boot string for %d seconds...', boot_timeout)
+        if (self._modem.get_unsolicited(tuple(boot_strings)) or
+            self._modem.reader_running and self._modem.get_unsolicited(
+                tuple(boot_strings), boot_timeout)):
+            self._modem_booted = True
+            self._cache.clear()
+            _log.debug('Found boot string')
+            return self._modem_booted
         rx_data = ''
-        started = time.time()
-        while time.time() - started < boot_timeout and not self._modem_booted:
+        deadline = time.monotonic() + boot_timeout
+        while not self._modem_booted:
             while self._modem.is_data_waiting():
                 rx_data += self._modem.read_rx_buffer()
             if rx_data and any(b in rx_data for b in boot_strings):
                 self._modem_booted = True
+                self._cache.clear()
                 _log.debug('Found boot string - clearing Rx buffer')
                 while self._modem.is_data_waiting():
                     rx_data += self._modem.read_rx_buffer()
                 break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._modem.wait_for_data(remaining):
+                break
         return self._modem_booted
     
+    @_operation(priority=CommandPriority.CONTROL)
     def get_last_error_code(self) -> AtErrorCode:
         """Get the last error code from the modem."""
-        return AtErrorCode(int(self._at_command_response('ATS80?')))
-    
+        response = yield from self._command('ATS80?')
+        return AtErrorCode(int(response))
+    
+    @_operation
+    def batch_commands(self,
+                       commands: 'list[str|tuple[str, str]]',
+                       timeout: 'float|None' = None,
+                       ) -> 'list[str]':
+        """Send several commands using the fewest AT command lines.
+        
+        Commands are chained as the modem accepts, with S-registers separated
+        by spaces (ORBCOMM) and extended commands separated by `;`. Responses
+        are split back out by prefix, or by position for S-register queries.
+        Commands with other unprefixed responses (e.g. `ATI`) are sent alone.
+        
+        Args:
+            commands (list): AT commands with or without the leading `AT`, or
+                (command, prefix) tuples where the response prefix differs
+                from the command name.
+            timeout (float): Optional time in seconds to wait for each line.
+        
+        Returns:
+            The responses in the order of `commands`, as each would have been
+            returned individually. Setters without a response return `''`.
+        
+        Raises:
+            `ModemAtError` if a chained line errors, in which case commands
+                preceding the error on the line may have been applied.
+        
+        """
+        dialect = yield from self._get_dialect()
+        responses = []
+        for batch in self._batch_lines(dialect, [self._batch_item(c)
+                                                 for c in commands]):
+            cmd = 'AT' + ''.join(sep + body for sep, body, _, _ in batch)
+            try:
+                response = yield from self._command(cmd, timeout=timeout)
+            finally:
+                for _, body, _, _ in batch:
+                    self._setting_written(body)
+            responses.extend(self._split_batch_response(batch, response))
+        return responses
+    
+    def _setting_written(self, body: str) -> None:
+        """Invalidates cached queries for a command (without `AT`) sent."""
+        if body.upper() in ('Z', '&F'):
+            self._cache.clear()
+        elif '=' in body:
+            key = CACHED_SETTINGS.get(body.split('=', 1)[0].upper())
+            if key:
+                self._cache.invalidate(key)
+    
+    @staticmethod
+    def _batch_item(command: 'str|tuple[str, str]',
+                    ) -> 'tuple[str, str|None, bool]':
+        """Get (body, prefix, is_sreg) for a command to be batched.
+        
+        The prefix is `None` for basic commands that cannot be chained.
+        
+        """
+        prefix = None
+        if isinstance(command, tuple):
+            command, prefix = command
+        body = command[2:] if command[:2].upper() == 'AT' else command
+        is_sreg = BATCH_SREG.fullmatch(body) is not None
+        if is_sreg:
+            prefix = ''
+        elif prefix is None and body[:1] in ('+', '%'):
+            prefix = re.split(r'[=?]', body, maxsplit=1)[0] + ':'
+        return (body, prefix, is_sreg)
+    
+    @staticmethod
+    def _batch_lines(dialect: Dialect,
+                     items: 'list[tuple[str, str|None, bool]]',
+                     ) -> 'list[list[tuple[str, str, str|None, bool]]]':
+        """Group batch items into command lines with separators."""
+        sreg_sep = dialect.sreg_separator
+        lines = []
+        line = []
+        length = len('AT')
+        for body, prefix, is_sreg in items:
+            if line and prefix is not None:
+                sep = sreg_sep if is_sreg and line[-1][3] else ';'
+                if length + len(sep) + len(body) <= AT_BATCH_LINE_MAX:
+                    line.append((sep, body, prefix, is_sreg))
+                    length += len(sep) + len(body)
+                    continue
+            if line:
+                lines.append(line)
+            line = [('', body, prefix, is_sreg)]
+            length = len('AT') + len(body)
+            if prefix is None:
+                lines.append(line)
+                line = []
+        if line:
+            lines.append(line)
+        return lines
+    
+    @staticmethod
+    def _split_batch_response(batch: 'list[tuple[str, str, str|None, bool]]',
+                              response: str,
+                              ) -> 'list[str]':
+        """Split the response to a chained command line per command."""
+        if len(batch) == 1:
+            prefix = batch[0][2]
+            if prefix:
+                response = response.replace(prefix, '', 1).strip()
+            return [response]
+        lines = response.split('\n') if response else []
+        responses = []
+        index = 0
+        for i, (_, body, prefix, is_sreg) in enumerate(batch):
+            if is_sreg:
+                if body.endswith('?') and index < len(lines):
+                    responses.append(lines[index])
+                    index += 1
+                else:
+                    responses.append('')
+                continue
+            # lines still needed by following S-register queries
+            reserved = sum(1 for _, b, _, s in batch[i + 1:]
+                           if s and b.endswith('?'))
+            later_prefixes = tuple(p for _, _, p, _ in batch[i + 1:] if p)
+            taken = []
+            if index < len(lines) and lines[index].startswith(prefix):
+                taken.append(lines[index])
+                index += 1
+                while (len(lines) - index > reserved and
+                       not (later_prefixes and
+                            lines[index].startswith(later_prefixes))):
+                    taken.append(lines[index])
+                    index += 1
+            responses.append('\n'.join(taken).replace(prefix, '', 1).strip())
+        if index < len(lines):
+            _log.warning('Unassigned batch response lines: %s', lines[index:])
+        return responses
+    
+    @_operation(priority=CommandPriority.CONTROL)
     def initialize(self,
                    echo: bool = True,
                    verbose: bool = True,
                    ) -> bool:
-        """Initialize the modem AT configuration for Echo and Verbose."""
+        """Initialize the modem AT configuration for Echo and Verbose.
+        
+        The default `E1 V1` is easiest to follow on a serial trace. For a
+        slow serial link `echo=False` avoids the modem sending every command
+        back, which for a large `send_data` doubles the bytes on the link,
+        and `verbose=False` shortens result codes. Both are parsed natively.
+        See also `echo_off_size` to turn echo off only for large commands.
+        
+        Args:
+            echo (bool): Echo commands (`E1`) or not (`E0`).
+            verbose (bool): Verbose (`V1`) or numeric (`V0`) result codes.
+        
+        """
         at_command = (f'ATZ;E{int(echo)};V{int(verbose)}')
+        # the command line is echoed as received, its result code as set
+        self._modem.verbose = verbose
         try:
-            self._at_command_response(at_command)
-            return True
+            yield from self._command(at_command)
         except ModemCrcConfig:
             _log.info('Attempting re-initialize with CRC enabled')
-            self._at_command_response(at_command)
-            return True
+            yield from self._command(at_command)
+        self._modem.echo = echo
+        self._cache.clear()
+        return True
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_crc(self, enable: bool = False) -> bool:
         """Enable or disable CRC error checking on the modem serial port."""
         try:
-            self._at_command_response(f'AT%CRC={int(enable)}')
+            yield from self._command(f'AT%CRC={int(enable)}')
             return True
         except ModemCrcConfig:
             if ((self._modem.crc and enable) or
@@ -311,19 +792,23 @@ class NimoModem:
                 return True
             return False
     
+    @_operation(priority=CommandPriority.CONTROL)
     def reset_factory_config(self) -> None:
         """Reset the modem's factory default configuration."""
-        self._at_command_response('AT&F')
+        yield from self._command('AT&F')
+        self._cache.clear()
     
+    @_operation(priority=CommandPriority.CONTROL)
     def save_config(self) -> None:
         """Store the current configuration to modem non-volatile memory."""
-        self._at_command_response('AT&W')
+        yield from self._command('AT&W')
     
+    @_operation
     def get_mobile_id(self) -> str:
         """Get the modem's globally unique identifier."""
         if not self._mobile_id:
             try:
-                self._mobile_id = self._at_command_response('AT+GSN', '+GSN:')
+                self._mobile_id = yield from self._command('AT+GSN', '+GSN:')
                 if vlog(VLOG_TAG):
                     _log.debug('Cached Mobile ID %s', self._mobile_id)
             except ModemError:
@@ -333,13 +818,19 @@ class NimoModem:
     
     @property
     def _is_simulator(self) -> bool:
-        return self.get_mobile_id().startswith('00000000')
+        return NimoModem._run(self, self._simulated())
+    
+    def _simulated(self) -> Generator:
+        """Operation indicating if the modem is the Orbcomm simulator."""
+        mobile_id = yield from self._nested(self.get_mobile_id)
+        return mobile_id.startswith('00000000')
     
+    @_operation
     def get_manufacturer(self) -> str:
         """Get the manufacturer name."""
         if not self._manufacturer:
             try:
-                mfr = self._at_command_response('ATI')
+                mfr = yield from self._command('ATI')
                 if 'quectel' in mfr.lower():
                     self._manufacturer = Manufacturer.QUECTEL
                 else:
@@ -355,90 +846,100 @@ class NimoModem:
                 raise
         return self._manufacturer.name
     
+    @_operation
+    @_cached
     def get_model(self) -> str:
         """Get the manufacturer model name."""
-        cmd = 'ATI4'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'ATI'
+        dialect, command = yield from self._get_command('get_model')
         try:
-            response = self._at_command_response(cmd)
+            response = yield from self._command(command.template)
             if response:
-                if self._mfr == Manufacturer.QUECTEL:
-                    response = response.split('\n')[1]
+                response = dialect.parse('get_model', response)
             return response
         except ModemError:
-            return ''
+            return _Uncached('')
     
+    @_operation
+    @_cached
     def get_firmware_version(self) -> str:
         """Get the modem's firmware version."""
         # TODO: Firmware structure with hardware, firmware, software?
-        return self._at_command_response('AT+GMR', '+GMR:')
+        firmware_version = yield from self._command('AT+GMR', '+GMR:')
+        return firmware_version
     
+    @_operation
     def get_system_time(self) -> int:
         """Get the system/GNSS time from the modem."""
         try:
-            nimo_time = self._at_command_response('AT%UTC', '%UTC:')
+            nimo_time = yield from self._command('AT%UTC', '%UTC:')
             iso_time = nimo_time.replace(' ', 'T') + 'Z'
             return iso_to_ts(iso_time)
         except ModemError:
             return 0
     
+    @_operation
     def get_temperature(self) -> 'int|None':
         """Get the processor temperature in Celsius."""
         try:
-            return int(int(self._at_command_response('ATS85?')) / 10)
+            temperature = yield from self._command('ATS85?')
+            return int(int(temperature) / 10)
         except ValueError:
             return None
     
+    @_operation
     def is_transmit_allowed(self) -> bool:
         """Indicates if the modem is able to transmit data."""
-        return self.get_network_status() == 5
+        network_status = yield from self._nested(self.get_network_status)
+        return network_status == 5
     
+    @_operation
     def is_blocked(self) -> bool:
         """Indicates if line-of-sight to the satellite is blocked."""
-        return self.get_network_status() == 8
+        network_status = yield from self._nested(self.get_network_status)
+        return network_status == 8
     
+    @_operation
     def is_muted(self) -> bool:
         """Indicates if the modem has been muted (disallowed to transmit data).
         """
-        return self.get_network_status() == 7
+        network_status = yield from self._nested(self.get_network_status)
+        return network_status == 7
     
+    @_operation
     def is_updating_network(self) -> bool:
         """Indicates if the modem is updating network information.
         
         The modem should not be powered down during a network update.
         
         """
-        return self.get_network_status() == 4
+        network_status = yield from self._nested(self.get_network_status)
+        return network_status == 4
     
+    @_operation
     def get_network_status(self) -> NetworkStatus:
         """Get the current satellite acquisition status."""
-        cmd = 'ATS54?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QREG?'
-            prefix = '+QREG:'
-        return NetworkStatus(int(self._at_command_response(cmd, prefix)))
+        _, command = yield from self._get_command('get_network_status')
+        response = yield from self._command(*command)
+        return NetworkStatus(int(response))
     
+    @_operation
     def get_rssi(self) -> float:
         """Get the current Received Signal Strength Indicator.
         
         Also referred to as SNR or C/N0 (dB-Hz)
         
         """
-        cmd = 'ATS90=3 S91=1 S92=1 S116?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QSCN'
-            prefix = '+QSCN:'
+        _, command = yield from self._get_command('get_rssi')
+        response = yield from self._command(*command)
         try:
-            return int(self._at_command_response(cmd, prefix)) / 100
+            return int(response) / 100
         except ValueError:
             return 0
     
+    @_operation
     def get_signal_quality(self) -> SignalQuality:
         """Get a qualitative indicator from 0..5 of the satellite signal."""
-        snr = self.get_rssi()
+        snr = yield from self._nested(self.get_rssi)
         if snr >= SignalLevelRegional.INVALID.value:
             return SignalQuality.WARNING
         if snr >= SignalLevelRegional.BARS_5.value:
@@ -453,6 +954,7 @@ class NimoModem:
             return SignalQuality.WEAK
         return SignalQuality.NONE
     
+    @_operation
     def get_acquisition_detail(self) -> AcquisitionInfo:
         """Get the detailed satellite acquisition status.
         
@@ -460,31 +962,12 @@ class NimoModem:
         indicators.
         
         """
-        cmd = 'ATS90=3 S91=1 S92=1 S122? S123? S116? S101?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QEVNT=3,1'
-            prefix = '+QEVNT:'
-        result_str = self._at_command_response(cmd, prefix, timeout=10)
-        if self._mfr == Manufacturer.ORBCOMM:
-            results = [int(x) for x in result_str.split('\n')]
-            ctrl_state = ControlState(results[0])
-            beam_state = BeamState(results[1])
-            rssi = float(results[2]) / 100
-            vcid = results[3]
-        elif self._mfr == Manufacturer.QUECTEL:
-            # Workaround Quectel 20230731 documentation error says +QEVNT:
-            result_str = result_str.replace('+QEVENT:', '').strip()
-            results = [int(x) for x in result_str.split(',')]
-            # <dataCount>,<signedBitmask>,<MTID>,<timestamp>,
-            #   <class>,<subclass>,<priority>,<data0>,...
-            data0 = 7   # list index where trace data starts
-            ctrl_state = ControlState(results[data0+22])
-            beam_state = BeamState(results[data0+23])
-            rssi = float(results[data0+16]) / 100
-            vcid = results[data0+1]
-        return AcquisitionInfo(ctrl_state, beam_state, rssi, vcid)
+        operation = 'get_acquisition_detail'
+        dialect, command = yield from self._get_command(operation)
+        result_str = yield from self._command(*command, timeout=10)
+        return AcquisitionInfo(*dialect.parse(operation, result_str))
     
+    @_operation(priority=CommandPriority.SEND)
     def send_data(self, data: bytes, **kwargs) -> 'str|MoMessage':
         """Submits data to send as a mobile-originated message.
         
@@ -513,6 +996,7 @@ class NimoModem:
             `ValueError` for various parameter limit violations.
         
         """
+        dialect, command = yield from self._get_command('send_data')
         data_size = len(data)
         msg_payload_sin_min = b''
         message_name = kwargs.get('message_name', '')
@@ -528,7 +1012,7 @@ class NimoModem:
             msg_payload_sin_min += codec_min.to_bytes(1, 'big')
         if not 2 <= data_size <= MSG_MO_MAX_SIZE:
             raise ValueError('Invalid mobile-originated message size')
-        if message_name and len(message_name) > self._mo_msg_name_len_max:
+        if message_name and len(message_name) > dialect.mo_name_max_len:
             raise ValueError('Message name too long')
         data_index = 0
         if codec_sin <= -1:
@@ -543,7 +1027,7 @@ class NimoModem:
             data_size -= 1
         if codec_min > 255:
             raise ValueError('Invalid second payload byte MIN must be 0..255')
-        max_name_len = self._mo_msg_name_len_max
+        max_name_len = dialect.mo_name_max_len
         if message_name and len(message_name) > max_name_len:
             raise ValueError(f'Invalid message name longer than {max_name_len}')
         if len(message_name) == 0:
@@ -552,19 +1036,16 @@ class NimoModem:
         #   no effect on OTA size, modem always decodes and sends raw bytes OTA
         data_format = DataFormat.BASE64
         formatted_data = base64.b64encode(data[data_index:]).decode('utf-8')
-        cmd = 'AT%MGRT='
-        codec_sep = '.'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QSMGT='
-            codec_sep = ','
-        cmd = (f'{cmd}"{message_name}",{priority},{codec_sin}{codec_sep}'
-               f'{codec_min},{data_format},{formatted_data}')
-        self._at_command_response(cmd)
+        codec_sep = dialect.codec_separator
+        cmd = (f'{command.template}"{message_name}",{priority},{codec_sin}'
+               f'{codec_sep}{codec_min},{data_format},{formatted_data}')
+        yield from self._command(cmd)
         if kwargs.get('return_message', False) is True:
             return MoMessage(message_name, priority, MessageState.TX_READY,
                                 payload=(msg_payload_sin_min + data))
         return message_name
     
+    @_operation(priority=CommandPriority.SEND)
     def send_text(self, text: str, **kwargs) -> 'str|MoMessage':
         """Submits a text string to send as data.
         
@@ -588,8 +1069,10 @@ class NimoModem:
         data += text.encode()
         flowthru = ['message_name', 'priority', 'return_message']
         next_kwargs = { k:v for k, v in kwargs if k in flowthru }
-        return self.send_data(data, **next_kwargs)
+        message = yield from self._nested(self.send_data, data, **next_kwargs)
+        return message
     
+    @_operation(priority=CommandPriority.CONTROL)
     def cancel_mo_message(self, message_name: str) -> bool:
         """Attempts to cancel a previously submitted mobile-originated message.
         
@@ -597,22 +1080,21 @@ class NimoModem:
             message_name (str): The mobile-originated message handle to delete.
         
         """
+        _, command = yield from self._get_command('cancel_mo_message')
         _log.debug('Attempting to cancel MO message %s', message_name)
-        cmd = 'AT%MGRC'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QSMGC'
-        cmd += f'="{message_name}"'
-        self._at_command_response(cmd)
-        message_states = self.get_mo_message_states(message_name)
+        yield from self._command(command.format(message_name))
+        message_states = yield from self._nested(self.get_mo_message_states,
+                                                 message_name)
         if len(message_states) > 0:
             state = message_states[0].state
             if state == MessageState.TX_CANCELLED:
                 return True
-        elif self._is_simulator:
+        elif (yield from self._simulated()):
             return True
         _log.warn('Failed to cancel message %s', message_name)
         return False
     
+    @_operation
     def get_mo_message_states(self, message_name: str = '') -> 'list[MoMessage]':
         """Get a list of mobile-originated message states in the modem Tx queue.
         
@@ -623,82 +1105,50 @@ class NimoModem:
             A list of `MoMessage` objects including state and metadata.
         
         """
-        cmd = 'AT%MGRS'
-        prefix = '%MGRS:'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QSMGS'
-            prefix = '+QSMGS:'
-        if message_name and not self._is_simulator:
+        dialect, command = yield from self._get_command('get_mo_message_states')
+        cmd, prefix = command
+        if message_name and not (yield from self._simulated()):
             # Orbcomm Modem Simulator returns ERROR for %MGRS= command
             cmd += f'="{message_name}"'
-        response_str = self._at_command_response(cmd, prefix)
-        return self._parse_message_states(response_str, is_mo=True)
+        response_str = yield from self._command(cmd, prefix)
+        return self._parse_message_states(response_str, dialect, is_mo=True)
     
     def _parse_message_states(self,
                               response_str: str,
+                              dialect: Dialect,
                               is_mo: bool,
                               ) -> 'list[NimoMessage]':
-        """Parses textual metadata to build a SatelliteMessageState."""
+        """Parses textual metadata to build a SatelliteMessageState.
+        
+        The `dialect` is resolved by the calling operation.
+        
+        """
         mo_states = []
         if not response_str:
             return mo_states
         if vlog(VLOG_TAG):
             _log.debug('Parsing %s message states from %s',
                        'MO' if is_mo else 'MT', response_str)
-        states_meta = [m for m in response_str.split('\n') if m != '']
-        for meta in states_meta:
-            message = MoMessage() if is_mo else MtMessage()
-            for field_idx, field_data in enumerate(meta.split(',')):
-                self._update_message_state(message, field_idx,
-                                           field_data, is_mo)
+        layout = dialect.message_state_layout
+        message_class = MoMessage if is_mo else MtMessage
+        for meta in response_str.split('\n'):
+            if not meta:
+                continue
+            message = message_class()
+            fields = meta.split(',')
+            for field, field_data in zip(layout, fields):
+                if field is not None:
+                    setattr(message, field[0], field[1](field_data))
+            if len(fields) > len(layout):
+                _log.warning('Unhandled fields %s (%s) for manufacturer %s',
+                             fields[len(layout):], 'MO' if is_mo else 'MT',
+                             dialect.manufacturer.name)
+            if vlog(VLOG_TAG):
+                _log.debug('Parsed message state: %s', message)
             mo_states.append(message)
         return mo_states
     
-    def _update_message_state(self,
-                              message_state: NimoMessage,
-                              field_idx: int,
-                              field_data: str,
-                              is_mo: bool) -> None:
-        """Parse textual metadata to update a message's state."""
-        if vlog(VLOG_TAG):
-            _log.debug('Parsing %s message state index %d: %s',
-                       'MO' if is_mo else 'MT', field_idx, field_data)
-        mfr = self._mfr
-        if field_idx == 0:
-            message_state.name = field_data.replace('"', '')
-            if vlog(VLOG_TAG):
-                _log.debug('Message name: %s', message_state.name)
-        elif field_idx == 1 and mfr == Manufacturer.ORBCOMM:
-            if vlog(VLOG_TAG):
-                _log.debug('Ignoring msgNum %s', field_data)
-        elif ((field_idx == 2 and mfr == Manufacturer.ORBCOMM) or
-              (field_idx == 1 and mfr == Manufacturer.QUECTEL)):
-            message_state.priority = MessagePriority(int(field_data))
-            if vlog(VLOG_TAG):
-                _log.debug('Message priority %s', message_state.priority.name)
-        elif ((field_idx == 3 and mfr == Manufacturer.ORBCOMM) or
-              (field_idx == 2 and mfr == Manufacturer.QUECTEL)):
-            if vlog(VLOG_TAG):
-                _log.debug('Ignoring codec SIN %s', field_data)
-        elif ((field_idx == 4 and mfr == Manufacturer.ORBCOMM) or
-              (field_idx == 3 and mfr == Manufacturer.QUECTEL)):
-            message_state.state = MessageState(int(field_data))
-            if vlog(VLOG_TAG):
-                _log.debug('Message state: %s', message_state.state.name)
-        elif ((field_idx == 5 and mfr == Manufacturer.ORBCOMM) or
-              (field_idx == 4 and mfr == Manufacturer.QUECTEL)):
-            message_state.length = int(field_data)
-            if vlog(VLOG_TAG):
-                _log.debug('Message size: %d bytes', message_state.length)
-        elif ((field_idx == 6 and mfr == Manufacturer.ORBCOMM) or
-              (field_idx == 5 and mfr == Manufacturer.QUECTEL)):
-            message_state.bytes_delivered = int(field_data)
-            if vlog(VLOG_TAG):
-                _log.debug('Bytes delivered: %d', message_state.bytes_delivered)
-        else:
-            _log.warning('Unhandled field index %d (%s) for manufacturer %s',
-                         field_idx, 'MO' if is_mo else 'MT', mfr.name)
-    
+    @_operation
     def get_mt_message_states(self, message_name: str = '') -> 'list[MtMessage]':
         """Get a list of mobile-terminated message states in the modem Tx queue.
         
@@ -709,142 +1159,298 @@ class NimoModem:
             A list of `MtMessage` objects including state and metadata.
         
         """
-        cmd = 'AT%MGFN' if not message_name else 'AT%MGFS'
-        prefix = '%MGFN:' if not message_name else 'AT%MGFS:'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QRMGN' if not message_name else 'AT+QRMGS'
-            prefix = '+QRMGN:' if not message_name else '+QRMGS:'
-        if message_name and not self._is_simulator:
+        operation = ('get_mt_message_state' if message_name
+                     else 'get_mt_message_states')
+        dialect, command = yield from self._get_command(operation)
+        cmd, prefix = command
+        if message_name and not (yield from self._simulated()):
             cmd += f'="{message_name}"'
-        response_str = self._at_command_response(cmd, prefix)
-        return self._parse_message_states(response_str, is_mo=False)
+        response_str = yield from self._command(cmd, prefix)
+        return self._parse_message_states(response_str, dialect, is_mo=False)
     
+    @_operation(priority=CommandPriority.SEND)
     def get_mt_message(self, message_name: str) -> 'MtMessage|None':
         """Get a mobile-terminated message from the modem's Rx queue by name."""
-        cmd = 'AT%MGFG'
-        prefix = '%MGFG:'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+GRMGR'
-            prefix = '+GRMGR:'
+        dialect, command = yield from self._get_command('get_mt_message')
+        prefix = command.prefix
         data_format = DataFormat.BASE64
-        cmd += f'="{message_name}",{data_format}'
-        response = self._at_command_response(cmd, prefix)
+        cmd = f'{command.template}="{message_name}",{data_format}'
+        # allow for the largest message since its size is not known yet
+        max_size = len(prefix) + 64 + 4 * -(-MSG_MT_MAX_SIZE // 3)
+        timeout = self._modem.response_timeout(cmd, max_size)
+        response = yield from self._command(cmd, prefix, timeout)
         if response:
-            return self._parse_mt_message(response)
+            return self._parse_mt_message(response, dialect)
         return None
     
-    def _parse_mt_message(self, meta: str) -> MtMessage:
+    def _parse_mt_message(self, meta: str, dialect: Dialect) -> MtMessage:
         """Parse textual metadata to build a MtMessage."""
         if vlog(VLOG_TAG):
             _log.debug('Parsing MT message from meta: %s', meta)
-        data_includes_sin = False
-        mfr = self._mfr
+        fields = dict(zip(dialect.mt_message_fields, meta.split(',')))
         message = MtMessage()
-        for field_idx, field_data in enumerate(meta.split(',')):
-            if field_idx == 0:
-                message.name = field_data.replace('"', '')
-                if vlog(VLOG_TAG):
-                    _log.debug('Message name: %s', message.name)
-            elif (field_idx == 1 and mfr == Manufacturer.ORBCOMM):
-                if vlog(VLOG_TAG):
-                    _log.debug('Ignoring msgNum %s', field_data)
-            elif (field_idx == 2 and mfr == Manufacturer.ORBCOMM):
-                message.priority = MessagePriority(int(field_data))
-                if vlog(VLOG_TAG):
-                    _log.debug('Message priority %s', message.priority.name)
-            elif ((field_idx == 3 and mfr == Manufacturer.ORBCOMM) or
-                  (field_idx == 1 and mfr == Manufacturer.QUECTEL)):
-                codec_sin = int(field_data)
-                if not data_includes_sin:
-                    message.payload += codec_sin.to_bytes(1, 'big')
-                if vlog(VLOG_TAG):
-                    _log.debug('Added SIN as first payload byte: %d', codec_sin)
-            elif (field_idx == 4 and mfr == Manufacturer.ORBCOMM):
-                message.state = MessageState(int(field_data))
-                if vlog(VLOG_TAG):
-                    _log.debug('Message state %s', message.state.name)
-            elif ((field_idx == 5 and mfr == Manufacturer.ORBCOMM) or
-                  (field_idx == 2 and mfr == Manufacturer.QUECTEL)):
-                message.length = int(field_data)
-                if vlog(VLOG_TAG):
-                    _log.debug('Message size: %d bytes', message.length)
-            elif ((field_idx == 6 and mfr == Manufacturer.ORBCOMM) or
-                  (field_idx == 3 and mfr == Manufacturer.QUECTEL)):
-                data_format = DataFormat(int(field_data))
-                if vlog(VLOG_TAG):
-                    _log.debug('Data format %s', data_format.name)
-            elif ((field_idx == 7 and mfr == Manufacturer.ORBCOMM) or
-                  (field_idx == 4 and mfr == Manufacturer.QUECTEL)):
-                if vlog(VLOG_TAG):
-                    _log.debug('Decoding payload from: %s', field_data)
-                if message.length > 0:
-                    if data_format == DataFormat.BASE64:
-                        message.payload += base64.b64decode(field_data)
-                    elif data_format == DataFormat.HEX:
-                        message.payload += bytes.fromhex(field_data)
-                    else:   # DataFormat.TEXT
-                        message.payload += field_data.encode()
-                    if message.length != len(message.payload):
-                        _log.warn('Message length mismatch')
+        message.name = fields['name'].replace('"', '')
+        if 'priority' in fields:
+            message.priority = MessagePriority(int(fields['priority']))
+        if 'codec_sin' in fields:
+            # the SIN is the first payload byte
+            message.payload += int(fields['codec_sin']).to_bytes(1, 'big')
+        if 'state' in fields:
+            message.state = MessageState(int(fields['state']))
+        if 'length' in fields:
+            message.length = int(fields['length'])
+        if 'payload' in fields and message.length > 0:
+            payload = fields['payload']
+            data_format = DataFormat(int(fields['data_format']))
+            if vlog(VLOG_TAG):
+                _log.debug('Decoding %s payload from: %s',
+                           data_format.name, payload)
+            if data_format == DataFormat.BASE64:
+                message.payload += base64.b64decode(payload)
+            elif data_format == DataFormat.HEX:
+                message.payload += bytes.fromhex(payload)
+            else:   # DataFormat.TEXT
+                message.payload += payload.encode()
+            if message.length != len(message.payload):
+                _log.warn('Message length mismatch')
         return message
     
+    @_operation(priority=CommandPriority.SEND)
     def delete_mt_message(self, message_name: str) -> bool:
         """Remove a mobile-terminated message from the modem's Rx queue."""
-        cmd = 'AT%MGFM'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QRMGM'
-        cmd += f'="{message_name}"'
-        self._at_command_response(cmd)
-        check = self.get_mt_message_states(message_name)
+        _, command = yield from self._get_command('delete_mt_message')
+        yield from self._command(command.format(message_name))
+        check = yield from self._nested(self.get_mt_message_states,
+                                        message_name)
         if check and check[0].state == MessageState.RX_RETRIEVED:
             return True
         return False
     
+    @_operation(priority=CommandPriority.SEND)
+    def get_mt_messages(self,
+                        states: 'list[MtMessage]|None' = None,
+                        ) -> 'list[MtMessage]':
+        """Get the complete mobile-terminated messages in the Rx queue.
+        
+        Fetches messages chaining commands on a line where the dialect
+        allows, sized to their listed lengths. Messages are not deleted.
+        
+        Args:
+            states (list): Messages listed by `get_mt_message_states`, of
+                which those complete are fetched. If `None` lists the queue.
+        
+        Returns:
+            A list of `MtMessage` in the order listed.
+        
+        """
+        dialect, command = yield from self._get_command('get_mt_message')
+        if states is None:
+            states = yield from self._nested(self.get_mt_message_states)
+        data_format = DataFormat.BASE64
+        prefix = command.prefix
+        items = []
+        sizes = []
+        for message in states:
+            if message.state != MessageState.RX_COMPLETE:
+                continue
+            items.append(self._batch_item(
+                (f'{command.template}="{message.name}",{data_format}', prefix)))
+            sizes.append(len(prefix) + 64 + 4 * -(-message.length // 3))
+        messages = []
+        fetched = 0
+        for line in self._chained_lines(dialect, 'get_mt_message', items,
+                                        sizes, MT_FETCH_RESPONSE_MAX):
+            cmd = 'AT' + ''.join(sep + body for sep, body, _, _ in line)
+            expected = sum(sizes[fetched:fetched + len(line)])
+            fetched += len(line)
+            timeout = self._modem.response_timeout(cmd, expected)
+            response = yield from self._command(cmd, timeout=timeout)
+            for meta in self._split_batch_response(line, response):
+                if meta:
+                    messages.append(self._parse_mt_message(meta, dialect))
+        return messages
+    
+    @_operation(priority=CommandPriority.SEND)
+    def delete_mt_messages(self, message_names: 'list[str]') -> None:
+        """Remove mobile-terminated messages from the modem's Rx queue.
+        
+        Unlike `delete_mt_message`, commands are chained where the dialect
+        allows and each deletion is not verified by a further query.
+        
+        Raises:
+            `ModemAtError` if a deletion fails, in which case preceding
+                messages may have been deleted.
+        
+        """
+        dialect, command = yield from self._get_command('delete_mt_message')
+        items = [self._batch_item((command.format(name), ''))
+                 for name in message_names]
+        for line in self._chained_lines(dialect, 'delete_mt_message', items):
+            yield from self._command(
+                'AT' + ''.join(sep + body for sep, body, _, _ in line))
+    
+    def _chained_lines(self,
+                       dialect: Dialect,
+                       operation: str,
+                       items: 'list[tuple[str, str|None, bool]]',
+                       sizes: 'list[int]|None' = None,
+                       max_size: int = 0,
+                       ) -> 'list[list[tuple[str, str, str|None, bool]]]':
+        """Group an operation's commands into lines within a response size.
+        
+        Each command has its own line if the dialect does not chain the
+        operation.
+        
+        """
+        if not dialect.chains(operation):
+            return [[('', *item)] for item in items]
+        groups = []
+        group = []
+        size = 0
+        for i, item in enumerate(items):
+            if sizes and group and size + sizes[i] > max_size:
+                groups.append(group)
+                group = []
+                size = 0
+            group.append(item)
+            size += sizes[i] if sizes else 0
+        if group:
+            groups.append(group)
+        return [line for group in groups
+                for line in self._batch_lines(dialect, group)]
+    
+    def pump_mt_messages(self,
+                         max_messages: 'int|None' = None,
+                         batch_size: int = MT_PUMP_BATCH,
+                         ) -> 'Generator[MtMessage, None, None]':
+        """Drain the Rx queue, yielding each mobile-terminated message.
+        
+        Lists the queue once, then fetches `batch_size` messages at a time
+        with `get_mt_messages` and, after they are yielded, deletes them with
+        `delete_mt_messages`. The queue is listed again for messages that
+        arrived meanwhile. Messages are only deleted once yielded, also if
+        the generator is closed early, so a message is never lost.
+        
+        Args:
+            max_messages (int): Stop after this many messages. If `None`
+                stops when the queue is empty.
+            batch_size (int): The messages fetched and held at a time.
+        
+        Raises:
+            `ModemAtError` if deleting yielded messages fails.
+        
+        """
+        steps = self._pump_steps(max_messages, batch_size)
+        result, error = None, None
+        while True:
+            try:
+                step = (steps.send(result) if error is None
+                        else steps.throw(error))
+            except StopIteration:
+                return
+            result, error = None, None
+            if isinstance(step, MtMessage):
+                try:
+                    yield step
+                except BaseException as exc:   # e.g. closed by the consumer
+                    error = exc
+                continue
+            try:
+                result = self._run(*step)
+            except Exception as exc:
+                error = exc
+    
+    def _pump_steps(self,
+                    max_messages: 'int|None',
+                    batch_size: int) -> Generator:
+        """The steps of `pump_mt_messages` for any modem class to drive.
+        
+        Yields each `MtMessage` for the consumer, or `(operation, priority)`
+        to be run and sent back its result. An exception of the consumer or
+        the operation is thrown in at the step.
+        
+        """
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError('Invalid batch size')
+        deleted: 'set[str]' = set()
+        count = 0
+        while max_messages is None or count < max_messages:
+            states = yield (self._nested(self.get_mt_message_states),
+                            CommandPriority.POLL)
+            pending = []
+            for state in states:
+                if state.state != MessageState.RX_COMPLETE:
+                    continue
+                if state.name in deleted:
+                    _log.warning('Skipping deleted MT message %s still queued',
+                                 state.name)
+                    continue
+                pending.append(state)
+            if not pending:
+                return
+            if max_messages is not None:
+                pending = pending[:max_messages - count]
+            for i in range(0, len(pending), batch_size):
+                messages = yield (self._nested(self.get_mt_messages,
+                                               pending[i:i + batch_size]),
+                                  CommandPriority.SEND)
+                delivered = []
+                try:
+                    for message in messages:
+                        delivered.append(message.name)
+                        yield message
+                except BaseException:   # including close by the consumer
+                    if delivered:
+                        try:
+                            yield (self._nested(self.delete_mt_messages,
+                                                delivered),
+                                   CommandPriority.SEND)
+                        except Exception as exc:
+                            _log.error('Unable to delete MT messages %s: %s',
+                                       delivered, exc)
+                    raise
+                if delivered:
+                    yield (self._nested(self.delete_mt_messages, delivered),
+                           CommandPriority.SEND)
+                deleted.update(delivered)
+                count += len(delivered)
+    
+    @_operation(priority=CommandPriority.SEND)
     def receive_data(self, message_name: str) -> 'bytes|None':
         """Get the raw data from a mobile-terminated message."""
-        message = self.get_mt_message(message_name)
+        message = yield from self._nested(self.get_mt_message, message_name)
         if message:
             return message.payload
         return None
     
+    @_operation
+    @_cached
     def get_gnss_mode(self) -> GnssMode:
         """Get the modem's GNSS receiver mode."""
-        cmd = 'ATS39?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QGNSSMOD?'
-            prefix = '+QGNSSMOD:'
-        response = self._at_command_response(cmd, prefix)
-        if self._mfr == Manufacturer.QUECTEL:
-            return GnssModeQuectel(int(response))
-        return GnssModeOrbcomm(int(response))
+        dialect, command = yield from self._get_command('get_gnss_mode')
+        response = yield from self._command(*command)
+        return dialect.gnss_mode(int(response))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_gnss_mode(self, gnss_mode: GnssMode) -> None:
         """Get the modem's GNSS receiver mode."""
-        cmd = f'ATS39={gnss_mode}'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            if not GnssModeQuectel.is_valid(gnss_mode):
-                raise ValueError('Invalid GNSS mode')
-            cmd = f'AT+QGNSSMOD={gnss_mode}'
-            prefix = '+QGNSSMOD:'
-        else:
-            if not GnssModeOrbcomm.is_valid(gnss_mode):
-                raise ValueError('Invalid GNSS mode')
-        self._at_command_response(cmd, prefix)
+        dialect, command = yield from self._get_command('set_gnss_mode')
+        if not dialect.gnss_mode.is_valid(gnss_mode):
+            raise ValueError('Invalid GNSS mode')
+        yield from self._command(command.format(gnss_mode), command.prefix)
+        self._cache.put('get_gnss_mode', dialect.gnss_mode(gnss_mode))
     
+    @_operation
     def get_gnss_continuous(self) -> int:
         """Get the modem's GNSS continuous refresh interval in seconds."""
-        cmd = 'ATS55?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QGNSSCW?'
-            prefix = '+QGNSSCW:'
+        _, command = yield from self._get_command('get_gnss_continuous')
+        response = yield from self._command(*command)
         try:
-            return int(self._at_command_response(cmd, prefix))
+            return int(response)
         except ValueError:
             return 0
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_gnss_continuous(self, interval: int) -> None:
         """Set the modem's GNSS continuous refresh interval in seconds.
         
@@ -858,13 +1464,12 @@ class NimoModem:
             `ValueError` if invalid interval is specified.
         
         """
+        _, command = yield from self._get_command('set_gnss_continuous')
         if interval not in range (0, 31):
             raise ValueError('Invalid GNSS refresh interval')
-        cmd = f'ATS55={interval}'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = f'AT+QGNSSCW={interval}'
-        self._at_command_response(cmd)
+        yield from self._command(command.format(interval))
     
+    @_operation(priority=CommandPriority.GNSS)
     def get_nmea_data(self,
                       stale_secs: int = 1,
                       wait_secs: int = 35,
@@ -884,11 +1489,8 @@ class NimoModem:
             gsv (bool): Include verbose GNSS satellite details.
         
         """
-        cmd = 'AT%GPS'
-        prefix = '%GPS:'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QGNSS'
-            prefix = '+QGNSS:'
+        _, command = yield from self._get_command('get_nmea_data')
+        cmd, prefix = command
         cmd += f'={stale_secs},{wait_secs}'
         if rmc:
             cmd += ',"RMC"'
@@ -899,89 +1501,126 @@ class NimoModem:
         if gsv:
             cmd += ',"GSV"'
         try:
-            response = self._at_command_response(cmd, prefix, wait_secs + 5)
+            response = yield from self._command(cmd, prefix, wait_secs + 5)
             return response
         except ModemAtError as exc:
             if exc.error_code != AtErrorCode.GNSS_TIMEOUT:
                 raise
         return ''
     
+    @_operation(priority=CommandPriority.GNSS)
     def get_location(self,
                      stale_secs: int = 1,
-                     wait_secs: int = 35) -> 'ModemLocation|None':
+                     wait_secs: int = 35,
+                     max_age: 'float|None' = None,
+                     ) -> 'ModemLocation|None':
         """Get the modem's location.
         
+        Each fix is published to the `location_service`.
+        
         Args:
             stale_secs (int): Maximum cached fix age to use in seconds.
             wait_secs (int): Maximum duration to wait for a fix in seconds.
+            max_age (float): Maximum age in seconds of a published fix to
+                return without querying the modem. If `None` uses the
+                `location_service` bound while it is running, else 0.
         
         Returns:
             ModemLocation object if GNSS does not time out waiting for fix.
         
         """
-        nmea_data = self.get_nmea_data(stale_secs, wait_secs)
+        if max_age is None and self._location_service.running:
+            max_age = self._location_service.max_age
+        if max_age:
+            location = self._location_service.get(max_age)
+            if location is not None:
+                return location
+        nmea_data = yield from self._nested(self.get_nmea_data,
+                                            stale_secs, wait_secs)
         if nmea_data:
-            return get_location_from_nmea_data(nmea_data)
+            location = get_location_from_nmea_data(nmea_data)
+            self._location_service.publish(location)
+            return location
         return None
     
-    def get_satellite_info(self) -> 'SatelliteLocation|None':
+    @_operation(priority=CommandPriority.GNSS)
+    def get_satellite_info(self,
+                           max_fix_age: 'float|None' = None,
+                           predict: bool = False,
+                           ) -> 'SatelliteLocation|None':
         """Get the satellite's information including azimuth and elevation.
         
-        Derives which satellite/GeoBeam is used from trace class 3 subclass 5.
+        Derives which satellite/GeoBeam is used from trace class 3 subclass 5,
+        recording the beam in the `coverage` index.
+        
+        Args:
+            max_fix_age (float): Maximum age in seconds of a fix published to
+                the `location_service` to use instead of a new fix.
+                As per `get_location` `max_age`.
+            predict (bool): Use the beam predicted by the `coverage` index
+                without querying the modem, if unambiguous.
         
         Returns:
             `SatelliteLocation` object (azimuth, elevation) if determinable.
         
         """
-        geobeam = None
-        modem_location = self.get_location()
-        if (modem_location is not None and
-            self.get_network_status() > NetworkStatus.RX_SEARCHING):
+        dialect, command = yield from self._get_command('get_satellite_info')
+        modem_location = yield from self._nested(self.get_location,
+                                                 max_age=max_fix_age)
+        if modem_location is None:
+            return None
+        if predict:
+            prediction = self._coverage.predict(modem_location.latitude,
+                                                modem_location.longitude)
+            if prediction is not None and prediction.unambiguous:
+                if vlog(VLOG_TAG):
+                    _log.debug('Predicted %s (confidence %0.2f)',
+                               prediction.geobeam.name, prediction.confidence)
+                return get_satellite_location(modem_location,
+                                              prediction.geobeam)
+        network_status = yield from self._nested(self.get_network_status)
+        if network_status > NetworkStatus.RX_SEARCHING:
             # satellite has been found
-            cmd = 'ATS90=3 S91=5 S92=1 S102?'
-            prefix = ''
-            if self._mfr == Manufacturer.QUECTEL:
-                cmd = 'AT+QEVNT=3,5'
-                prefix = '+QEVNT:'
-            response = self._at_command_response(cmd, prefix)
-            if self._mfr == Manufacturer.QUECTEL:
-                # workaround documentation error
-                response = response.replace('+QEVENT:', '').strip()
-                response = response.split(',')[9]
+            response = yield from self._command(*command)
+            response = dialect.parse('get_satellite_info', response)
             geobeam = GeoBeam(int(response))
+            self._coverage.observe(modem_location.latitude,
+                                   modem_location.longitude, geobeam)
             return get_satellite_location(modem_location, geobeam)
         return None
     
+    @_operation
+    @_cached
     def get_event_mask(self) -> int:
         """Get the set of monitored events that trigger event notification."""
-        if self._mfr != Manufacturer.ORBCOMM:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'ATS88?'
+        _, command = yield from self._get_command('get_event_mask')
+        response = yield from self._command(*command)
         try:
-            return int(self._at_command_response(cmd))
+            return int(response)
         except ValueError:
-            return 0
+            return _Uncached(0)
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_event_mask(self, event_mask: int) -> None:
         """Set monitored events that trigger event notification."""
-        if self._mfr != Manufacturer.ORBCOMM:
-            raise ModemError('Operation not supported by this modem')
+        _, command = yield from self._get_command('set_event_mask')
         max_bits = 12
         if not isinstance(event_mask, int) or event_mask > 2**max_bits-1:
             raise ValueError('Invalid event bitmask')
-        cmd = f'ATS88={event_mask}'
-        self._at_command_response(cmd)
+        yield from self._command(command.format(event_mask))
+        self._cache.put('get_event_mask', event_mask)
     
+    @_operation
     def get_events_asserted_mask(self) -> int:
         """Get the set of events that are active following a notification."""
-        if self._mfr != Manufacturer.ORBCOMM:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'ATS89?'
+        _, command = yield from self._get_command('get_events_asserted_mask')
+        response = yield from self._command(*command)
         try:
-            return int(self._at_command_response(cmd))
+            return int(response)
         except ValueError:
             return 0
     
+    @_operation
     def get_trace_event_monitor(self,
                                 asserted_only: bool = False,
                                 ) -> 'list[tuple[int, int]]':
@@ -997,12 +1636,10 @@ class NimoModem:
             `ModemError` if unsupported by the modem type.
         
         """
-        if self._mfr != Manufacturer.ORBCOMM:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'AT%EVMON'
-        prefix = '%EVMON:'
+        _, command = yield from self._get_command('get_trace_event_monitor')
         trace_events = []
-        events = self._at_command_response(cmd, prefix).split(',')
+        response = yield from self._command(*command)
+        events = response.split(',')
         for event in events:
             trace_class = int(event.split('.')[0])
             trace_subclass = int(event.split('.')[1].replace('*', ''))
@@ -1010,6 +1647,7 @@ class NimoModem:
                 trace_events.append((trace_class, trace_subclass))
         return trace_events
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_trace_event_monitor(self, events: 'list[tuple[int, int]]') -> None:
         """Set the list of monitored trace events."""
         cmd = 'AT%EVMON='
@@ -1017,12 +1655,16 @@ class NimoModem:
             if not cmd.endswith('='):
                 cmd += ','
             cmd += f'{event[0]}.{event[1]}'
-        self._at_command_response(cmd)
+        yield from self._command(cmd)
     
+    @_operation
     def get_trace_events_cached(self) -> 'list[tuple[int, int]]':
         """Get a list of trace events cached."""
-        return self.get_trace_event_monitor(True)
+        trace_events = yield from self._nested(self.get_trace_event_monitor,
+                                               True)
+        return trace_events
     
+    @_operation
     def get_trace_event_data(self,
                              event: 'tuple[int, int]',
                              decode: bool = False,
@@ -1034,78 +1676,119 @@ class NimoModem:
             decode (bool): Decodes raw data to dictionary (not implemented)
         
         """
-        cmd = f'AT%EVNT={event[0]},{event[1]}'
-        prefix = '%EVNT:'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = cmd.replace('%EVNT', '+QEVNT')
-            prefix = '+QEVENT:'   # documented as +QEVNT
-        trace = self._at_command_response(cmd, prefix)
+        _, command = yield from self._get_command('get_trace_event_data')
+        trace = yield from self._command(command.format(*event[:2]),
+                                         command.prefix)
         if decode:
             raise NotImplementedError
         return [int(i) for i in trace.split(',')]
-            
+    
+    @_operation
+    @_cached
     def get_urc_ctl(self) -> int:
         """Get the event list that trigger Unsolicited Report Codes."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ValueError('Modem does not support this feature')
-        cmd = 'AT+QURCCTL?'
-        prefix = '+QURCCTL:'
+        _, command = yield from self._get_command('get_urc_ctl', ValueError)
+        response = yield from self._command(*command)
         try:
-            return int(self._at_command_response(cmd, prefix), 16)
+            return int(response, 16)
         except ValueError:
-            return 0
+            return _Uncached(0)
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_urc_ctl(self, qurc_mask: int) -> None:
         """Set the event list that trigger Unsolicited Report Codes."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ValueError('Modem does not support this feature')
-        cmd = f'AT+QURCCTL=0x{qurc_mask:04X}'
-        self._at_command_response(cmd)
+        _, command = yield from self._get_command('set_urc_ctl', ValueError)
+        yield from self._command(command.format(qurc_mask))
+        self._cache.put('get_urc_ctl', qurc_mask)
     
     def get_urc(self) -> 'UrcCode|None':
-        """Get the pending Unsolicited Result Code if one is present."""
-        if self._mfr != Manufacturer.QUECTEL:
+        """Get the pending Unsolicited Result Code if one is present.
+        
+        URCs received during other commands, or by the background reader,
+        are returned before any waiting on the serial port.
+        
+        """
+        if not self._dialect.supports('get_urc_ctl'):
             raise ValueError('Modem does not support this feature')
-        eol = '\r\n' if self._modem.verbose else '\r'
-        result = self._modem.read_rx_buffer(read_until=eol)
+        result = self._modem.get_unsolicited(('+QURC:',))
+        if not result and not self._modem.reader_running:
+            eol = '\r\n' if self._modem.verbose else '\r'
+            result = self._modem.read_rx_buffer(read_until=eol)
         if result:
-            result = result.replace('+QURC:', '').strip()
-            try:
-                return UrcCode(int(result))
-            except ValueError:
-                return UrcCode[result]
+            return self._parse_urc(result)
         return None
     
+    @staticmethod
+    def _parse_urc(result: str) -> UrcCode:
+        """Parse a `+QURC:` line to its `UrcCode`."""
+        result = result.replace('+QURC:', '').strip()
+        try:
+            return UrcCode(int(result))
+        except ValueError:
+            return UrcCode[result]
+    
+    def start_reader(self) -> None:
+        """Start a background reader that owns the serial port.
+        
+        Unsolicited codes and boot strings are then captured as they arrive,
+        including during other commands, for `get_urc`, `await_boot` or
+        callbacks registered with `add_urc_callback`.
+        
+        """
+        self._modem.start_reader()
+    
+    def stop_reader(self) -> None:
+        """Stop the background reader, if running."""
+        self._modem.stop_reader()
+    
+    def add_urc_callback(self, callback: 'Callable[[UrcCode], None]') -> None:
+        """Register a callback for each Unsolicited Result Code received.
+        
+        URCs passed to the callback are not queued for `get_urc`. Callbacks
+        run on the thread that read the URC and must not wait on commands.
+        
+        """
+        if not callable(callback):
+            raise ValueError('Invalid callback')
+        
+        def urc_callback(line: str):
+            callback(self._parse_urc(line))
+        
+        self._urc_callbacks[callback] = urc_callback
+        self._modem.add_unsolicited_callback(urc_callback, ('+QURC:',))
+    
+    def remove_urc_callback(self, callback: 'Callable[[UrcCode], None]'):
+        """Remove a previously registered URC callback."""
+        urc_callback = self._urc_callbacks.pop(callback, None)
+        if urc_callback:
+            self._modem.remove_unsolicited_callback(urc_callback)
+    
+    @_operation
+    @_cached
     def get_power_mode(self) -> PowerMode:
         """Get the modem's power mode configuration."""
-        cmd = 'ATS50?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QPMD?'
-            prefix = '+QPMD:'
-        return PowerMode(int(self._at_command_response(cmd, prefix)))
+        _, command = yield from self._get_command('get_power_mode')
+        response = yield from self._command(*command)
+        return PowerMode(int(response))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_power_mode(self, power_mode: PowerMode) -> None:
         """Set the modem's power mode configuration."""
+        _, command = yield from self._get_command('set_power_mode')
         if not PowerMode.is_valid(power_mode):
             raise ValueError('Invalid Power Mode')
-        cmd = f'ATS50={power_mode}'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = f'AT+QPMD={power_mode}'
-        self._at_command_response(cmd)
+        yield from self._command(command.format(power_mode))
+        self._cache.put('get_power_mode', PowerMode(power_mode))
     
+    @_operation
+    @_cached
     def get_wakeup_period(self) -> WakeupPeriod:
         """Get the modem's wakeup period configuration."""
-        cmd = 'ATS51?'
-        prefix = ''
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QWKUPCFG?'
-            prefix = '+QWKUPCFG:'
-        if self._mfr == Manufacturer.QUECTEL:
-            return WakeupPeriod(int(
-                self._at_command_response(cmd, prefix).split(',')[0]))
-        return WakeupPeriod(int(self._at_command_response(cmd, prefix)))
+        dialect, command = yield from self._get_command('get_wakeup_period')
+        response = yield from self._command(*command)
+        return WakeupPeriod(int(dialect.parse('get_wakeup_period', response)))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_wakeup_period(self,
                           wakeup_period: WakeupPeriod,
                           wakeup_way: 'WakeupWay|None' = None,
@@ -1115,75 +1798,74 @@ class NimoModem:
         The configuration does not update until confimed by the network.
         
         """
+        dialect, command = yield from self._get_command('set_wakeup_period')
         if not WakeupPeriod.is_valid(wakeup_period):
             raise ValueError('Invalid wakeup period')
-        cmd = f'ATS51={wakeup_period}'
-        if self._mfr == Manufacturer.QUECTEL:
-            if wakeup_way is None:
-                query = self._at_command_response('AT+QWKUPCFG?', '+QWKUPCFG:')
-                wakeup_way = WakeupWay(int(query.split(',')[1]))
-            cmd = f'AT+QWKUPCFG={wakeup_period},{wakeup_way}'
-        self._at_command_response(cmd)
+        if wakeup_way is None and dialect.supports('get_wakeup_way'):
+            wakeup_way = yield from self._nested(self.get_wakeup_way)
+        yield from self._command(command.format(wakeup_period, wakeup_way))
+        # applies once confirmed by the network so query again
+        self._cache.invalidate('get_wakeup_period')
     
+    @_operation
     def get_wakeup_way(self) -> WakeupWay:
         """Get the modem wakeup method."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'AT+QWKUPCFG?'
-        prefix = '+QWKUPCFG:'
-        wakeup_way = self._at_command_response(cmd, prefix).split(',')[1]
+        _, command = yield from self._get_command('get_wakeup_way')
+        response = yield from self._command(*command)
+        wakeup_way = response.split(',')[1]
         return WakeupWay(int(wakeup_way))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def power_down(self) -> None:
         """Prepare the modem for power-down."""
-        cmd = 'AT%OFF'
-        if self._mfr == Manufacturer.QUECTEL:
-            cmd = 'AT+QPOWD=2'
-        self._at_command_response(cmd)
+        _, command = yield from self._get_command('power_down')
+        yield from self._command(*command)
+        self._cache.clear()
     
+    @_operation
     def get_workmode(self) -> WorkMode:
         """Get the modem working mode."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'AT+QMOD?'
-        prefix = '+QMOD:'
-        return WorkMode(int(self._at_command_response(cmd, prefix)))
+        _, command = yield from self._get_command('get_workmode')
+        response = yield from self._command(*command)
+        return WorkMode(int(response))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_workmode(self, workmode: WorkMode) -> None:
         """Set the modem working mode."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ModemError('Operation not supported by this modem')
+        _, command = yield from self._get_command('set_workmode')
         if not WorkMode.is_valid(workmode):
             raise ValueError('Invalid workmode')
-        cmd = f'AT+QMOD={workmode}'
-        self._at_command_response(cmd)
+        yield from self._command(command.format(workmode))
     
+    @_operation
     def get_deepsleep_enable(self) -> bool:
         """Get the deepsleep configuration flag."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ModemError('Operation not supported by this modem')
-        cmd = 'AT+QSCLK?'
-        prefix = '+QSCLK:'
-        return bool(int(self._at_command_response(cmd, prefix)))
+        _, command = yield from self._get_command('get_deepsleep_enable')
+        response = yield from self._command(*command)
+        return bool(int(response))
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_deepsleep_enable(self, enable: bool) -> None:
         """Set the deepsleep configuration flag."""
-        if self._mfr != Manufacturer.QUECTEL:
-            raise ModemError('Operation not supported by this modem')
-        self._at_command_response(f'AT+QSCLK={int(enable)}')
+        _, command = yield from self._get_command('set_deepsleep_enable')
+        yield from self._command(command.format(int(enable)))
     
+    @_operation
     def get_register(self, s_register_number: int) -> 'int|None':
         """Get a modem register value."""
         cmd = f'ATS{s_register_number}?'
+        response = yield from self._command(cmd)
         try:
-            return int(self._at_command_response(cmd))
+            return int(response)
         except ValueError:
             return None
     
+    @_operation(priority=CommandPriority.CONTROL)
     def set_register(self, s_register_number: int, value: int) -> None:
         """Set a modem register value."""
         cmd = f'ATS{s_register_number}={value}'
-        self._at_command_response(cmd)
+        yield from self._command(cmd)
+        self._setting_written(cmd[2:])
     
     def get_all_registers(self) -> dict:
         """Get a dictionary of modem register values."""
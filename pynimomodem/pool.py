@@ -0,0 +1,268 @@
+"""Management of many NIMO modems across serial ports.
+
+`ModemPool` opens and initializes modems concurrently, addresses them by
+mobile ID and runs broadcast operations on a bounded number of worker threads,
+collecting each modem's result, error and latency.
+
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+from .modem import ModemTimeout, NimoModem
+from .nimoutils import vlog
+
+VLOG_TAG = 'modempool'
+DEFAULT_MAX_WORKERS = 8
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolResult:
+    """The outcome of an operation on one modem of a `ModemPool`.
+    
+    Attributes:
+        port (str): The serial port of the modem.
+        mobile_id (str): The modem's mobile ID, if known.
+        value (Any): The operation's return value if successful.
+        error (Exception): The exception raised, if any.
+        latency (float): The time in seconds to complete the operation.
+    
+    """
+    port: str
+    mobile_id: str = ''
+    value: Any = None
+    error: 'Exception|None' = None
+    latency: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ModemPool:
+    """A set of `NimoModem` instances on many serial ports.
+    
+    Modems are addressed by mobile ID, e.g. `pool['01097882SKY9F17']`.
+    Broadcast operations run in parallel with at most `max_workers` threads.
+    Commands to a single modem are serialized by that modem.
+    
+    Use as a context manager, or call `open` then `close`.
+    
+    """
+    def __init__(self,
+                 ports: Iterable[str],
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 **kwargs) -> None:
+        """Instantiate the pool without opening the ports.
+        
+        Args:
+            ports (Iterable[str]): The modem serial port paths.
+            max_workers (int): The maximum number of parallel operations.
+        
+        Keyword Args:
+            Passed to each `NimoModem` e.g. `baudrate`.
+        
+        """
+        self._ports: 'list[str]' = list(dict.fromkeys(ports))
+        if not isinstance(max_workers, int) or max_workers < 1:
+            raise ValueError('Invalid max_workers')
+        self._max_workers = max_workers
+        self._kwargs = kwargs
+        self._modems: 'dict[str, NimoModem]' = {}   # by port
+        self._mobile_ids: 'dict[str, str]' = {}   # port by mobile ID
+        self._lock = threading.Lock()
+    
+    def __enter__(self) -> 'ModemPool':
+        self.open()
+        return self
+    
+    def __exit__(self, *args) -> None:
+        self.close()
+    
+    def __len__(self) -> int:
+        return len(self._modems)
+    
+    def __iter__(self) -> Iterator[NimoModem]:
+        return iter(list(self._modems.values()))
+    
+    def __contains__(self, mobile_id: str) -> bool:
+        return mobile_id in self._mobile_ids
+    
+    def __getitem__(self, mobile_id: str) -> NimoModem:
+        return self._modems[self._mobile_ids[mobile_id]]
+    
+    @property
+    def mobile_ids(self) -> 'list[str]':
+        """The mobile IDs of the modems opened."""
+        return list(self._mobile_ids)
+    
+    @property
+    def ports(self) -> 'list[str]':
+        """The serial ports of the pool."""
+        return list(self._ports)
+    
+    def get_port(self, mobile_id: str) -> str:
+        """Get the serial port of a modem by mobile ID."""
+        return self._mobile_ids[mobile_id]
+    
+    def open(self,
+             initialize: bool = True,
+             **kwargs) -> 'dict[str, PoolResult]':
+        """Opens, connects and identifies the modems concurrently.
+        
+        A modem not responding at its configured baud rate is tried at
+        others with `retry_baudrate`. Modems that fail are not added to the
+        pool and may be retried with `reconnect`.
+        
+        Args:
+            initialize (bool): Initialize each modem's AT configuration.
+        
+        Keyword Args:
+            Passed to `NimoModem.initialize` e.g. `echo`.
+        
+        Returns:
+            A `PoolResult` for each port with the mobile ID as value.
+        
+        """
+        ports = [p for p in self._ports if p not in self._modems]
+        return self._open_ports(ports, initialize, **kwargs)
+    
+    def _open_ports(self,
+                    ports: 'list[str]',
+                    initialize: bool = True,
+                    **kwargs) -> 'dict[str, PoolResult]':
+        """Opens the modems on the ports concurrently."""
+        def open_port(port: str) -> str:
+            return self._open(port, initialize, **kwargs)
+        
+        results = self._map(open_port, [(port, '') for port in ports])
+        for result in results.values():
+            if result.ok:
+                result.mobile_id = result.value
+        return results
+    
+    def _open(self, port: str, initialize: bool, **kwargs) -> str:
+        modem = NimoModem(port, **self._kwargs)
+        try:
+            if not modem.is_connected() and not modem.retry_baudrate():
+                raise ModemTimeout('Modem not responding')
+            if initialize:
+                modem.initialize(**kwargs)
+            mobile_id = modem.get_mobile_id()
+        except Exception:
+            modem.disconnect()
+            raise
+        with self._lock:
+            self._modems[port] = modem
+            self._mobile_ids[mobile_id] = port
+        if vlog(VLOG_TAG):
+            _log.debug('Opened %s on %s', mobile_id, port)
+        return mobile_id
+    
+    def close(self) -> None:
+        """Disconnects all the modems of the pool."""
+        for modem in self._modems.values():
+            try:
+                modem.disconnect()
+            except Exception as exc:
+                _log.warning('Error disconnecting modem: %s', exc)
+        self._modems.clear()
+        self._mobile_ids.clear()
+    
+    def reconnect(self, mobile_id_or_port: str) -> PoolResult:
+        """Closes and re-opens a modem, e.g. after it was unplugged.
+        
+        Args:
+            mobile_id_or_port (str): The mobile ID or serial port.
+        
+        """
+        port = self._mobile_ids.get(mobile_id_or_port, mobile_id_or_port)
+        modem = self._modems.pop(port, None)
+        if modem is not None:
+            self._mobile_ids = {k: v for k, v in self._mobile_ids.items()
+                                if v != port}
+            modem.disconnect()
+        elif port not in self._ports:
+            raise ValueError(f'Unknown modem {mobile_id_or_port}')
+        return self._open_ports([port])[port]
+    
+    def broadcast(self,
+                  operation: 'str|Callable[[NimoModem], Any]',
+                  *args,
+                  mobile_ids: 'Iterable[str]|None' = None,
+                  retries: int = 0,
+                  **kwargs) -> 'dict[str, PoolResult]':
+        """Runs an operation on many modems in parallel.
+        
+        Errors are captured in each modem's result rather than raised.
+        
+        Args:
+            operation (str|Callable): A `NimoModem` method name called with
+                `args` and `kwargs`, e.g. `'get_network_status'`, or a
+                function taking the modem as its only argument.
+            mobile_ids (Iterable[str]): Optional subset of the modems.
+            retries (int): Times to retry a modem that times out, after
+                checking its baud rate.
+        
+        Returns:
+            A `PoolResult` for each modem, by mobile ID.
+        
+        """
+        if isinstance(operation, str):
+            if not callable(getattr(NimoModem, operation, None)):
+                raise ValueError(f'Invalid modem operation {operation}')
+            name = operation
+            
+            def operation(modem: NimoModem) -> Any:
+                return getattr(modem, name)(*args, **kwargs)
+        
+        elif args or kwargs:
+            raise ValueError('Arguments require an operation name')
+        if mobile_ids is None:
+            mobile_ids = self._mobile_ids
+        targets = [(self._mobile_ids[mobile_id], mobile_id)
+                   for mobile_id in mobile_ids]
+        
+        def run(port: str) -> Any:
+            modem = self._modems[port]
+            for attempt in range(retries + 1):
+                try:
+                    return operation(modem)
+                except ModemTimeout:
+                    if attempt == retries:
+                        raise
+                    _log.warning('Retrying modem on %s', port)
+                    modem.retry_baudrate()
+        
+        results = self._map(run, targets)
+        return {result.mobile_id: result for result in results.values()}
+    
+    def _map(self,
+             func: 'Callable[[str], Any]',
+             targets: 'list[tuple[str, str]]',
+             ) -> 'dict[str, PoolResult]':
+        """Runs a function for each (port, mobile_id) on the worker threads."""
+        def timed(port: str, mobile_id: str) -> PoolResult:
+            result = PoolResult(port, mobile_id)
+            start = time.monotonic()
+            try:
+                result.value = func(port)
+            except Exception as exc:
+                result.error = exc
+                _log.warning('Modem on %s failed: %s', port, exc)
+            result.latency = time.monotonic() - start
+            return result
+        
+        if not targets:
+            return {}
+        workers = min(self._max_workers, len(targets))
+        with ThreadPoolExecutor(workers, thread_name_prefix='ModemPool') as ex:
+            futures = [ex.submit(timed, port, mobile_id)
+                       for port, mobile_id in targets]
+            return {result.port: result
+                    for result in (f.result() for f in futures)}
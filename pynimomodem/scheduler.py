@@ -0,0 +1,190 @@
+"""Priority scheduling of commands from concurrent callers on one modem port.
+
+The modem processes one AT command at a time. Callers waiting for the port are
+served by `CommandPriority` class, then in order of request within a class,
+so a quick control or send command is not queued behind bulk polling or a
+long GNSS query. A command in progress is never interrupted.
+
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from .constants import CommandPriority
+from .nimoutils import vlog
+
+VLOG_TAG = 'scheduler'
+
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class WaitStats:
+    """Queue wait metrics for a command priority class.
+    
+    Attributes:
+        count (int): The number of commands granted the port.
+        total (float): The total time in seconds spent waiting.
+        max (float): The longest wait in seconds.
+        waiting (int): The number of commands currently waiting.
+    
+    """
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    waiting: int = 0
+    
+    @property
+    def mean(self) -> float:
+        """The average wait in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+
+class _Scheduler:
+    """Queue bookkeeping shared by the thread and asyncio schedulers."""
+    def __init__(self) -> None:
+        self._queues: 'dict[CommandPriority, deque]' = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._stats: 'dict[CommandPriority, WaitStats]' = {
+            priority: WaitStats() for priority in CommandPriority
+        }
+        self._busy: bool = False
+    
+    def locked(self) -> bool:
+        """True if a command holds the port."""
+        return self._busy
+    
+    def stats(self) -> 'dict[CommandPriority, WaitStats]':
+        """Gets a copy of the queue wait metrics for each priority class."""
+        return {priority: WaitStats(s.count, s.total, s.max,
+                                    len(self._queues[priority]))
+                for priority, s in self._stats.items()}
+    
+    def reset_stats(self) -> None:
+        """Clears the queue wait metrics."""
+        for priority in CommandPriority:
+            self._stats[priority] = WaitStats()
+    
+    def _waiting(self) -> bool:
+        return any(self._queues.values())
+    
+    def _next(self):
+        """Removes and returns the next waiter, or `None` if none."""
+        for queue in self._queues.values():
+            if queue:
+                return queue.popleft()
+        return None
+    
+    def _granted(self, priority: CommandPriority, queued: float) -> None:
+        """Records the wait of a command granted the port."""
+        wait = time.monotonic() - queued
+        stats = self._stats[priority]
+        stats.count += 1
+        stats.total += wait
+        if wait > stats.max:
+            stats.max = wait
+        if vlog(VLOG_TAG) and wait > 0:
+            _log.debug('%s command waited %.3f s', priority.name, wait)
+
+
+class _Ticket:
+    """A thread waiting for the port."""
+    __slots__ = ('granted',)
+    
+    def __init__(self) -> None:
+        self.granted: bool = False
+
+
+class CommandScheduler(_Scheduler):
+    """Grants the modem port to one thread at a time by priority class.
+    
+    Used like a lock, with `acquire` and `release` possibly in different
+    methods of the same command flow.
+    
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._cond = threading.Condition()
+    
+    def acquire(self,
+                priority: CommandPriority = CommandPriority.POLL) -> None:
+        """Blocks until the port is granted to the caller.
+        
+        Args:
+            priority (CommandPriority): The class of command to be sent.
+        
+        """
+        queued = time.monotonic()
+        with self._cond:
+            if not self._busy and not self._waiting():
+                self._busy = True
+                self._granted(priority, queued)
+                return
+            ticket = _Ticket()
+            self._queues[priority].append(ticket)
+            while not ticket.granted:
+                self._cond.wait()
+            self._granted(priority, queued)
+    
+    def release(self) -> None:
+        """Releases the port to the next waiting command, if any."""
+        with self._cond:
+            ticket = self._next()
+            if ticket is None:
+                self._busy = False
+                return
+            ticket.granted = True
+            self._cond.notify_all()
+    
+    def stats(self) -> 'dict[CommandPriority, WaitStats]':
+        with self._cond:
+            return super().stats()
+
+
+class AsyncCommandScheduler(_Scheduler):
+    """Grants the modem port to one asyncio task at a time by priority class.
+    
+    Not thread safe. Bound to the event loop of its first waiter.
+    
+    """
+    async def acquire(self,
+                      priority: CommandPriority = CommandPriority.POLL,
+                      ) -> None:
+        """Waits until the port is granted to the calling task.
+        
+        Args:
+            priority (CommandPriority): The class of command to be sent.
+        
+        """
+        queued = time.monotonic()
+        if not self._busy and not self._waiting():
+            self._busy = True
+            self._granted(priority, queued)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()   # granted as the task was cancelled
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        self._granted(priority, queued)
+    
+    def release(self) -> None:
+        """Releases the port to the next waiting task, if any."""
+        while True:
+            waiter = self._next()
+            if waiter is None:
+                self._busy = False
+                return
+            if not waiter.done():
+                waiter.set_result(None)
+                return
@@ -0,0 +1,358 @@
+"""Sharding of a modem fleet across worker processes.
+
+Parsing, base64 and NMEA decoding run under the interpreter lock, so one
+process saturates a core long before the serial links are busy.
+`ModemShardSupervisor` assigns each serial port to one of several worker
+processes, forwards `NimoModem` calls to the owning worker and restarts a
+worker that exits unexpectedly.
+
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable
+
+from .modem import NimoModem
+from .nimoutils import vlog
+from .pool import PoolResult
+
+VLOG_TAG = 'modemshard'
+MAX_SHARD_THREADS = 32
+DEFAULT_MAX_RESTARTS = 5
+
+_log = logging.getLogger(__name__)
+
+
+def _shard_worker(conn, ports: 'list[str]', kwargs: dict) -> None:
+    """Runs the modems of a shard, answering calls received on `conn`.
+    
+    Each request is `(request_id, port, method_name, args, kwargs)` and each
+    reply `(request_id, value, exception)`. A `None` request stops the worker.
+    
+    """
+    modems: 'dict[str, NimoModem]' = {}
+    errors: 'dict[str, Exception]' = {}
+    for port in ports:
+        try:
+            modems[port] = NimoModem(port, **kwargs)
+        except Exception as exc:
+            errors[port] = ConnectionError(f'Unable to open {port}: {exc}')
+    send_lock = threading.Lock()
+    
+    def run(request_id: int, port: str, name: str, args, kw) -> None:
+        value, error = None, None
+        try:
+            if port not in modems:
+                raise errors.get(port, ValueError(f'Unknown port {port}'))
+            value = getattr(modems[port], name)(*args, **kw)
+        except Exception as exc:
+            error = exc
+        with send_lock:
+            try:
+                conn.send((request_id, value, error))
+            except Exception as exc:   # e.g. unpicklable value
+                conn.send((request_id, None, RuntimeError(repr(exc))))
+    
+    workers = min(MAX_SHARD_THREADS, max(1, len(ports)))
+    with ThreadPoolExecutor(workers, thread_name_prefix='ModemShard') as ex:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                break
+            if request is None:
+                break
+            ex.submit(run, *request)
+    for modem in modems.values():
+        modem.disconnect()
+
+
+class _Shard:
+    """The supervisor's handle on a worker process."""
+    def __init__(self, index: int, ports: 'list[str]') -> None:
+        self.index = index
+        self.ports = ports
+        self.process = None
+        self.conn = None
+        self.pending: 'dict[int, Future]' = {}
+        self.lock = threading.Lock()
+        self.restarts: int = 0
+
+
+class ModemShardSupervisor:
+    """Runs `NimoModem` instances for many ports in a pool of processes.
+    
+    Ports are assigned round robin to `processes` workers. Calls are made by
+    method name and forwarded to the worker owning the port, either through
+    `submit` for a `Future` or a proxy behaving like the modem::
+        
+        with ModemShardSupervisor(ports) as supervisor:
+            status = supervisor[ports[0]].get_network_status()
+    
+    Arguments and results must be picklable. A worker that exits fails its
+    calls in progress with `ConnectionError` and is restarted, up to
+    `max_restarts` times.
+    
+    """
+    def __init__(self,
+                 ports: Iterable[str],
+                 processes: 'int|None' = None,
+                 max_restarts: int = DEFAULT_MAX_RESTARTS,
+                 mp_context: 'str|None' = 'spawn',
+                 **kwargs) -> None:
+        """Instantiate the supervisor without starting the workers.
+        
+        Args:
+            ports (Iterable[str]): The modem serial port paths.
+            processes (int): The number of worker processes. Defaults to the
+                number of CPUs, at most one per port.
+            max_restarts (int): Restarts allowed for each worker.
+            mp_context (str): The multiprocessing start method. `spawn`
+                avoids forking a parent that runs threads.
+        
+        Keyword Args:
+            Passed to each `NimoModem` e.g. `baudrate`.
+        
+        """
+        self._ports: 'list[str]' = list(dict.fromkeys(ports))
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if not isinstance(processes, int) or processes < 1:
+            raise ValueError('Invalid processes')
+        processes = max(1, min(processes, len(self._ports)))
+        self._shards = [_Shard(i, self._ports[i::processes])
+                        for i in range(processes)]
+        self._shard_by_port: 'dict[str, _Shard]' = {
+            port: shard for shard in self._shards for port in shard.ports
+        }
+        self._max_restarts = max_restarts
+        self._context = multiprocessing.get_context(mp_context)
+        self._kwargs = kwargs
+        self._request_ids = itertools.count()
+        self._running: bool = False
+    
+    def __enter__(self) -> 'ModemShardSupervisor':
+        self.start()
+        return self
+    
+    def __exit__(self, *args) -> None:
+        self.close()
+    
+    def __getitem__(self, port: str) -> 'ModemProxy':
+        return self.proxy(port)
+    
+    @property
+    def ports(self) -> 'list[str]':
+        """The serial ports supervised."""
+        return list(self._ports)
+    
+    @property
+    def processes(self) -> int:
+        """The number of worker processes."""
+        return len(self._shards)
+    
+    @property
+    def restarts(self) -> int:
+        """The total number of worker restarts."""
+        return sum(shard.restarts for shard in self._shards)
+    
+    def get_shard(self, port: str) -> int:
+        """Get the index of the worker process owning a port."""
+        return self._shard_by_port[port].index
+    
+    def get_pid(self, port: str) -> 'int|None':
+        """Get the process ID of the worker owning a port."""
+        process = self._shard_by_port[port].process
+        return process.pid if process is not None else None
+    
+    def start(self) -> None:
+        """Starts the worker processes."""
+        if self._running:
+            return
+        self._running = True
+        for shard in self._shards:
+            self._start_shard(shard)
+    
+    def close(self, timeout: float = 5) -> None:
+        """Stops the worker processes, disconnecting the modems."""
+        self._running = False
+        for shard in self._shards:
+            with shard.lock:
+                try:
+                    shard.conn.send(None)
+                except (OSError, AttributeError):
+                    pass
+        for shard in self._shards:
+            if shard.process is None:
+                continue
+            shard.process.join(timeout)
+            if shard.process.is_alive():
+                shard.process.terminate()
+                shard.process.join()
+    
+    def proxy(self, port: str) -> 'ModemProxy':
+        """Get a proxy forwarding `NimoModem` calls to the owning worker."""
+        if port not in self._shard_by_port:
+            raise ValueError(f'Unknown port {port}')
+        return ModemProxy(self, port)
+    
+    def submit(self, port: str, name: str, *args, **kwargs) -> Future:
+        """Submits a `NimoModem` method call to the worker owning a port.
+        
+        Args:
+            port (str): The modem serial port.
+            name (str): The `NimoModem` method name.
+            *args: Passed to the method.
+            **kwargs: Passed to the method.
+        
+        Returns:
+            A `Future` for the method's return value or exception.
+        
+        """
+        if not callable(getattr(NimoModem, name, None)):
+            raise ValueError(f'Invalid modem operation {name}')
+        shard = self._shard_by_port.get(port)
+        if shard is None:
+            raise ValueError(f'Unknown port {port}')
+        future = Future()
+        request_id = next(self._request_ids)
+        with shard.lock:
+            if not self._running or shard.conn is None:
+                raise ConnectionError('Shard worker not running')
+            shard.pending[request_id] = future
+            try:
+                shard.conn.send((request_id, port, name, args, kwargs))
+            except OSError as exc:
+                del shard.pending[request_id]
+                raise ConnectionError(f'Shard worker unavailable: {exc}')
+        return future
+    
+    def call(self, port: str, name: str, *args, **kwargs) -> Any:
+        """Calls a `NimoModem` method in the worker owning a port.
+        
+        Raises:
+            The exception raised by the modem, or `ConnectionError` if the
+                worker exited during the call.
+        
+        """
+        return self.submit(port, name, *args, **kwargs).result()
+    
+    def broadcast(self,
+                  name: str,
+                  *args,
+                  ports: 'Iterable[str]|None' = None,
+                  **kwargs) -> 'dict[str, PoolResult]':
+        """Calls a `NimoModem` method on many ports across the workers.
+        
+        Errors are captured in each port's result rather than raised.
+        
+        Returns:
+            A `PoolResult` for each port, by port.
+        
+        """
+        results: 'dict[str, PoolResult]' = {}
+        futures: 'dict[str, tuple[Future, float]]' = {}
+        for port in (self._ports if ports is None else ports):
+            results[port] = PoolResult(port)
+            try:
+                futures[port] = (self.submit(port, name, *args, **kwargs),
+                                 time.monotonic())
+            except (ConnectionError, ValueError) as exc:
+                results[port].error = exc
+        for port, (future, start) in futures.items():
+            result = results[port]
+            try:
+                result.value = future.result()
+            except Exception as exc:
+                result.error = exc
+                _log.warning('Modem on %s failed: %s', port, exc)
+            result.latency = time.monotonic() - start
+        return results
+    
+    def _start_shard(self, shard: _Shard) -> None:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_shard_worker,
+                                        args=(child_conn, shard.ports,
+                                              self._kwargs),
+                                        name=f'ModemShard-{shard.index}',
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        with shard.lock:
+            shard.process = process
+            shard.conn = parent_conn
+        threading.Thread(target=self._receive,
+                         args=(shard, parent_conn, process),
+                         name=f'ModemShardReceiver-{shard.index}',
+                         daemon=True).start()
+        if vlog(VLOG_TAG):
+            _log.debug('Started shard %d (pid %d) for %s',
+                       shard.index, process.pid, shard.ports)
+    
+    def _receive(self, shard: _Shard, conn, process) -> None:
+        """Resolves the calls of a worker until it exits."""
+        while True:
+            try:
+                request_id, value, error = conn.recv()
+            except (EOFError, OSError):
+                break
+            with shard.lock:
+                future = shard.pending.pop(request_id, None)
+            if future is None or not future.set_running_or_notify_cancel():
+                continue   # unknown or cancelled by the caller
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+        process.join()
+        with shard.lock:
+            pending = list(shard.pending.values())
+            shard.pending.clear()
+            shard.conn = None
+            conn.close()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(ConnectionError('Shard worker exited'))
+        if not self._running:
+            return
+        if shard.restarts >= self._max_restarts:
+            _log.error('Shard %d exited (code %s), restarts exhausted',
+                       shard.index, process.exitcode)
+            return
+        shard.restarts += 1
+        _log.warning('Shard %d exited (code %s), restarting',
+                     shard.index, process.exitcode)
+        self._start_shard(shard)
+
+
+class ModemProxy:
+    """Forwards `NimoModem` method calls to the worker owning a port.
+    
+    Calls block for the result. Use `submit` for a `Future` instead.
+    
+    """
+    def __init__(self, supervisor: ModemShardSupervisor, port: str) -> None:
+        self._supervisor = supervisor
+        self.port = port
+    
+    def __repr__(self) -> str:
+        return f'<ModemProxy {self.port}>'
+    
+    def __getattr__(self, name: str):
+        if name.startswith('_') or not callable(getattr(NimoModem, name,
+                                                        None)):
+            raise AttributeError(name)
+        
+        def call(*args, **kwargs) -> Any:
+            return self._supervisor.call(self.port, name, *args, **kwargs)
+        
+        call.__name__ = name
+        return call
+    
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        """Submits a `NimoModem` method call, returning a `Future`."""
+        return self._supervisor.submit(self.port, name, *args, **kwargs)
@@ -0,0 +1,59 @@
+"""Shared fixtures of modems simulated on pseudo-terminals."""
+from typing import Callable
+
+import pytest
+
+from pynimomodem.modem import Manufacturer, NimoModem
+
+from .ptymodem import PtyModem, default_responses
+
+
+@pytest.fixture
+def make_pty() -> 'Callable[..., PtyModem]':
+    """Get a factory of `PtyModem`, closed after the test."""
+    sims = []
+    
+    def make(responses: 'dict|None' = None, **kwargs) -> PtyModem:
+        sim = PtyModem(responses, **kwargs)
+        sims.append(sim)
+        return sim
+    
+    yield make
+    for sim in sims:
+        sim.close()
+
+
+@pytest.fixture
+def pty_modem(make_pty) -> PtyModem:
+    """A simulated modem with the default canned responses."""
+    return make_pty(default_responses())
+
+
+@pytest.fixture
+def make_modem(pty_modem: PtyModem) -> 'Callable[..., NimoModem]':
+    """Get a factory of `NimoModem`, disconnected after the test.
+    
+    The modem uses the `pty_modem` port unless another is given and the
+    manufacturer is preset to skip detection, unless `None`.
+    
+    """
+    modems = []
+    
+    def make(port: 'str|None' = None,
+             manufacturer: 'Manufacturer|None' = Manufacturer.ORBCOMM,
+             **kwargs) -> NimoModem:
+        modem = NimoModem(port or pty_modem.port, **kwargs)
+        if manufacturer is not None:
+            modem._manufacturer = manufacturer
+        modems.append(modem)
+        return modem
+    
+    yield make
+    for modem in modems:
+        modem.disconnect()
+
+
+@pytest.fixture
+def sim_modem(make_modem) -> NimoModem:
+    """An ORBCOMM `NimoModem` on the `pty_modem`."""
+    return make_modem()
@@ -0,0 +1,183 @@
+"""A scripted modem on a pseudo-terminal for tests that need no hardware.
+
+The modem side of the pty answers each AT command with a canned response,
+allowing buffer parsing and timing to be exercised on a real `Serial` port.
+
+"""
+import base64
+import os
+import re
+import termios
+import threading
+import time
+
+import pytest
+
+from pynimomodem.crcxmodem import apply_crc
+
+VRES_OK = '\r\nOK\r\n'
+VRES_ERROR = '\r\nERROR\r\n'
+CONFIG = re.compile(r'AT(Z|[EV][01]|;)+', re.IGNORECASE)
+
+PTY_REQUIRED = pytest.mark.skipif(not hasattr(os, 'openpty'),
+                                  reason='Requires pseudo-terminal support')
+
+MGFG_SMALL = 'AT%MGFG="FM01.01",3'
+MGFG_LARGE = 'AT%MGFG="FM02.01",3'
+GSN = '\r\n+GSN: 01097882SKY9F17\r\n'
+MOBILE_ID = '01097882SKY9F17'
+MGRS = ('\r\n%MGRS: "10001",0.0,0,128,4,6,0\r\n'
+        '"10002",0.0,0,128,6,12,12\r\n')
+BATCH = 'ATS54? S116?;+GSN;S88=5;%MGRS;S85?'
+TEST_NMEA = ('$GPRMC,005249.000,A,4517.1082,N,07550.9113,W,0.24,0.00,231123,,,A,V*0B\n'
+             '$GPGGA,005249.000,4517.1082,N,07550.9113,W,1,06,1.7,128.5,M,-34.3,M,,0000*62')
+
+
+def with_crc(response: str) -> str:
+    """Get a response with the CRC the modem appends."""
+    return apply_crc(response) + '\r\n'
+
+
+def mgfg_response(name: str, size: int) -> str:
+    """Get a `%MGFG` response with a base64 payload of `size` characters."""
+    payload = base64.b64encode(bytes(range(256)) * (size // 256 + 1))[:size]
+    return (f'\r\n%MGFG: "{name}",1.1,0,128,2,{size},3,{payload.decode()}'
+            f'{VRES_OK}')
+
+
+def default_responses() -> dict:
+    """Get the canned responses of the `pty_modem` fixture."""
+    return {
+        'AT': VRES_OK,
+        MGFG_SMALL: mgfg_response('FM01.01', 16),
+        MGFG_LARGE: mgfg_response('FM02.01', 10240),
+        'AT+GSN': GSN + VRES_OK,
+        'AT%MGRS': MGRS + VRES_OK,
+        'ATQ0': '0\r',
+        'ATQ4': '4\r',
+        apply_crc('AT+GSN'): with_crc(GSN + VRES_OK),
+        apply_crc('AT+BAD'): GSN + VRES_OK + '*FFFF\r\n',
+        'AT+ORPHAN': 'STRAY\r\n' + VRES_OK,
+        'AT+URC': '+QURC: 1\r\n' + VRES_OK,
+        'AT+QREG?': '\r\n+QREG: 5\r\n\r\n+QURC: 3\r\n' + VRES_OK,
+        'ATI': '\r\nQuectel\r\nCC200A-LB\r\n' + VRES_OK,
+        'ATS99?': '\r\nERROR\r\n',
+        'ATS80?': '\r\n101\r\n' + VRES_OK,
+        BATCH: '\r\n5\r\n\r\n4600\r\n' + GSN + MGRS + '\r\n220\r\n' + VRES_OK,
+    }
+
+
+class PtyModem:
+    """Simulates a NIMO modem on the master side of a pseudo-terminal.
+    
+    Attributes:
+        port (str): The slave device path to open with `Serial`.
+        responses (dict): Maps a command (without `\\r`) to its response,
+            which may be a string or a callable returning a string. A key
+            ending in `=` matches any command with those parameters.
+        echo (bool): Echo each command before the response. Set by `ATE`.
+        verbose (bool): Verbose result codes, else numeric. Set by `ATV`.
+        baudrate (int): If set, paces data in both directions as a serial
+            link at this rate would.
+        line_rate (int): If set, the modem baud rate. Commands sent at any
+            other rate are garbled, being echoed as non-ASCII data.
+        received (list): The commands received.
+    
+    """
+    def __init__(self,
+                 responses: 'dict|None' = None,
+                 echo: bool = True,
+                 baudrate: int = 0,
+                 line_rate: int = 0):
+        self._master, self._slave = os.openpty()
+        self.port: str = os.ttyname(self._slave)
+        self.responses: dict = responses or {}
+        self.echo: bool = echo
+        self.verbose: bool = True
+        self.baudrate: int = baudrate
+        self.line_rate: int = line_rate
+        self.received: 'list[str]' = []
+        self._running = True
+        self._thread = threading.Thread(target=self._respond,
+                                        name='PtyModem', daemon=True)
+        self._thread.start()
+    
+    def write(self, data: 'str|bytes') -> None:
+        """Writes unsolicited data towards the serial port."""
+        if isinstance(data, str):
+            data = data.encode()
+        threading.Thread(target=self._write, args=(data,), daemon=True).start()
+    
+    def _write(self, data: bytes) -> None:
+        view = memoryview(data)
+        chunk_size = 64 if self.baudrate else len(view)
+        while view and self._running:
+            self._pace(min(len(view), chunk_size))
+            written = os.write(self._master, view[:chunk_size])
+            view = view[written:]
+    
+    def _pace(self, size: int) -> None:
+        if self.baudrate:
+            time.sleep(size * 10 / self.baudrate)
+    
+    def _garbled(self) -> bool:
+        if not self.line_rate:
+            return False
+        speed = termios.tcgetattr(self._slave)[4]
+        return speed != getattr(termios, f'B{self.line_rate}')
+    
+    def _configure(self, command: str) -> str:
+        for setting in re.findall(r'[EV][01]', command.upper()):
+            if setting[0] == 'E':
+                self.echo = setting[1] == '1'
+            else:
+                self.verbose = setting[1] == '1'
+        return VRES_OK
+    
+    def _format(self, response: str) -> str:
+        if self.verbose:
+            return response
+        for verbose, code in ((VRES_OK, '0\r'), (VRES_ERROR, '4\r')):
+            if response.endswith(verbose):
+                text = response[:-len(verbose)]
+                if text.startswith('\r\n'):
+                    text = text[2:]
+                return text + code
+        return response
+    
+    def _respond(self) -> None:
+        pending = b''
+        while self._running:
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                return
+            self._pace(len(data))
+            pending += data
+            while b'\r' in pending:
+                line, pending = pending.split(b'\r', 1)
+                if self._garbled():
+                    if self.echo:
+                        self._write(bytes(b | 0x80 for b in line + b'\r'))
+                    continue
+                command = line.decode()
+                self.received.append(command)
+                output = f'{command}\r' if self.echo else ''
+                response = self.responses.get(
+                    command, self.responses.get(command.split('=')[0] + '='))
+                if callable(response):
+                    response = response(command)
+                elif response is None and CONFIG.fullmatch(command):
+                    response = self._configure(command)
+                if response is not None:
+                    output += self._format(response)
+                if output:
+                    self._write(output.encode())
+    
+    def close(self) -> None:
+        self._running = False
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
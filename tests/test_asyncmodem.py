@@ -0,0 +1,88 @@
+"""Tests of AsyncNimoModem using simulated modems on pseudo-terminals."""
+import asyncio
+import logging
+import time
+
+import pytest
+
+from pynimomodem.asyncmodem import AsyncNimoModem
+from pynimomodem.constants import AtErrorCode, NetworkStatus, UrcCode
+from pynimomodem.modem import Manufacturer, ModemAtError, NimoModem
+
+from .ptymodem import PTY_REQUIRED, VRES_OK, PtyModem
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+def test_async_modem_operations(pty_modem: PtyModem):
+    async def operations():
+        modem = AsyncNimoModem(pty_modem.port)
+        await modem.connect()
+        status = await modem.get_network_status()
+        assert status == NetworkStatus.OK
+        assert await modem.get_manufacturer() == 'QUECTEL'
+        assert await modem.get_urc() == UrcCode.REGED
+        with pytest.raises(ModemAtError) as exc_info:
+            await modem.get_register(99)
+        assert exc_info.value.error_code == AtErrorCode.UNKNOWN_COMMAND
+        pty_modem.write('\r\nRDY\r\n')
+        assert await modem.await_boot(2) is True
+        await modem.disconnect()
+    
+    asyncio.run(operations())
+
+
+def test_async_modems_concurrent(pty_modem: PtyModem, make_pty):
+    """One thread serves a modem waiting on a response and another modem."""
+    idle_modem = make_pty({})
+    
+    async def operations():
+        modem = AsyncNimoModem(pty_modem.port)
+        idle = AsyncNimoModem(idle_modem.port)
+        modem._manufacturer = Manufacturer.ORBCOMM
+        idle._manufacturer = Manufacturer.ORBCOMM
+        timeout_task = asyncio.ensure_future(idle.get_nmea_data(wait_secs=0))
+        start = time.monotonic()
+        for _ in range(5):
+            message = await modem.get_mt_message('FM02.01')
+            assert message.name == 'FM02.01'
+        elapsed = time.monotonic() - start
+        assert not timeout_task.done()
+        timeout_task.cancel()
+        await asyncio.gather(timeout_task, return_exceptions=True)
+        assert idle.is_ready
+        await modem.disconnect()
+        await idle.disconnect()
+        return elapsed
+    
+    elapsed = asyncio.run(operations())
+    log.info('5 x 10 KB messages read while awaiting another modem: %.3f s',
+             elapsed)
+    assert elapsed < 5
+
+
+def test_async_manufacturer_resolved_on_loop(pty_modem: PtyModem,
+                                             monkeypatch):
+    """The first operation needing the dialect awaits the ATI query."""
+    pty_modem.responses['AT+QRMGN'] = (
+        '\r\n+QRMGN: "FM01.01",0,128,2,20,20\r\n' + VRES_OK)
+    
+    def blocking_run(*args):
+        raise AssertionError('blocking operation on the event loop')
+    
+    monkeypatch.setattr(NimoModem, '_run', blocking_run)
+    
+    async def operations():
+        modem = AsyncNimoModem(pty_modem.port)
+        await modem.connect()
+        states = await modem.get_mt_message_states()
+        assert [m.name for m in states] == ['FM01.01']
+        assert states[0].length == 20
+        with pytest.raises(AttributeError):
+            modem._mfr
+        await modem.disconnect()
+    
+    asyncio.run(operations())
+    assert pty_modem.received.index('ATI') < pty_modem.received.index('AT+QRMGN')
@@ -0,0 +1,59 @@
+"""Tests of the NimoModem response cache using a simulated modem."""
+from pynimomodem.constants import PowerMode
+from pynimomodem.modem import NimoModem
+
+from .ptymodem import PTY_REQUIRED, VRES_ERROR, VRES_OK, PtyModem
+
+pytestmark = PTY_REQUIRED
+
+
+def test_response_cache(sim_modem: NimoModem, pty_modem: PtyModem):
+    pty_modem.responses.update({
+        'ATS50?': '\r\n0\r\n' + VRES_OK,
+        'ATS50=2': VRES_OK,
+        'AT+GMR': '\r\n+GMR: 3.003,3.1,8\r\n' + VRES_OK,
+        'AT&F': VRES_OK,
+    })
+    modem = sim_modem
+    assert modem.get_power_mode() == modem.get_power_mode()
+    assert pty_modem.received.count('ATS50?') == 2   # disabled by default
+    cache = modem.response_cache
+    cache.enabled = True
+    for _ in range(3):
+        assert modem.get_power_mode() == PowerMode.MOBILE_POWERED
+        assert modem.get_firmware_version() == '3.003,3.1,8'
+    assert pty_modem.received.count('ATS50?') == 3
+    assert pty_modem.received.count('AT+GMR') == 1
+    assert (cache.hits, cache.misses) == (4, 2)
+    modem.set_power_mode(PowerMode.MOBILE_BATTERY)
+    assert modem.get_power_mode() == PowerMode.MOBILE_BATTERY
+    assert pty_modem.received.count('ATS50?') == 3
+    modem.reset_factory_config()
+    assert modem.get_power_mode() == PowerMode.MOBILE_POWERED
+    assert pty_modem.received.count('ATS50?') == 4
+    cache.ttls['get_power_mode'] = 0
+    cache.clear()
+    modem.get_power_mode()
+    modem.get_power_mode()
+    assert pty_modem.received.count('ATS50?') == 6
+    assert cache.stats()['get_firmware_version'].hit_ratio == 2 / 3
+
+
+def test_response_cache_fallback(sim_modem: NimoModem, pty_modem: PtyModem):
+    """A failed query falls back without caching, so the next one retries."""
+    model = '\r\nST2100\r\n' + VRES_OK
+    event_mask = '\r\n5\r\n' + VRES_OK
+    failures = {'ATI4': iter([VRES_ERROR]),
+                'ATS88?': iter(['\r\nX\r\n' + VRES_OK])}
+    pty_modem.responses.update({
+        'ATI4': lambda command: next(failures[command], model),
+        'ATS88?': lambda command: next(failures[command], event_mask),
+    })
+    sim_modem.response_cache.enabled = True
+    assert sim_modem.get_model() == ''
+    assert sim_modem.get_event_mask() == 0
+    for _ in range(2):
+        assert sim_modem.get_model() == 'ST2100'
+        assert sim_modem.get_event_mask() == 5
+    assert pty_modem.received.count('ATI4') == 2
+    assert pty_modem.received.count('ATS88?') == 2
@@ -0,0 +1,93 @@
+"""Tests of the GeoBeam coverage index and its use by NimoModem."""
+import json
+import logging
+import time
+
+import pytest
+
+from pynimomodem.constants import GeoBeam, GeoSatellite
+from pynimomodem.coverage import BeamCoverageIndex
+from pynimomodem.location import get_location_from_nmea_data
+from pynimomodem.modem import NimoModem
+
+from .ptymodem import PTY_REQUIRED, TEST_NMEA, VRES_OK, PtyModem
+
+log = logging.getLogger(__name__)
+
+
+def test_coverage_index():
+    index = BeamCoverageIndex(resolution=1)
+    assert index.predict(45.3, -75.8) is None
+    index.observe(45.3, -75.8, GeoBeam.GLOBAL_BB)
+    assert len(index) == 0
+    for _ in range(3):
+        index.observe(45.3, -75.8, GeoBeam.AMER_RB5)
+    prediction = index.predict(45.9, -75.1)   # same cell
+    assert prediction.geobeam == GeoBeam.AMER_RB5
+    assert prediction.satellite == GeoSatellite.AMER
+    assert prediction.unambiguous
+    index.observe(45.5, -75.5, GeoBeam.AMER_RB6)
+    prediction = index.predict(45.3, -75.8)
+    assert prediction.geobeam == GeoBeam.AMER_RB5
+    assert prediction.confidence == 0.75 and not prediction.unambiguous
+    restored = BeamCoverageIndex.from_dict(index.to_dict())
+    assert restored.predict(45.3, -75.8) == prediction
+
+
+def test_coverage_footprints(tmp_path):
+    def footprint(geobeam: GeoBeam, lon_min: float, lon_max: float) -> dict:
+        ring = [[lon_min, 0], [lon_max, 0], [lon_max, 10], [lon_min, 10],
+                [lon_min, 0]]
+        return {
+            'type': 'Feature',
+            'properties': {'geobeam': geobeam.name},
+            'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+        }
+    
+    collection = {
+        'type': 'FeatureCollection',
+        'features': [footprint(GeoBeam.EMEA_RB1, 0, 10),
+                     footprint(GeoBeam.EMEA_RB2, 8, 20)],
+    }
+    path = tmp_path / 'footprints.geojson'
+    path.write_text(json.dumps(collection))
+    index = BeamCoverageIndex()
+    assert index.load_footprints(path) == 20 * 20 + 20 * 24
+    assert index.predict(5, 5).geobeam == GeoBeam.EMEA_RB1
+    assert index.predict(5, 5).unambiguous
+    assert index.predict(5, 15).geobeam == GeoBeam.EMEA_RB2
+    assert not index.predict(5, 9).unambiguous   # overlap
+    assert index.predict(5, 25) is None
+    with pytest.raises(ValueError):
+        index.load_footprints({'type': 'FeatureCollection',
+                               'features': [{'properties': {}}]})
+    count = 100000
+    start = time.perf_counter()
+    for i in range(count):
+        index.predict(5, i % 20)
+    elapsed = time.perf_counter() - start
+    log.info('Predicted GeoBeam in %.1f us', elapsed / count * 1e6)
+
+
+@PTY_REQUIRED
+def test_satellite_info_coverage(sim_modem: NimoModem, pty_modem: PtyModem):
+    trace = 'ATS90=3 S91=5 S92=1 S102?'
+    pty_modem.responses.update({
+        'ATS54?': '\r\n5\r\n' + VRES_OK,
+        trace: f'\r\n{GeoBeam.AMER_RB5.value}\r\n' + VRES_OK,
+    })
+    location = get_location_from_nmea_data(TEST_NMEA)
+    modem = sim_modem
+    modem.location_service.publish(location)
+    for _ in range(modem.coverage.min_observations):
+        info = modem.get_satellite_info(max_fix_age=60, predict=True)
+        assert info.geobeam == GeoBeam.AMER_RB5
+    assert pty_modem.received.count(trace) == 3
+    prediction = modem.coverage.predict(location.latitude, location.longitude)
+    assert prediction.geobeam == GeoBeam.AMER_RB5 and prediction.unambiguous
+    received = len(pty_modem.received)
+    predicted = modem.get_satellite_info(max_fix_age=60, predict=True)
+    assert len(pty_modem.received) == received
+    assert predicted == info
+    modem.get_satellite_info(max_fix_age=60)
+    assert pty_modem.received.count(trace) == 4
@@ -1,4 +1,33 @@
-from pynimomodem.crcxmodem import apply_crc, validate_crc
+import logging
+import time
+
+from pynimomodem.crcxmodem import (
+    CrcXmodem,
+    apply_crc,
+    calculate_crc,
+    validate_crc,
+)
+
+log = logging.getLogger(__name__)
+
+
+def _table_entry(c: int) -> int:
+    crc = 0
+    c = c << 8
+    for _ in range(8):
+        crc = (crc << 1) ^ 0x1021 if (crc ^ c) & 0x8000 else crc << 1
+        c = c << 1
+    return crc
+
+
+_TABLE = [_table_entry(i) for i in range(256)]
+
+
+def _table_crc(string: str, crc: int = 0xFFFF) -> int:
+    """The previous pure Python table implementation, for reference."""
+    for c in string:
+        crc = ((crc << 8) ^ _TABLE[((crc >> 8) ^ ord(c)) & 0xFF]) & 0xFFFF
+    return crc
 
 
 def test_apply_crc():
@@ -10,3 +39,39 @@ def test_validate_crc():
     """"""
     assert validate_crc('AT%CRC=0*BBEB') is True
     assert validate_crc('\r\nERROR\r\n*84D9\r\n') is True
+    assert validate_crc(b'\r\nERROR\r\n*84D9\r\n') is True
+    assert validate_crc('\r\nERROR\r\n*84DA\r\n') is False
+    assert validate_crc('\r\nERROR\r\n*XYZW\r\n') is False
+
+
+def test_incremental_crc():
+    response = '\r\n%MGFG:"FM01.01",01.01,0,128,2,20,3,AAEC\r\n\r\nOK\r\n'
+    assert calculate_crc(response) == _table_crc(response)
+    crc = CrcXmodem()
+    for i in range(0, len(response), 7):
+        crc.update(response[i:i + 7].encode())
+    assert crc.value == calculate_crc(response.encode())
+    assert crc.length == len(response)
+    partial = CrcXmodem(response[:10])
+    copy = partial.copy()
+    copy.update(response[10:])
+    assert partial.length == 10
+    assert copy.hexdigest() == f'{calculate_crc(response):04X}'
+    assert copy.matches(copy.hexdigest())
+
+
+def test_benchmark_crc():
+    command = 'AT%MGRT="bench",2,128.1,2,' + 'A' * 8500
+    runs = 5
+    times = {}
+    for name, func in (('table', _table_crc), ('crc_hqx', calculate_crc)):
+        elapsed = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            crc = func(command)
+            elapsed.append(time.perf_counter() - start)
+        assert crc == _table_crc(command)
+        times[name] = min(elapsed)
+    log.info('%d-byte CRC: table %.3f ms, crc_hqx %.3f ms (best of %d)',
+             len(command), times['table'] * 1000, times['crc_hqx'] * 1000, runs)
+    assert times['crc_hqx'] < times['table']
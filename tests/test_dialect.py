@@ -0,0 +1,49 @@
+"""Tests of manufacturer dialects using a simulated modem."""
+import pytest
+
+from pynimomodem.constants import NetworkStatus
+from pynimomodem.dialect import get_dialect
+from pynimomodem.modem import Manufacturer, ModemError, NimoModem
+
+from .ptymodem import PTY_REQUIRED, VRES_OK, PtyModem
+
+pytestmark = PTY_REQUIRED
+
+
+def test_dialect(make_modem, pty_modem: PtyModem):
+    pty_modem.responses.update({
+        'ATI4': '\r\nST2100\r\n' + VRES_OK,
+        'ATS54?': '\r\n5\r\n' + VRES_OK,
+        'AT%MGFM=': VRES_OK,
+        'AT%MGFS=': '\r\n%MGFS: "O1",01.01,0,128,3,20,20\r\n' + VRES_OK,
+        'AT+QRMGM=': VRES_OK,
+        'AT+QRMGS=': '\r\n+QRMGS: "Q1",0,128,3,20,20\r\n' + VRES_OK,
+    })
+    quectel = get_dialect(Manufacturer.QUECTEL)
+    assert get_dialect(Manufacturer.NONE) == get_dialect(Manufacturer.ORBCOMM)
+    assert quectel.commands['get_network_status'].prefix == '+QREG:'
+    assert not get_dialect(Manufacturer.ORBCOMM).supports('get_workmode')
+    modem: NimoModem = make_modem(manufacturer=Manufacturer.QUECTEL)
+    assert modem.get_model() == 'CC200A-LB'
+    assert modem.get_network_status() == NetworkStatus.OK
+    assert modem.delete_mt_message('Q1')
+    assert 'AT+QRMGM="Q1"' in pty_modem.received
+    states = modem._parse_message_states('"FM01.01",0,128,2,20,20\n'
+                                         '"FM01.02",0,128,2,7,7',
+                                         quectel, False)
+    assert [m.name for m in states] == ['FM01.01', 'FM01.02']
+    assert states[1].length == 7 and states[1].bytes_delivered == 7
+    modem._manufacturer = Manufacturer.ORBCOMM
+    modem._cache.clear()
+    assert modem.get_model() == 'ST2100'
+    assert modem.get_network_status() == NetworkStatus.OK
+    assert modem.delete_mt_message('O1')
+    assert 'AT%MGFM="O1"' in pty_modem.received
+    states = modem._parse_message_states('"12345678",01.02,4,128,6,10,10',
+                                         get_dialect(Manufacturer.ORBCOMM),
+                                         True)
+    assert states[0].name == '12345678' and states[0].length == 10
+    received = len(pty_modem.received)
+    with pytest.raises(ModemError):
+        modem.get_workmode()
+    assert len(pty_modem.received) == received
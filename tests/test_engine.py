@@ -0,0 +1,64 @@
+"""Tests of ModemEngine using simulated modems."""
+import logging
+import threading
+import time
+
+import pytest
+
+from pynimomodem.engine import ModemEngine
+from pynimomodem.modem import ModemAtError, ModemTimeout, NimoModem
+
+from .ptymodem import MOBILE_ID, PTY_REQUIRED, VRES_OK, PtyModem
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+def test_engine_throughput(make_pty, make_modem, pty_modem: PtyModem):
+    """One engine thread drives commands on many modems."""
+    sims = [pty_modem] + [make_pty({'AT': VRES_OK}) for _ in range(15)]
+    modems: 'list[NimoModem]' = [make_modem(sim.port) for sim in sims]
+    commands = 100
+    engine = ModemEngine()
+    for modem in modems:
+        engine.add(modem)
+    with engine:
+        assert engine.submit(modems[0].get_mobile_id).result(2) == MOBILE_ID
+        with pytest.raises(ModemAtError):
+            engine.submit(modems[0].get_register, 99).result(2)
+        sims[1].responses.pop('AT')
+        with pytest.raises(ModemTimeout):
+            engine.submit_command(modems[1], 'AT', timeout=0.1).result(2)
+        sims[1].responses['AT'] = VRES_OK
+        completed = engine.commands_completed
+        start = time.monotonic()
+        futures = [engine.submit_command(modem, 'AT')
+                   for _ in range(commands) for modem in modems]
+        assert all(f.result(10) == '' for f in futures)
+        elapsed = time.monotonic() - start
+    assert engine.commands_completed - completed == len(futures)
+    assert all(sim.received.count('AT') == commands for sim in sims[2:])
+    log.info('%d commands on %d modems from one engine thread: %.0f/s',
+             len(futures), len(modems), len(futures) / elapsed)
+
+
+def test_engine_stop_fails_queued(sim_modem: NimoModem, pty_modem: PtyModem):
+    """Operations still queued when the engine stops are failed, not sent."""
+    engine = ModemEngine()
+    engine.add(sim_modem)
+    engine.start()
+    release = threading.Event()
+    engine._call(release.wait)   # hold the engine thread
+    futures = [engine.submit(sim_modem.get_mobile_id) for _ in range(3)]
+    stopping = threading.Thread(target=engine.stop)
+    stopping.start()
+    while not engine._stop.is_set():
+        time.sleep(0.001)
+    release.set()
+    stopping.join(2)
+    assert not engine.is_running
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result(0)
+    assert 'AT+GSN' not in pty_modem.received
@@ -0,0 +1,60 @@
+"""Tests of the LocationService of a NimoModem with a simulated modem."""
+import asyncio
+
+import pytest
+
+from pynimomodem.asyncmodem import AsyncNimoModem
+from pynimomodem.modem import NimoModem
+
+from .ptymodem import PTY_REQUIRED, TEST_NMEA, VRES_OK, PtyModem
+
+pytestmark = PTY_REQUIRED
+
+
+def test_location_service(sim_modem: NimoModem, pty_modem: PtyModem):
+    nmea = TEST_NMEA.replace('\n', '\r\n')
+    pty_modem.responses.update({
+        'ATS55=': VRES_OK,
+        'AT%GPS=': f'\r\n%GPS: {nmea}\r\n' + VRES_OK,
+    })
+    modem = sim_modem
+    service = modem.location_service
+    assert service.location is None and service.age is None
+    streamed = []
+    service.add_callback(streamed.append)
+    service.start(interval=1)
+    assert 'ATS55=1' in pty_modem.received
+    fixes = []
+    for location in service.stream(timeout=5):
+        fixes.append(location)
+        if len(fixes) == 2:
+            break
+    assert len(fixes) == 2 and fixes[0].latitude == fixes[1].latitude
+    assert 'AT%GPS=1,1,"RMC","GGA","GSA"' in pty_modem.received
+    queries = pty_modem.received.count('AT%GPS=1,1,"RMC","GGA","GSA"')
+    assert modem.get_location() == service.location   # from the cache
+    assert service.age < service.max_age
+    assert pty_modem.received.count('AT%GPS=1,35,"RMC","GGA","GSA"') == 0
+    service.stop()
+    assert 'ATS55=0' in pty_modem.received
+    assert not service.running and service.interval == 0
+    assert len(streamed) >= queries
+    assert list(service.stream(timeout=0.1)) == []
+    modem.get_location()
+    assert 'AT%GPS=1,35,"RMC","GGA","GSA"' in pty_modem.received
+
+
+def test_location_service_async_modem(pty_modem: PtyModem):
+    """Background polling is refused for an AsyncNimoModem."""
+    async def start():
+        modem = AsyncNimoModem(pty_modem.port)
+        await modem.connect()
+        try:
+            with pytest.raises(TypeError):
+                modem.location_service.start()
+            assert not modem.location_service.running
+        finally:
+            await modem.disconnect()
+    
+    asyncio.run(start())
+    assert not any(c.startswith('ATS55=') for c in pty_modem.received)
@@ -0,0 +1,58 @@
+"""Tests of CommandHooks on a NimoModem with a simulated modem."""
+import pytest
+
+from pynimomodem.constants import AtErrorCode
+from pynimomodem.hooks import CommandHooks
+from pynimomodem.modem import Manufacturer, ModemAtError, NimoModem
+
+from .ptymodem import GSN, PTY_REQUIRED, VRES_OK
+
+pytestmark = PTY_REQUIRED
+
+
+class Recorder(CommandHooks):
+    def __init__(self):
+        self.events = []
+    
+    def on_send(self, event):
+        self.events.append(('send', event))
+    
+    def on_first_byte(self, event):
+        self.events.append(('first_byte', event))
+    
+    def on_echo(self, event):
+        self.events.append(('echo', event))
+    
+    def on_result_code(self, event):
+        self.events.append(('result_code', event))
+    
+    def on_error(self, event):
+        self.events.append(('error', event))
+    
+    def on_complete(self, event):
+        self.events.append(('complete', event))
+
+
+def test_command_hooks(make_modem):
+    modem: NimoModem = make_modem(manufacturer=Manufacturer.QUECTEL)
+    recorder = Recorder()
+    modem.add_command_hooks(recorder)
+    modem.get_mobile_id()
+    names = [name for name, _ in recorder.events]
+    assert names == ['send', 'first_byte', 'echo', 'result_code', 'complete']
+    done = recorder.events[-1][1]
+    assert done.command == 'AT+GSN\r' and done.bytes_sent == 7
+    assert done.bytes_received == len('AT+GSN\r' + GSN + VRES_OK)
+    assert done.sent <= done.first_byte <= done.echo <= done.result
+    assert done.modem_time >= 0 and done.transfer_time >= 0
+    assert done.parse_time >= 0
+    recorder.events.clear()
+    with pytest.raises(ModemAtError):
+        modem.get_register(99)
+    errors = [event for name, event in recorder.events if name == 'error']
+    assert errors[0].command == 'ATS99?\r'
+    assert errors[0].error == AtErrorCode.ERROR
+    modem.remove_command_hooks(recorder)
+    recorder.events.clear()
+    modem.get_mobile_id()
+    assert not recorder.events
@@ -0,0 +1,176 @@
+"""Tests of draining the MT message Rx queue with a simulated modem."""
+import asyncio
+import base64
+import logging
+import os
+import re
+import time
+from contextlib import closing
+from dataclasses import replace
+
+import pytest
+
+from pynimomodem.asyncmodem import AsyncNimoModem
+from pynimomodem.constants import AT_BATCH_LINE_MAX
+from pynimomodem.dialect import get_dialect
+from pynimomodem.modem import Manufacturer, NimoModem
+
+from .ptymodem import GSN, PTY_REQUIRED, VRES_ERROR, VRES_OK, PtyModem
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+class _RxQueue:
+    """Simulates the ORBCOMM Rx queue with a processing delay per command."""
+    def __init__(self, count: int, latency: float = 0.02) -> None:
+        self.latency = latency
+        self.payloads = {f'FM{i:02d}.01': bytes([128]) + os.urandom(20 + i)
+                         for i in range(1, count + 1)}
+        self.states = dict.fromkeys(self.payloads, 2)
+    
+    def responses(self) -> dict:
+        return {
+            'AT+GSN': GSN + VRES_OK,
+            'AT%MGFN': self.list,
+            'AT%MGFS=': self.state,
+            'AT%MGFG=': self.fetch,
+            'AT%MGFM=': self.delete,
+        }
+    
+    def _names(self, command: str) -> 'list[str]':
+        time.sleep(self.latency)
+        return re.findall(r'"([^"]+)"', command)
+    
+    def _meta(self, name: str) -> str:
+        return (f'"{name}",1.1,0,128,{self.states[name]},'
+                f'{len(self.payloads[name])},{len(self.payloads[name])}')
+    
+    def list(self, command: str) -> str:
+        self._names(command)
+        if not self.states:
+            return VRES_OK
+        return '\r\n%MGFN: {}\r\n'.format(
+            '\r\n'.join(self._meta(n) for n in self.states)) + VRES_OK
+    
+    def state(self, command: str) -> str:
+        name = self._names(command)[0]
+        return f'\r\n%MGFS: {self._meta(name)}\r\n' + VRES_OK
+    
+    def fetch(self, command: str) -> str:
+        lines = []
+        for name in self._names(command):
+            payload = self.payloads[name]
+            data = base64.b64encode(payload[1:]).decode()
+            lines.append(f'\r\n%MGFG: "{name}",1.1,0,{payload[0]},2,'
+                         f'{len(payload)},3,{data}\r\n')
+        return ''.join(lines) + VRES_OK
+    
+    def delete(self, command: str) -> str:
+        for name in self._names(command):
+            self.states[name] = 3
+        return VRES_OK
+
+
+def test_mt_inbox_pump(make_pty, make_modem):
+    count = 50
+    baudrate = 115200
+    legacy = _RxQueue(count)
+    pumped = _RxQueue(count)
+    sim: PtyModem = make_pty(legacy.responses(), baudrate=baudrate)
+    modem: NimoModem = make_modem(sim.port, baudrate=baudrate)
+    start = time.monotonic()
+    for state in modem.get_mt_message_states():
+        message = modem.get_mt_message(state.name)
+        assert message.payload == legacy.payloads[state.name]
+        assert modem.delete_mt_message(state.name)
+    legacy_time = time.monotonic() - start
+    legacy_commands = len(sim.received)
+    sim.responses = pumped.responses()
+    sim.received.clear()
+    start = time.monotonic()
+    names = []
+    for message in modem.pump_mt_messages():
+        assert message.payload == pumped.payloads[message.name]
+        names.append(message.name)
+    pump_time = time.monotonic() - start
+    assert names == list(pumped.payloads)
+    assert set(pumped.states.values()) == {3}
+    assert max(len(c) for c in sim.received) <= AT_BATCH_LINE_MAX
+    log.info('Drained %d MT messages in %d commands %.2f s,'
+             ' pumped in %d commands %.2f s', count, legacy_commands,
+             legacy_time, len(sim.received), pump_time)
+    assert legacy_commands >= 3 * count + 1
+    assert len(sim.received) < legacy_commands / 4
+    # closing early deletes only the messages yielded
+    partial = _RxQueue(5)
+    sim.responses = partial.responses()
+    pump = modem.pump_mt_messages(batch_size=3)
+    assert next(pump).name == 'FM01.01'
+    pump.close()
+    assert [n for n, s in partial.states.items() if s == 3] == ['FM01.01']
+    assert len(list(modem.pump_mt_messages(max_messages=2))) == 2
+    assert list(partial.states.values()).count(2) == 2
+    unchained = replace(get_dialect(Manufacturer.ORBCOMM),
+                        chained=frozenset())
+    items = [modem._batch_item((f'%MGFM="{n}"', '')) for n in names[:3]]
+    assert len(modem._chained_lines(unchained, 'delete_mt_message',
+                                    items)) == 3
+
+
+def test_mt_inbox_pump_undeleted(make_pty, make_modem):
+    """A message still queued after its deletion is skipped, not repeated."""
+    queue = _RxQueue(3, latency=0)
+    delete = queue.delete
+    
+    def delete_all_but_first(command: str) -> str:
+        delete(command)
+        queue.states['FM01.01'] = 2
+        return VRES_OK
+    
+    queue.delete = delete_all_but_first
+    sim: PtyModem = make_pty(queue.responses())
+    modem: NimoModem = make_modem(sim.port)
+    names = [message.name for message in modem.pump_mt_messages()]
+    assert names == list(queue.payloads)
+    assert sim.received.count('AT%MGFN') == 2
+
+
+def test_mt_inbox_pump_delete_error(make_pty, make_modem):
+    """A failed deletion on close does not hide the consumer's exception."""
+    queue = _RxQueue(3, latency=0)
+    queue.delete = lambda command: VRES_ERROR
+    sim: PtyModem = make_pty(queue.responses())
+    modem: NimoModem = make_modem(sim.port)
+    with pytest.raises(KeyError):
+        with closing(modem.pump_mt_messages()) as pump:
+            for message in pump:
+                raise KeyError(message.name)
+    assert any(c.startswith('AT%MGFM=') for c in sim.received)
+    assert set(queue.states.values()) == {2}
+
+
+def test_async_mt_inbox_pump(make_pty):
+    queue = _RxQueue(12, latency=0)
+    partial = _RxQueue(5, latency=0)
+    sim: PtyModem = make_pty(queue.responses())
+    
+    async def pump() -> 'list[str]':
+        modem = AsyncNimoModem(sim.port)
+        modem._manufacturer = Manufacturer.ORBCOMM
+        await modem.connect()
+        try:
+            names = [message.name async for message in
+                     modem.pump_mt_messages(batch_size=5)]
+            sim.responses = partial.responses()
+            early = modem.pump_mt_messages(batch_size=3)
+            assert (await early.__anext__()).name == 'FM01.01'
+            await early.aclose()
+            return names
+        finally:
+            await modem.disconnect()
+    
+    assert asyncio.run(pump()) == list(queue.payloads)
+    assert set(queue.states.values()) == {3}
+    assert [n for n, s in partial.states.items() if s == 3] == ['FM01.01']
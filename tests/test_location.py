@@ -1,18 +1,43 @@
+import logging
+import math
+import random
+import time
+from functools import reduce
+from operator import xor
+
+import pytest
+
 from pynimomodem.constants import GeoBeam, GeoSatellite
+from pynimomodem import location as nimo_location
 from pynimomodem.location import (
+    GnssSatelliteInfo,
     ModemLocation,
     SatelliteLocation,
     get_closest_satellite,
     get_location_from_nmea_data,
+    get_satellite_geometry,
     get_satellite_location,
+    get_track_from_nmea_data,
     validate_nmea,
 )
 
+log = logging.getLogger(__name__)
+
 test_loc = ('$GPRMC,005249.000,A,4517.1082,N,07550.9113,W,0.24,0.00,231123,,,A,V*0B\n'
             '$GPGGA,005249.000,4517.1082,N,07550.9113,W,1,06,1.7,128.5,M,-34.3,M,,0000*62\n'
             '$GPGSA,A,3,02,07,21,14,08,27,,,,,,,2.8,1.7,2.2,1*2D')
 
 
+@pytest.fixture(params=['python', 'numpy'])
+def np_backend(request, monkeypatch):
+    """Runs a test without and with the optional numpy acceleration."""
+    numpy = None
+    if request.param == 'numpy':
+        numpy = pytest.importorskip('numpy')
+    monkeypatch.setattr(nimo_location, 'np', numpy)
+    return request.param
+
+
 def test_validate_nmea():
     test_sentence = '$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A'
     assert validate_nmea(test_sentence)
@@ -23,8 +48,8 @@ def test_validate_nmea():
 def test_location_from_nmea():
     location = get_location_from_nmea_data(test_loc)
     assert isinstance(location, ModemLocation)
-    assert round(location.latitude, 5) == 45.01667
-    assert round(location.longitude, 5) == -75.08333
+    assert round(location.latitude, 5) == 45.28514
+    assert round(location.longitude, 5) == -75.84852
     assert round(location.altitude, 1) == 128.5
     assert location.fix_type == 3
     assert location.fix_quality == 1
@@ -52,5 +77,145 @@ def test_sat_location():
     geobeam = GeoBeam(16)
     satellite_location = get_satellite_location(modem_location, geobeam)
     assert isinstance(satellite_location, SatelliteLocation)
-    assert satellite_location.azimuth == 211.0
+    assert satellite_location.azimuth == 209.9
     assert satellite_location.elevation == 33.4
+
+
+def _nmea(body: str) -> str:
+    return f'${body}*{reduce(xor, body.encode(), 0):02X}'
+
+
+def test_gsv_satellites_info():
+    gsv = ('$GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45*75\n'
+           + _nmea('GPGSV,2,2,08,21,,,,27,55,120,') + '\n'
+           + _nmea('GPGSV,2,1,08,01,41,084,47'))
+    location = get_location_from_nmea_data(test_loc + '\n' + gsv)
+    assert [info.prn for info in location.satellites_info] == [1, 2, 12, 14,
+                                                               21, 27]
+    assert location.satellites_info[0] == GnssSatelliteInfo(1, 41, 84, 47)
+    assert location.satellites_info[4] == GnssSatelliteInfo(21, 0, 0, 0)
+    assert location.satellites_info[5].snr == 0
+    assert location.satellites == 6
+    assert '"satellites_info": [{"prn": 1' in repr(location)
+
+
+def test_benchmark_nmea():
+    sentences = test_loc.split('\n') + [
+        '$GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45*75',
+    ]
+    corpus = sentences * 2500
+    runs = 3
+    elapsed = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for i in range(0, len(corpus), len(sentences)):
+            get_location_from_nmea_data(corpus[i:i + len(sentences)])
+        elapsed.append(time.perf_counter() - start)
+    rate = len(corpus) / min(elapsed)
+    log.info('Parsed %d NMEA sentences at %.0f sentences/s (best of %d)',
+             len(corpus), rate, runs)
+    location = get_location_from_nmea_data(corpus[:len(sentences)])
+    assert location.timestamp == 1700700769
+    assert len(location.satellites_info) == 4
+
+
+def _track_corpus(fixes: int) -> 'list[str]':
+    sentences = []
+    for i in range(fixes):
+        hhmmss = f'{i // 3600 % 24:02d}{i // 60 % 60:02d}{i % 60:02d}.000'
+        sentences.extend([
+            _nmea(f'GPRMC,{hhmmss},A,4517.1082,N,07550.9113,W,0.{i % 10}4,'
+                  f'{i % 360}.00,231123,,,A,V'),
+            _nmea(f'GPGGA,{hhmmss},4517.1082,N,07550.9113,W,1,06,1.7,'
+                  f'{i % 500}.5,M,-34.3,M,,0000'),
+            _nmea('GPGSA,A,3,02,07,21,14,08,27,,,,,,,2.8,1.7,2.2,1'),
+            '$GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45*75',
+        ])
+    return sentences
+
+
+def test_track_from_nmea(tmp_path, np_backend):
+    reference = _track_corpus(50)
+    corpus = list(reference)
+    corpus[5] = corpus[5].replace('W,1,06', 'W,1,07')   # bad checksum
+    track = get_track_from_nmea_data(corpus)
+    assert len(track) == 50
+    assert track.sentences == 150 and track.invalid == 1
+    for i in (0, 1, 49):
+        location = get_location_from_nmea_data(reference[i * 4:i * 4 + 3])
+        assert track.timestamp[i] == location.timestamp
+        assert track.latitude[i] == location.latitude
+        assert track.longitude[i] == location.longitude
+        assert track.speed[i] == location.speed
+        assert track.heading[i] == location.heading
+        assert track.pdop[i] == location.pdop
+        assert track.vdop[i] == location.vdop
+        if i != 1:
+            assert track.altitude[i] == location.altitude
+            assert track.hdop[i] == location.hdop
+    assert math.isnan(track.altitude[1])
+    assert track.hdop[1] == 1.7   # from GSA without GGA
+    path = tmp_path / 'nmea.log'
+    path.write_text('\r\n'.join(corpus) + '\r\n')
+    from_file = get_track_from_nmea_data(str(path), chunk_size=1000)
+    assert list(from_file.timestamp) == list(track.timestamp)
+    assert list(from_file.heading) == list(track.heading)
+    assert from_file.invalid == 1
+    from_bytes = get_track_from_nmea_data(path.read_bytes())
+    assert list(from_bytes.latitude) == list(track.latitude)
+    (tmp_path / 'empty.log').write_bytes(b'')
+    assert len(get_track_from_nmea_data(str(tmp_path / 'empty.log'))) == 0
+
+
+def test_benchmark_track(tmp_path, np_backend):
+    fixes = 50000
+    path = tmp_path / 'nmea.log'
+    path.write_text('\n'.join(_track_corpus(fixes)))
+    start = time.perf_counter()
+    track = get_track_from_nmea_data(path)
+    elapsed = time.perf_counter() - start
+    assert len(track) == fixes and track.invalid == 0
+    rate = track.sentences / elapsed * 60
+    log.info('Ingested %d NMEA sentences (%d fixes) at %.1fM sentences/min'
+             ' (%s)', track.sentences, fixes, rate / 1e6, np_backend)
+    assert rate > 1e6
+
+
+def test_satellite_geometry(np_backend):
+    rng = random.Random(22)
+    count = 20000
+    lats = [rng.uniform(-80, 80) for _ in range(count)]
+    lons = [rng.uniform(-180, 180) for _ in range(count)]
+    alts = [rng.uniform(0, 3000) for _ in range(count)]
+    start = time.perf_counter()
+    geometry = get_satellite_geometry(lats, lons, alts)
+    elapsed = time.perf_counter() - start
+    log.info('Azimuth/elevation of %d locations in %.1f ms (%s)', count,
+             elapsed * 1000, np_backend)
+    assert len(geometry.azimuth) == count
+    for i in range(0, count, 97):
+        closest = get_closest_satellite(lats[i], lons[i])
+        azimuth, elevation = nimo_location._azimuth_elevation(
+            lats[i], lons[i], alts[i], closest)
+        assert geometry.satellite[i] == closest.value
+        assert geometry.azimuth[i] == round(azimuth, 1)
+        assert geometry.elevation[i] == round(elevation, 1)
+    modem_location = get_location_from_nmea_data(test_loc)
+    geometry = get_satellite_geometry([modem_location.latitude],
+                                      [modem_location.longitude],
+                                      [modem_location.altitude])
+    assert geometry.azimuth[0] == 209.9 and geometry.elevation[0] == 33.4
+    with pytest.raises(ValueError):
+        get_satellite_geometry([0.0], [0.0, 1.0])
+
+
+def test_satellite_location_cache():
+    cache = nimo_location._cached_azimuth_elevation
+    cache.cache_clear()
+    modem_location = get_location_from_nmea_data(test_loc)
+    first = get_satellite_location(modem_location)
+    modem_location.latitude += 0.00001   # within the quantization
+    second = get_satellite_location(modem_location)
+    assert cache.cache_info().hits == 1
+    assert (first.azimuth, first.elevation) == (second.azimuth,
+                                                second.elevation)
@@ -0,0 +1,44 @@
+"""Tests of ModemMetrics collected by a NimoModem with a simulated modem."""
+import pytest
+
+from pynimomodem.constants import AtErrorCode
+from pynimomodem.crcxmodem import apply_crc
+from pynimomodem.modem import ModemAtError, NimoModem
+
+from .ptymodem import MOBILE_ID, PTY_REQUIRED, PtyModem
+
+pytestmark = PTY_REQUIRED
+
+
+def test_metrics(make_modem, pty_modem: PtyModem):
+    modem: NimoModem = make_modem(manufacturer=None)
+    metrics = modem.metrics
+    modem.get_network_status()
+    assert metrics.to_dict()['bytes_sent'] == 0
+    metrics.enabled = True
+    received = len(pty_modem.received)
+    assert modem.get_mobile_id() == MOBILE_ID
+    with pytest.raises(ModemAtError):
+        modem.get_register(99)
+    modem._modem.crc = True
+    modem._modem.send_at_command('AT+GSN')
+    assert modem._modem.read_at_response() == AtErrorCode.OK
+    modem._modem.crc = False
+    exported = metrics.to_dict()
+    sent = pty_modem.received[received:]
+    assert sent[-1] == apply_crc('AT+GSN')
+    assert exported['bytes_sent'] == sum(len(c) + 1 for c in sent)
+    assert exported['bytes_received'] >= exported['bytes_sent']
+    assert exported['echo_bytes'] == exported['bytes_sent']
+    assert exported['crc_bytes'] == 5 + 7
+    assert exported['results'] == {'OK': len(sent) - 1, 'ERROR': 1}
+    assert exported['latency']['AT+GSN']['count'] == 2
+    assert exported['latency']['AT+GSN']['buckets'][float('inf')] == 2
+    assert exported['queue_wait']['POLL']['count'] >= 3
+    text = metrics.to_prometheus({'port': pty_modem.port})
+    assert (f'nimo_command_latency_seconds_count{{port="{pty_modem.port}",'
+            'command="AT+GSN"} 2') in text
+    assert f'nimo_command_results_total{{port="{pty_modem.port}",' \
+        'result="ERROR"} 1' in text
+    metrics.reset()
+    assert metrics.to_dict()['results'] == {}
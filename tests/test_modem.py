@@ -187,7 +187,7 @@ def test__parse_message_states(modem: NimoModem, test_input: str):
         modem._manufacturer = Manufacturer.ORBCOMM
         del test_parameters[1]
     is_mo = not test_input.startswith('"FM')   # not a great distinguisher but ok for test
-    states = modem._parse_message_states(test_input, is_mo)
+    states = modem._parse_message_states(test_input, modem._dialect, is_mo)
     assert isinstance(states, list) and len(states) == 1
     assert isinstance(states[0], NimoMessage)
     assert states[0].name == test_parameters[0].replace('"', '')
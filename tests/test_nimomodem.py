@@ -0,0 +1,173 @@
+"""Tests of NimoModem operations using a simulated modem (no hardware)."""
+import logging
+import threading
+import time
+
+import pytest
+
+from pynimomodem.constants import (
+    AtErrorCode,
+    CommandPriority,
+    NetworkStatus,
+    UrcCode,
+)
+from pynimomodem.modem import Manufacturer, ModemAtError, NimoModem
+
+from .ptymodem import BATCH, MOBILE_ID, PTY_REQUIRED, VRES_OK, PtyModem
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+def test_modem_operations(make_modem):
+    modem: NimoModem = make_modem(manufacturer=None)
+    assert modem.get_network_status() == NetworkStatus.OK
+    assert modem.get_manufacturer() == 'QUECTEL'
+    assert modem.get_urc() == UrcCode.REGED
+    with pytest.raises(ModemAtError) as exc_info:
+        modem.get_register(99)
+    assert exc_info.value.error_code == AtErrorCode.UNKNOWN_COMMAND
+
+
+def test_batch_commands(sim_modem: NimoModem, pty_modem: PtyModem):
+    responses = sim_modem.batch_commands(['ATS54?', 'ATS116?', 'AT+GSN',
+                                          'ATS88=5', 'AT%MGRS', 'ATS85?', 'ATI'])
+    assert pty_modem.received == [BATCH, 'ATI']
+    assert responses == [
+        '5',
+        '4600',
+        '01097882SKY9F17',
+        '',
+        '"10001",0.0,0,128,4,6,0\n"10002",0.0,0,128,6,12,12',
+        '220',
+        'Quectel\nCC200A-LB',
+    ]
+
+
+def test_numeric_responses(make_modem, pty_modem: PtyModem):
+    modem: NimoModem = make_modem(manufacturer=Manufacturer.QUECTEL)
+    assert modem.initialize(echo=False, verbose=False) is True
+    assert not pty_modem.echo and not pty_modem.verbose
+    assert not modem._modem.echo and not modem._modem.verbose
+    assert modem.get_mobile_id() == MOBILE_ID
+    assert modem.get_network_status() == NetworkStatus.OK
+    assert modem.get_urc() == UrcCode.REGED
+    with pytest.raises(ModemAtError) as exc_info:
+        modem.get_register(99)
+    assert exc_info.value.error_code == AtErrorCode.UNKNOWN_COMMAND
+    assert modem._modem.get_ophaned() == ''
+    assert modem.initialize() is True
+    assert modem._modem.echo and modem._modem.verbose
+    assert modem.get_mobile_id() == MOBILE_ID
+
+
+def test_benchmark_echo_off(make_pty, make_modem):
+    """Compare a large send with echo (E1 V1) to the echo off options."""
+    baudrate = 115200
+    sim = make_pty({'AT%MGRT=': VRES_OK}, baudrate=baudrate)
+    modem: NimoModem = make_modem(sim.port, baudrate=baudrate)
+    modem.metrics.enabled = True
+    payload = (bytes([16, 1]) + bytes(range(256)) * 25)[:6400]
+    
+    def timed_send() -> 'tuple[float, int]':
+        """Get the time of a send and the echo bytes received."""
+        echo_bytes = modem.metrics.to_dict()['echo_bytes']
+        start = time.monotonic()
+        assert modem.send_data(payload, message_name='BENCH') == 'BENCH'
+        return (time.monotonic() - start,
+                modem.metrics.to_dict()['echo_bytes'] - echo_bytes)
+    
+    modem.initialize()
+    echo_time, echo_bytes = timed_send()
+    modem.echo_off_size = 1024
+    scoped_time, scoped_bytes = timed_send()
+    assert sim.received[-3:] == ['ATE0', sim.received[-2], 'ATE1']
+    assert sim.echo and modem._modem.echo
+    modem.echo_off_size = 0
+    modem.initialize(echo=False, verbose=False)
+    no_echo_time, no_echo_bytes = timed_send()
+    command_size = len(sim.received[-1]) + 1
+    log.info('%d-byte send at %d baud: E1 V1 %.3f s,'
+             ' scoped echo off %.3f s, E0 V0 %.3f s',
+             command_size, baudrate, echo_time, scoped_time, no_echo_time)
+    assert echo_bytes >= command_size
+    assert scoped_bytes < command_size / 100
+    assert no_echo_bytes == 0
+
+
+def test_retry_baudrate(make_pty, make_modem):
+    sim: PtyModem = make_pty({'AT': VRES_OK}, line_rate=115200)
+    modem: NimoModem = make_modem(sim.port, manufacturer=None)
+    elapsed = []
+    for line_rate, echo in ((115200, True), (9600, False), (1200, False)):
+        sim.line_rate = line_rate
+        sim.echo = modem._modem.echo = echo
+        start = time.monotonic()
+        assert modem.retry_baudrate() is True
+        elapsed.append(time.monotonic() - start)
+        assert modem.baudrate == line_rate
+    log.info('Autobaud 9600 to 115200 (garbled echo) %.3f s,'
+             ' last known to 9600 %.3f s, to 1200 %.3f s', *elapsed)
+
+
+def test_modem_priority_scheduling(sim_modem: NimoModem, pty_modem: PtyModem):
+    """Control and poll commands queued behind a GNSS query go by priority."""
+    def gnss_fix(command: str) -> str:
+        time.sleep(0.3)
+        return '\r\n%GPS: $GPRMC,\r\n' + VRES_OK
+    
+    def wait_queued(priority: CommandPriority):
+        deadline = time.monotonic() + 2
+        while (not modem.queue_wait_stats[priority].waiting and
+               time.monotonic() < deadline):
+            time.sleep(0.001)
+    
+    pty_modem.responses['AT%GPS='] = gnss_fix
+    modem = sim_modem
+    results = {}
+    gnss = threading.Thread(
+        target=lambda: results.update(nmea=modem.get_nmea_data(wait_secs=5)))
+    poll = threading.Thread(
+        target=lambda: results.update(mobile_id=modem.get_mobile_id()))
+    control = threading.Thread(
+        target=lambda: results.update(connected=modem.is_connected()))
+    gnss.start()
+    while modem.is_ready and gnss.is_alive():
+        time.sleep(0.001)
+    poll.start()
+    wait_queued(CommandPriority.POLL)
+    control.start()
+    wait_queued(CommandPriority.CONTROL)
+    for thread in (gnss, poll, control):
+        thread.join(5)
+    assert results == {'nmea': '$GPRMC,',
+                       'mobile_id': MOBILE_ID,
+                       'connected': True}
+    assert pty_modem.received[1:] == ['AT', 'AT+GSN']
+    stats = modem.queue_wait_stats
+    assert stats[CommandPriority.POLL].max > stats[CommandPriority.CONTROL].max
+    assert stats[CommandPriority.GNSS].count == 1
+
+
+def test_await_boot_cpu_idle(make_modem, pty_modem: PtyModem):
+    modem: NimoModem = make_modem(manufacturer=None)
+    start_cpu = time.process_time()
+    assert modem.await_boot(2) is False
+    assert time.process_time() - start_cpu < 0.2
+    pty_modem.write('\r\nRDY\r\n')
+    assert modem.await_boot(2) is True
+
+
+def test_modem_urc_reader(make_modem, pty_modem: PtyModem):
+    modem: NimoModem = make_modem(manufacturer=Manufacturer.QUECTEL)
+    modem.start_reader()
+    pty_modem.write('\r\n+QURC: 1\r\n')
+    time.sleep(0.2)
+    assert modem.get_urc() == UrcCode.RX_END
+    received = []
+    modem.add_urc_callback(received.append)
+    pty_modem.write('\r\n+QURC: 2\r\n')
+    time.sleep(0.2)
+    assert received == [UrcCode.TX_END]
+    assert modem.get_urc() is None
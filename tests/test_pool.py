@@ -0,0 +1,49 @@
+"""Tests of ModemPool using simulated modems."""
+from pynimomodem.constants import NetworkStatus
+from pynimomodem.modem import ModemAtError
+from pynimomodem.pool import ModemPool
+
+from .ptymodem import GSN, PTY_REQUIRED, VRES_OK, PtyModem
+
+pytestmark = PTY_REQUIRED
+
+
+def test_modem_pool(make_pty, pty_modem: PtyModem):
+    sims = [pty_modem]
+    for i in range(2):
+        sim = make_pty(dict(pty_modem.responses))
+        sim.responses['AT+GSN'] = GSN.replace('F17', f'F2{i}') + VRES_OK
+        sim.responses['AT+QREG?'] = '\r\n+QREG: 2\r\n' + VRES_OK
+        sims.append(sim)
+    with ModemPool([sim.port for sim in sims] + ['/dev/null/x'],
+                   max_workers=2) as pool:
+        assert sorted(pool.mobile_ids) == ['01097882SKY9F17',
+                                           '01097882SKY9F20',
+                                           '01097882SKY9F21']
+        assert pool['01097882SKY9F20'] is not pool['01097882SKY9F21']
+        results = pool.broadcast('get_network_status')
+        assert len(results) == 3
+        assert all(r.ok and r.latency > 0 for r in results.values())
+        assert results['01097882SKY9F17'].value == NetworkStatus.OK
+        assert results['01097882SKY9F21'].value == NetworkStatus(2)
+        subset = pool.broadcast('get_register', 99,
+                                mobile_ids=['01097882SKY9F20'])
+        assert isinstance(subset['01097882SKY9F20'].error, ModemAtError)
+        results = pool.broadcast(lambda modem: modem.get_mobile_id())
+        assert results['01097882SKY9F20'].value == '01097882SKY9F20'
+        assert pool.reconnect('01097882SKY9F17').ok
+        sims[1].close()
+        assert not pool.reconnect('01097882SKY9F20').ok
+        assert len(pool) == 2
+
+
+def test_modem_pool_operation_error(pty_modem: PtyModem):
+    """Any exception of an operation is captured in its result."""
+    def fail(modem):
+        raise RuntimeError('operation failed')
+    
+    with ModemPool([pty_modem.port]) as pool:
+        result = pool.broadcast(fail)['01097882SKY9F17']
+        assert not result.ok
+        assert isinstance(result.error, RuntimeError)
+        assert pool.broadcast('get_mobile_id')['01097882SKY9F17'].ok
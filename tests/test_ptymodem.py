@@ -0,0 +1,235 @@
+"""Tests of AtCommandBuffer using a simulated modem on a pseudo-terminal.
+"""
+import logging
+import time
+
+import pytest
+from serial import Serial
+
+from pynimomodem.atcommandbuffer import (
+    DEFAULT_AT_TIMEOUT,
+    ORPHAN_MAX_BYTES,
+    ORPHAN_MAX_RECORDS,
+    RESPONSE_OVERHEAD_BYTES,
+    AtCommandBuffer,
+)
+from pynimomodem.constants import AtErrorCode
+from pynimomodem.crcxmodem import apply_crc
+
+from .ptymodem import (
+    MGFG_LARGE,
+    MGFG_SMALL,
+    PTY_REQUIRED,
+    VRES_ERROR,
+    VRES_OK,
+    PtyModem,
+    mgfg_response,
+    with_crc,
+)
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+@pytest.fixture
+def pty_buffer(pty_modem: PtyModem):
+    serial = Serial(pty_modem.port, 9600)
+    yield AtCommandBuffer(serial)
+    serial.close()
+
+
+def _timed_response(buffer: AtCommandBuffer,
+                    command: str,
+                    prefix: str = None) -> 'tuple[AtErrorCode, str, float]':
+    """Returns (error, response, cpu_seconds) for a command round trip."""
+    buffer.send_at_command(command)
+    start = time.thread_time()
+    err = buffer.read_at_response(prefix, timeout=10)
+    cpu_time = time.thread_time() - start
+    return err, buffer.get_response(), cpu_time
+
+
+def test_basic_response(pty_buffer: AtCommandBuffer):
+    err, response, _ = _timed_response(pty_buffer, 'AT')
+    assert err == AtErrorCode.OK
+    assert response == ''
+
+
+def test_prefix_removal(pty_buffer: AtCommandBuffer):
+    err, response, _ = _timed_response(pty_buffer, 'AT+GSN', '+GSN:')
+    assert err == AtErrorCode.OK
+    assert response == '01097882SKY9F17'
+
+
+def test_multiline_response(pty_buffer: AtCommandBuffer):
+    err, response, _ = _timed_response(pty_buffer, 'AT%MGRS', '%MGRS:')
+    assert err == AtErrorCode.OK
+    assert response.split('\n') == ['"10001",0.0,0,128,4,6,0',
+                                     '"10002",0.0,0,128,6,12,12']
+
+
+def test_short_responses(pty_buffer: AtCommandBuffer):
+    err, response, _ = _timed_response(pty_buffer, 'ATQ0')
+    assert err == AtErrorCode.OK and response == ''
+    assert pty_buffer.verbose is False
+    err, response, _ = _timed_response(pty_buffer, 'ATQ4')
+    assert err == AtErrorCode.ERROR and response == ''
+
+
+def test_crc_response(pty_buffer: AtCommandBuffer, pty_modem: PtyModem):
+    pty_buffer.crc = True
+    err, response, _ = _timed_response(pty_buffer, 'AT+GSN', '+GSN:')
+    assert err == AtErrorCode.OK
+    assert response == '01097882SKY9F17'
+    err, response, _ = _timed_response(pty_buffer, 'AT+BAD')
+    assert err == AtErrorCode.INVALID_RESPONSE_CRC
+    # running CRC over a response arriving in many chunks
+    pty_modem.responses[apply_crc(MGFG_LARGE)] = with_crc(
+        mgfg_response('FM02.01', 10240))
+    pty_modem.baudrate = 921600
+    err, response, _ = _timed_response(pty_buffer, MGFG_LARGE, '%MGFG:')
+    assert err == AtErrorCode.OK
+    assert len(response.split(',')[7]) == 10240
+
+
+def test_orphan_detection(pty_buffer: AtCommandBuffer):
+    err, response, _ = _timed_response(pty_buffer, 'AT+ORPHAN')
+    assert err == AtErrorCode.OK and response == ''
+    assert 'STRAY' in pty_buffer.get_ophaned()
+
+
+def test_orphan_records(pty_buffer: AtCommandBuffer):
+    start = time.monotonic()
+    for _ in range(ORPHAN_MAX_RECORDS + 2):
+        _timed_response(pty_buffer, 'AT+ORPHAN')
+    records = list(pty_buffer.iter_orphaned())
+    assert len(records) == ORPHAN_MAX_RECORDS
+    assert all(r.data == b'STRAY\r\n' and r.command == 'AT+ORPHAN\r'
+               for r in records)
+    assert start < records[0].timestamp <= records[-1].timestamp
+    assert pty_buffer.drain_orphaned() == records
+    assert pty_buffer.get_ophaned() == ''
+    dump = b'X' * (ORPHAN_MAX_BYTES - 10)
+    pty_buffer._add_orphan(dump)
+    pty_buffer._add_orphan(b'Y' * 20)
+    assert [len(r.data) for r in pty_buffer.iter_orphaned()] == [20]
+
+
+@pytest.mark.parametrize('reader', [False, True])
+def test_unsolicited_during_command(pty_buffer: AtCommandBuffer,
+                                    reader: bool):
+    received = []
+    pty_buffer.add_unsolicited_callback(received.append)
+    if reader:
+        pty_buffer.start_reader()
+    err, response, _ = _timed_response(pty_buffer, 'AT+URC')
+    assert err == AtErrorCode.OK and response == ''
+    err, response, _ = _timed_response(pty_buffer, 'AT+QREG?', '+QREG:')
+    assert err == AtErrorCode.OK and response == '5'
+    assert pty_buffer.get_ophaned() == ''
+    assert received == ['+QURC: 1', '+QURC: 3']
+    pty_buffer.remove_unsolicited_callback(received.append)
+    _timed_response(pty_buffer, 'AT+URC')
+    assert pty_buffer.get_unsolicited(('+QURC:',)) == '+QURC: 1'
+    assert pty_buffer.get_unsolicited() is None
+    pty_buffer.stop_reader()
+
+
+@pytest.mark.parametrize('reader', [False, True])
+def test_data_after_result_code(pty_buffer: AtCommandBuffer,
+                                pty_modem: PtyModem,
+                                reader: bool):
+    """Data in the same read as the result code is not in the response."""
+    pty_modem.responses.update({
+        'AT+EXTRA': VRES_OK + 'EXTRA\r\n',
+        'AT+TRAIL': '\r\nfoo\r\n' + VRES_OK + '\r\n+QURC: 2\r\n',
+        'AT+ETRAIL': VRES_ERROR + '\r\n+QURC: 4\r\n',
+    })
+    received = []
+    pty_buffer.add_unsolicited_callback(received.append)
+    if reader:
+        pty_buffer.start_reader()
+    err, response, _ = _timed_response(pty_buffer, 'AT+EXTRA')
+    assert err == AtErrorCode.OK and response == ''
+    err, response, _ = _timed_response(pty_buffer, 'AT+TRAIL')
+    assert err == AtErrorCode.OK and response == 'foo'
+    err, response, _ = _timed_response(pty_buffer, 'AT+ETRAIL')
+    assert err == AtErrorCode.ERROR and response == ''
+    assert not pty_buffer.crc
+    err, response, _ = _timed_response(pty_buffer, 'AT')
+    assert err == AtErrorCode.OK and response == ''
+    assert received == ['+QURC: 2', '+QURC: 4']
+    assert pty_buffer.get_ophaned() == 'EXTRA\r\n'
+    pty_buffer.stop_reader()
+
+
+def test_unsolicited_reader_idle(pty_buffer: AtCommandBuffer,
+                                 pty_modem: PtyModem):
+    pty_buffer.start_reader()
+    pty_modem.write('\r\n+QURC: 0\r\n')
+    assert pty_buffer.get_unsolicited(timeout=2) == '+QURC: 0'
+    pty_modem.write('\r\nRDY\r\n')
+    assert pty_buffer.get_unsolicited(('RDY',), timeout=2) == 'RDY'
+    err, response, _ = _timed_response(pty_buffer, 'AT+GSN', '+GSN:')
+    assert err == AtErrorCode.OK and response == '01097882SKY9F17'
+    pty_buffer.stop_reader()
+    assert not pty_buffer.reader_running
+
+
+@pytest.mark.parametrize('command,size', [(MGFG_SMALL, 16),
+                                          (MGFG_LARGE, 10240)])
+def test_benchmark_response_cpu(pty_buffer: AtCommandBuffer,
+                                command: str,
+                                size: int):
+    runs = 5
+    cpu_times = []
+    for _ in range(runs):
+        err, response, cpu_time = _timed_response(pty_buffer, command,
+                                                  '%MGFG:')
+        assert err == AtErrorCode.OK
+        assert len(response.split(',')[7]) == size
+        cpu_times.append(cpu_time)
+    log.info('%d-byte payload response CPU time: %.3f ms (best of %d)',
+             size, min(cpu_times) * 1000, runs)
+
+
+def test_wait_cpu_idle(pty_buffer: AtCommandBuffer, pty_modem: PtyModem):
+    """A response timeout should block rather than spin on the CPU."""
+    timeout = 2
+    pty_buffer.send_at_command('AT%GPS=1,35')   # echoed, never answered
+    start_cpu = time.process_time()
+    start = time.time()
+    err = pty_buffer.read_at_response(timeout=timeout)
+    cpu_time = time.process_time() - start_cpu
+    assert err == AtErrorCode.TIMEOUT
+    assert time.time() - start >= timeout
+    log.info('CPU time during %d second response wait: %.1f ms',
+             timeout, cpu_time * 1000)
+    assert cpu_time < 0.1 * timeout
+    start_cpu = time.process_time()
+    assert pty_buffer.read_rx_buffer(read_until='\r\n', timeout=1) == ''
+    assert time.process_time() - start_cpu < 0.1
+
+
+def test_float_timeout(pty_buffer: AtCommandBuffer):
+    pty_buffer.send_at_command('AT%GPS=1,35')   # echoed, never answered
+    start = time.monotonic()
+    err = pty_buffer.read_at_response(timeout=0.5)
+    elapsed = time.monotonic() - start
+    assert err == AtErrorCode.TIMEOUT
+    assert 0.5 <= elapsed < 1.5
+
+
+def test_response_timeout(pty_buffer: AtCommandBuffer):
+    base64_size = 13336   # 10000-byte MT message
+    timeout = pty_buffer.response_timeout(MGFG_LARGE, base64_size)
+    assert timeout > DEFAULT_AT_TIMEOUT + 13.9   # wire time at 9600 baud
+    assert pty_buffer.response_timeout(MGFG_LARGE) == DEFAULT_AT_TIMEOUT + (
+        (len(MGFG_LARGE) + RESPONSE_OVERHEAD_BYTES) * 10 / 9600)
+    err, _, _ = _timed_response(pty_buffer, MGFG_LARGE, '%MGFG:')
+    assert err == AtErrorCode.OK
+    # learned from the observed response size and latency
+    assert pty_buffer.response_timeout(MGFG_LARGE) > DEFAULT_AT_TIMEOUT + 10
+    pty_buffer.serial.baudrate = 115200
+    assert pty_buffer.response_timeout(MGFG_LARGE) < DEFAULT_AT_TIMEOUT + 2
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import time
+
+from pynimomodem.constants import CommandPriority
+from pynimomodem.scheduler import AsyncCommandScheduler, CommandScheduler
+
+
+def _wait_queued(scheduler: CommandScheduler, count: int):
+    deadline = time.monotonic() + 2
+    while (sum(s.waiting for s in scheduler.stats().values()) < count and
+           time.monotonic() < deadline):
+        time.sleep(0.001)
+
+
+def test_priority_order():
+    scheduler = CommandScheduler()
+    granted = []
+
+    def command(name: str, priority: CommandPriority):
+        scheduler.acquire(priority)
+        granted.append(name)
+        scheduler.release()
+
+    scheduler.acquire(CommandPriority.GNSS)
+    requests = [('poll1', CommandPriority.POLL),
+                ('gnss', CommandPriority.GNSS),
+                ('poll2', CommandPriority.POLL),
+                ('send', CommandPriority.SEND),
+                ('control', CommandPriority.CONTROL)]
+    threads = []
+    for i, (name, priority) in enumerate(requests):
+        thread = threading.Thread(target=command, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        _wait_queued(scheduler, i + 1)
+    assert scheduler.locked()
+    scheduler.release()
+    for thread in threads:
+        thread.join(2)
+    assert granted == ['control', 'send', 'poll1', 'poll2', 'gnss']
+    assert not scheduler.locked()
+    stats = scheduler.stats()
+    assert stats[CommandPriority.POLL].count == 2
+    assert stats[CommandPriority.GNSS].count == 2
+    assert stats[CommandPriority.POLL].max >= stats[CommandPriority.SEND].max
+    assert all(s.waiting == 0 for s in stats.values())
+
+
+def test_async_priority_order():
+    async def run():
+        scheduler = AsyncCommandScheduler()
+        granted = []
+
+        async def command(name: str, priority: CommandPriority):
+            await scheduler.acquire(priority)
+            granted.append(name)
+            await asyncio.sleep(0)
+            scheduler.release()
+
+        await scheduler.acquire(CommandPriority.GNSS)
+        tasks = [asyncio.ensure_future(command(name, priority))
+                 for name, priority in (('poll', CommandPriority.POLL),
+                                        ('cancel', CommandPriority.SEND),
+                                        ('send', CommandPriority.SEND),
+                                        ('control', CommandPriority.CONTROL))]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        scheduler.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert granted == ['control', 'send', 'poll']
+        assert not scheduler.locked()
+
+    asyncio.run(run())
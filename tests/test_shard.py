@@ -0,0 +1,89 @@
+"""Tests of ModemShardSupervisor using simulated modems."""
+import logging
+import os
+import time
+
+import pytest
+
+from pynimomodem.constants import NetworkStatus
+from pynimomodem.modem import ModemAtError
+from pynimomodem.shard import ModemShardSupervisor
+
+from .ptymodem import (
+    GSN,
+    MOBILE_ID,
+    PTY_REQUIRED,
+    VRES_OK,
+    PtyModem,
+    default_responses,
+)
+
+log = logging.getLogger(__name__)
+
+pytestmark = PTY_REQUIRED
+
+
+def test_shard_supervisor(make_pty, pty_modem: PtyModem):
+    idle_modem: PtyModem = make_pty({})
+    ports = [pty_modem.port, idle_modem.port]
+    with ModemShardSupervisor(ports, processes=2) as supervisor:
+        assert supervisor.processes == 2
+        assert supervisor.get_shard(ports[0]) != supervisor.get_shard(
+            ports[1])
+        assert supervisor[ports[0]].get_mobile_id() == MOBILE_ID
+        with pytest.raises(ModemAtError):
+            supervisor[ports[0]].get_register(99)
+        results = supervisor.broadcast('get_network_status',
+                                       ports=ports[:1])
+        assert results[ports[0]].value == NetworkStatus.OK
+        pending = supervisor[ports[1]].submit('get_network_status')
+        pid = supervisor.get_pid(ports[1])
+        os.kill(pid, 9)
+        with pytest.raises(ConnectionError):
+            pending.result(5)
+        deadline = time.monotonic() + 5
+        while (supervisor.get_pid(ports[1]) == pid and
+               time.monotonic() < deadline):
+            time.sleep(0.01)
+        assert supervisor.restarts == 1
+        idle_modem.responses['AT+GSN'] = GSN + VRES_OK
+        assert supervisor[ports[1]].get_mobile_id() == MOBILE_ID
+
+
+def test_shard_cancelled_call(pty_modem: PtyModem):
+    """A call cancelled while pending does not stop the shard receiving."""
+    def slow_gsn(command: str) -> str:
+        time.sleep(0.2)
+        return GSN + VRES_OK
+    
+    pty_modem.responses['AT+GSN'] = slow_gsn
+    with ModemShardSupervisor([pty_modem.port], processes=1) as supervisor:
+        proxy = supervisor[pty_modem.port]
+        cancelled = proxy.submit('get_mobile_id')
+        assert cancelled.cancel()
+        assert proxy.submit('get_mobile_id').result(5) == MOBILE_ID
+        assert cancelled.cancelled()
+        assert supervisor.restarts == 0
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason='Requires 2+ CPUs')
+def test_benchmark_shard_scaling(make_pty):
+    """Broadcast throughput with the ports sharded across 1 and 2 workers."""
+    sims = [make_pty(default_responses()) for _ in range(4)]
+    ports = [sim.port for sim in sims]
+    rounds = 50
+    rates = {}
+    for processes in (1, 2):
+        with ModemShardSupervisor(ports, processes=processes) as supervisor:
+            supervisor.broadcast('get_network_status')   # workers started
+            start = time.monotonic()
+            for _ in range(rounds):
+                results = supervisor.broadcast('get_network_status')
+                assert all(r.value == NetworkStatus.OK
+                           for r in results.values())
+            rates[processes] = rounds * len(ports) / (
+                time.monotonic() - start)
+    assert all(len(sim.received) >= 2 * rounds for sim in sims)
+    log.info('Sharded broadcast get_network_status on %d modems:'
+             ' 1 worker %.0f/s, 2 workers %.0f/s (x%.2f)', len(ports),
+             rates[1], rates[2], rates[2] / rates[1])